@@ -1,5 +1,9 @@
-from dotenv import load_dotenv
-load_dotenv()
+import os
+
+# Production workers get their settings from the environment only.
+if os.getenv("STARTUP_MODE", "development").lower() != "production":
+    from dotenv import load_dotenv
+    load_dotenv()
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
@@ -7,9 +11,10 @@ from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from app.config import Config
 from flask_socketio import SocketIO
+from app.services.replicas import RoutingSession
 
 socketio = SocketIO(cors_allowed_origins="*")
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
 
@@ -17,16 +22,45 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    from app.services.serialization import JSONProvider
+    app.json = JSONProvider(app)
+
+    from app.services.replicas import configure_engines, replica_router
+    configure_engines(app)
     db.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
-    socketio.init_app(app)
+
+    # Imported before init_app so its handlers are queued on ``socketio`` and
+    # bound to the server of every app, not only the first one created.
+    import app.sockets.realtime as _
+    from app.services.bus import client_manager_options
+    socketio.init_app(app, **client_manager_options(app.config["SOCKETIO_MESSAGE_QUEUE"]))
+
+    from app.services.hashing import password_hasher
+    password_hasher.init_app(app)
+
+    from app.services.broadcast import broadcaster
+    broadcaster.init_app(app)
+
+    from app.services.cache import event_cache
+    event_cache.init_app(app)
+
+    replica_router.init_app(app)
+
+    from app.services.metrics import instrumentation
+    instrumentation.init_app(app)
     
     from app.routes.auth import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
 
+    from app.migrations.cli import db_cli
+    app.cli.add_command(db_cli)
+
     with app.app_context():
-        db.create_all()
+        if app.config["AUTO_MIGRATE"]:
+            from app.migrations import upgrade
+            upgrade(db.engine, log=app.logger.info)
 
     from app.routes.events import events_bp
     app.register_blueprint(events_bp, url_prefix='/api')
@@ -40,6 +74,17 @@ def create_app():
     from app.routes.changelog import changelog_bp 
     app.register_blueprint(changelog_bp , url_prefix='/api')
 
-    import app.sockets.realtime as _
+    from app.routes.scheduling import scheduling_bp
+    app.register_blueprint(scheduling_bp, url_prefix='/api')
+
+    from app.routes.ical import ical_bp
+    app.register_blueprint(ical_bp, url_prefix='/api')
+
+    from app.routes.metrics import metrics_bp
+    app.register_blueprint(metrics_bp)
+
+    if app.config["PREWARM_ON_CREATE"]:
+        from app.services.startup import prewarm
+        prewarm(app)
     
     return app
@@ -0,0 +1,107 @@
+"""ASGI serving mode.
+
+``create_asgi_app`` wraps the Flask app in an ASGI application: the event
+read paths in ``app.aio.routes`` run as coroutines on async SQLAlchemy
+sessions, Socket.IO is served by an asyncio server with the handlers from
+``app.aio.realtime``, and every other route runs on the Flask app through a
+bounded thread pool. Serve it with ``uvicorn asgi:application``.
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import socketio
+from flask import request, request_started
+from werkzeug.exceptions import HTTPException
+
+from app.aio.database import async_db
+from app.aio.realtime import AsyncRealtime, async_client_manager
+from app.aio.routes import HANDLERS
+from app.aio.wsgi import WsgiBridge, environ_from_scope, response_headers
+from app.services.broadcast import broadcaster
+
+EMPTY_BODY = b""
+
+
+class AsgiApp:
+    """Dispatches HTTP requests to the async handlers or the WSGI bridge."""
+
+    def __init__(self, flask_app, handlers, wsgi):
+        self.flask_app = flask_app
+        self.handlers = handlers
+        self.wsgi = wsgi
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        environ = environ_from_scope(scope, io.BytesIO())
+        try:
+            endpoint, _ = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint = None
+        handler = self.handlers.get(endpoint)
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+        await self._dispatch(handler, environ, send)
+
+    async def _dispatch(self, handler, environ, send):
+        # The same steps as Flask.wsgi_app around an awaited view.
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            try:
+                try:
+                    request_started.send(app, _async_wrapper=app.ensure_sync)
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await handler(**request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            await self._send(response, environ["REQUEST_METHOD"] == "HEAD", send)
+        finally:
+            ctx.pop(error)
+
+    async def _send(self, response, head, send):
+        chunks = getattr(response, "chunks", None)
+        await send({"type": "http.response.start", "status": response.status_code,
+                    "headers": response_headers(response.headers.items())})
+        if chunks is not None and not head:
+            async for chunk in chunks:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": EMPTY_BODY})
+            return
+        await send({"type": "http.response.body", "body": EMPTY_BODY if head else response.get_data()})
+
+
+def create_asgi_app(flask_app):
+    """The ASGI application serving ``flask_app``."""
+    async_db.init_app(flask_app)
+    executor = ThreadPoolExecutor(max_workers=flask_app.config["ASGI_WSGI_THREADS"], thread_name_prefix="wsgi")
+    http = AsgiApp(flask_app, HANDLERS, WsgiBridge(flask_app.wsgi_app, executor))
+
+    client_manager = async_client_manager(flask_app.config["SOCKETIO_MESSAGE_QUEUE"])
+    server = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", client_manager=client_manager)
+    AsyncRealtime(flask_app, server)
+
+    async def startup():
+        await async_db.prewarm(flask_app.config["PREWARM_DB_CONNECTIONS"])
+        if client_manager is None:
+            # Changes made by the Flask routes are broadcast from threads;
+            # hand them to this server on the event loop.
+            loop = asyncio.get_running_loop()
+            broadcaster.emitter = lambda event, data, to: asyncio.run_coroutine_threadsafe(
+                server.emit(event, data, to=to), loop
+            )
+
+    async def shutdown():
+        broadcaster.emitter = None
+        await async_db.dispose()
+        executor.shutdown(wait=False)
+
+    return socketio.ASGIApp(server, other_asgi_app=http, on_startup=startup, on_shutdown=shutdown)
@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Synchronous driver -> asyncio driver for the same database.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mariadb": "mariadb+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_url(url):
+    """The asyncio form of SQLALCHEMY_DATABASE_URI (mysql+mysqlconnector -> mysql+aiomysql)."""
+    url = make_url(url)
+    if url.get_dialect().is_async:
+        return url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for {backend!r}; set ASYNC_DATABASE_URI")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncDatabase:
+    """Async engine and sessions over the same models as ``db``.
+
+    Used by the ASGI read paths and Socket.IO handlers so a connection
+    waiting on the database does not hold a thread. Writes stay on the
+    synchronous Flask-SQLAlchemy session. With SQLALCHEMY_REPLICA_URI set,
+    ``session(replica=True)`` reads from the replica and marks the session
+    with ``info["replica"]``.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.replica_engine = None
+        self.sessionmaker = None
+        self.replica_sessionmaker = None
+
+    def init_app(self, app):
+        self.engine = self._engine(app, app.config["ASYNC_DATABASE_URI"] or app.config["SQLALCHEMY_DATABASE_URI"])
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        if app.config["SQLALCHEMY_REPLICA_URI"]:
+            self.replica_engine = self._engine(app, app.config["SQLALCHEMY_REPLICA_URI"])
+            self.replica_sessionmaker = async_sessionmaker(self.replica_engine, expire_on_commit=False)
+
+    def _engine(self, app, url):
+        url = async_url(url)
+        options = {"pool_pre_ping": app.config["DB_POOL_PRE_PING"], "pool_recycle": app.config["DB_POOL_RECYCLE"]}
+        if url.get_backend_name() != "sqlite":
+            options.update(pool_size=app.config["ASYNC_DB_POOL_SIZE"],
+                           max_overflow=app.config["ASYNC_DB_MAX_OVERFLOW"],
+                           pool_timeout=app.config["DB_POOL_TIMEOUT"])
+        return create_async_engine(url, **options)
+
+    @asynccontextmanager
+    async def session(self, replica=False):
+        replica = bool(replica and self.replica_sessionmaker)
+        async with (self.replica_sessionmaker if replica else self.sessionmaker)() as session:
+            session.info["replica"] = replica
+            yield session
+
+    async def prewarm(self, connections):
+        """Open up to ``connections`` pooled connections per engine ahead of the first request."""
+        for engine in (self.engine, self.replica_engine):
+            if engine is None:
+                continue
+            size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+            opened = [await engine.connect().start() for _ in range(min(connections, size))]
+            for connection in opened:
+                await connection.close()
+
+    async def dispose(self):
+        for engine in (self.engine, self.replica_engine):
+            if engine is not None:
+                await engine.dispose()
+
+
+async_db = AsyncDatabase()
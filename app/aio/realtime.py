@@ -0,0 +1,108 @@
+"""The handlers of ``app/sockets/realtime.py`` on an asyncio Socket.IO server."""
+from urllib.parse import parse_qs
+
+import socketio
+from sqlalchemy import select
+
+from app.aio.database import async_db
+from app.models import Event, EventPermission
+from app.services.broadcast import event_room, user_room
+from app.services.metrics import instrumentation
+from app.sockets.realtime import authenticated, user_from_token
+
+
+def async_client_manager(url):
+    """Client manager for SOCKETIO_MESSAGE_QUEUE on the asyncio server.
+
+    Uses the channel Flask-SocketIO publishes on, so emits made by the Flask
+    routes through the queue reach the clients of this server.
+    """
+    if not url:
+        return None
+    if url.startswith("local:"):
+        raise ValueError("The local:// message bus needs the threaded server; use redis:// with the ASGI mode")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return socketio.AsyncRedisManager(url, channel="flask-socketio")
+    if url.startswith(("amqp://", "amqps://")):
+        return socketio.AsyncAioPikaManager(url, channel="flask-socketio")
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE {url!r} for the ASGI mode")
+
+
+def _token_from(environ, auth):
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    header = environ.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        return header[7:]
+    return parse_qs(environ.get('QUERY_STRING', '')).get('token', [None])[0]
+
+
+class AsyncRealtime:
+    """Connect and room handlers registered on ``server``."""
+
+    def __init__(self, app, server):
+        self.app = app
+        self.server = server
+        for name in ('connect', 'disconnect', 'join_room', 'subscribe_event', 'leave_room'):
+            server.on(name, getattr(self, name))
+
+    async def _can_join(self, sid, room):
+        user_id = authenticated.get(sid)
+        if room.startswith('user:'):
+            return user_id is not None and room == user_room(user_id)
+        if room.startswith('event:'):
+            if user_id is None:
+                return False
+            try:
+                event_id = int(room.split(':', 1)[1])
+            except ValueError:
+                return False
+            async with async_db.session() as session:
+                event = await session.get(Event, event_id)
+                if not event:
+                    return False
+                return event.owner_id == user_id or (await session.execute(
+                    select(EventPermission.id).where(
+                        EventPermission.event_id == event_id, EventPermission.user_id == user_id
+                    ).limit(1)
+                )).first() is not None
+        return False
+
+    @instrumentation.socket_handler('connect')
+    async def connect(self, sid, environ, auth=None):
+        self.app.logger.debug('Client connected: %s', sid)
+        token = _token_from(environ, auth)
+        if token:
+            with self.app.app_context():
+                user_id = user_from_token(token)
+            if user_id is None:
+                return False
+            authenticated[sid] = user_id
+            await self.server.enter_room(sid, user_room(user_id))
+        await self.server.emit('message', {'data': 'Connected to server'}, to=sid)
+
+    @instrumentation.socket_handler('disconnect')
+    async def disconnect(self, sid, *args):
+        authenticated.pop(sid, None)
+        self.app.logger.debug('Client disconnected: %s', sid)
+
+    @instrumentation.socket_handler('join_room')
+    async def join_room(self, sid, data):
+        room = data.get('room')
+        if room:
+            if not await self._can_join(sid, room):
+                await self.server.emit('message', {'data': f'Not allowed to join room {room}'}, to=sid)
+                return
+            await self.server.enter_room(sid, room)
+            await self.server.emit('message', {'data': f'Joined room {room}'}, to=room)
+
+    @instrumentation.socket_handler('subscribe_event')
+    async def subscribe_event(self, sid, data):
+        await self.join_room(sid, {'room': event_room(data.get('event_id'))})
+
+    @instrumentation.socket_handler('leave_room')
+    async def leave_room(self, sid, data):
+        room = data.get('room')
+        if room:
+            await self.server.leave_room(sid, room)
+            await self.server.emit('message', {'data': f'Left room {room}'}, to=room)
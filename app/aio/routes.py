@@ -0,0 +1,104 @@
+"""Event read paths served natively in the ASGI mode.
+
+Handlers run inside a Flask request context like regular views, so
+``request``, ``jsonify``, the JWT helpers and the conditional-request
+helpers work unchanged; only their queries go through an async session.
+``HANDLERS`` maps Flask endpoints to the coroutine that replaces them, so
+URLs and methods come from the blueprints.
+"""
+import asyncio
+import functools
+
+from flask import Response, current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from app.aio.database import async_db
+from app.models import Event
+from app.services.cache import event_cache
+from app.services.conditional import conditional, event_etag, not_modified, not_modified_response
+from app.services.listing import EVENT_COLUMNS, ROW_KEYS, EventListing, event_to_dict, visible_events
+from app.services.replicas import replica_router
+from app.services.serialization import ndjson
+
+
+class StreamingResponse(Response):
+    """Response whose body is the async iterator ``chunks``."""
+
+    def __init__(self, chunks, **kwargs):
+        super().__init__(**kwargs)
+        self.chunks = chunks
+
+
+def access_token_required(fn):
+    # jwt_required() would run the coroutine through Flask's ensure_sync.
+    # The blocklist check may query the synchronous session, so the token is
+    # verified on a thread; to_thread carries the request context over.
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        await asyncio.to_thread(verify_jwt_in_request)
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+@access_token_required
+async def list_events():
+    listing = EventListing(int(get_jwt_identity()), request.args, current_app.config["LIST_MAX_PER_PAGE"])
+    async with async_db.session(replica=replica_router.prefers_replica(get_jwt_identity())) as session:
+        calendar_version = (await session.execute(listing.calendar_version_statement())).scalar()
+        etag = listing.etag(calendar_version, request.query_string.decode())
+        if not_modified(etag):
+            return not_modified_response(etag)
+
+        max_occurrences = current_app.config["RECURRENCE_MAX_OCCURRENCES"]
+        try:
+            query = listing.statement()
+            series_query = listing.series_statement(query)
+            if series_query is not None:
+                series_rows = (await session.execute(series_query)).all()
+                # Expanding series is CPU work; keep it off the event loop.
+                query = await asyncio.to_thread(listing.without_empty_series, query, series_rows, max_occurrences)
+            page_query = listing.page_statement(query)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        total = (await session.execute(listing.count_statement(query))).scalar() if listing.include_total else None
+        rows = (await session.execute(page_query)).all()
+    response = await asyncio.to_thread(listing.response, rows, total, max_occurrences)
+    return conditional(jsonify(response), etag), 200
+
+
+@access_token_required
+async def get_event(event_id):
+    user_id = int(get_jwt_identity())
+    async with async_db.session(replica=replica_router.prefers_replica(get_jwt_identity())) as session:
+        event = await event_cache.event_async(session, event_id)
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+        role = await event_cache.role_async(session, event, user_id)
+
+    etag = event_etag(event, role)
+    if not_modified(etag, event.updated_at):
+        return not_modified_response(etag, event.updated_at)
+    return conditional(jsonify(event_to_dict(event, role)), etag, event.updated_at), 200
+
+
+@access_token_required
+async def stream_events():
+    """Every event the caller can see as newline-delimited JSON, by id."""
+    statement = visible_events(int(get_jwt_identity()), *EVENT_COLUMNS).order_by(Event.id)
+    replica = replica_router.prefers_replica(get_jwt_identity())
+
+    async def chunks():
+        async with async_db.session(replica=replica) as session:
+            result = await session.stream(statement.execution_options(yield_per=1000))
+            async for rows in result.partitions():
+                yield b"".join(ndjson(rows, ROW_KEYS))
+
+    return StreamingResponse(chunks(), mimetype="application/x-ndjson")
+
+
+HANDLERS = {
+    "events.list_events": list_events,
+    "events.get_event": get_event,
+    "events.stream_events": stream_events,
+}
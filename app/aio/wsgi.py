@@ -0,0 +1,102 @@
+import asyncio
+import sys
+from tempfile import SpooledTemporaryFile
+
+
+def environ_from_scope(scope, body):
+    """WSGI environ for the ASGI HTTP ``scope`` with ``body`` as its input."""
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def response_headers(headers):
+    return [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]
+
+
+class WsgiBridge:
+    """Runs a WSGI app for ASGI requests on a bounded thread pool.
+
+    Each request gets a pool thread for as long as the WSGI app runs, the
+    same as under the threaded server; the response is passed back to the
+    event loop chunk by chunk, so streaming responses keep streaming.
+    """
+
+    def __init__(self, wsgi_app, executor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        body = SpooledTemporaryFile(max_size=1024 * 1024)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self._run, environ_from_scope(scope, body), send, loop)
+        finally:
+            body.close()
+
+    def _run(self, environ, send, loop):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = response_headers(headers)
+
+        def deliver(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            head_sent = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not head_sent:
+                    deliver({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+                    head_sent = True
+                deliver({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not head_sent:
+                deliver({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            deliver({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
@@ -5,6 +5,141 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pools of the primary and the replica. Pre-ping and recycling
+    # drop connections the server closed (MySQL wait_timeout) before use.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Read-only routes query SQLALCHEMY_REPLICA_URI when set, except for a
+    # user who wrote in the last REPLICA_STICKY_SECONDS (keep it above the
+    # replication lag). Those marks must be seen by every worker, so they
+    # need a shared EVENT_CACHE_URL unless REPLICA_STICKY_LOCAL says there is
+    # only one process.
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI")
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+    REPLICA_STICKY_LOCAL = os.getenv("REPLICA_STICKY_LOCAL", "false").lower() == "true"
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=60)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Per-owner in-memory interval index used for conflict detection. A
+    # worker reloads an owner's index when their calendar_version moved (a
+    # write on any worker) or after CONFLICT_INDEX_TTL seconds.
+    CONFLICT_INDEX_ENABLED = os.getenv("CONFLICT_INDEX_ENABLED", "true").lower() == "true"
+    CONFLICT_INDEX_TTL = int(os.getenv("CONFLICT_INDEX_TTL", 30))
+    CONFLICT_INDEX_MAX_OWNERS = int(os.getenv("CONFLICT_INDEX_MAX_OWNERS", 1024))
+
+    # Recurring series are expanded lazily; these bound how far a candidate
+    # series is checked for conflicts and how many occurrences a list returns.
+    RECURRENCE_CONFLICT_HORIZON_DAYS = int(os.getenv("RECURRENCE_CONFLICT_HORIZON_DAYS", 365))
+    RECURRENCE_MAX_OCCURRENCES = int(os.getenv("RECURRENCE_MAX_OCCURRENCES", 500))
+
+    # Event versions store field-level deltas with a full keyframe every
+    # VERSION_KEYFRAME_INTERVAL versions, bounding reconstruction work.
+    VERSION_KEYFRAME_INTERVAL = int(os.getenv("VERSION_KEYFRAME_INTERVAL", 10))
+
+    # Revoked token jtis are cached per worker; other workers' logouts are
+    # picked up within TOKEN_BLOCKLIST_SYNC_SECONDS. Each sync re-reads rows
+    # created in the last TOKEN_BLOCKLIST_SYNC_OVERLAP_SECONDS, which must
+    # exceed the longest logout transaction.
+    TOKEN_BLOCKLIST_SYNC_SECONDS = float(os.getenv("TOKEN_BLOCKLIST_SYNC_SECONDS", 5))
+    TOKEN_BLOCKLIST_SYNC_OVERLAP_SECONDS = float(os.getenv("TOKEN_BLOCKLIST_SYNC_OVERLAP_SECONDS", 60))
+    TOKEN_BLOCKLIST_CACHE_SIZE = int(os.getenv("TOKEN_BLOCKLIST_CACHE_SIZE", 100000))
+
+    # bcrypt runs on a bounded pool; requests beyond workers + queue wait up
+    # to AUTH_HASH_QUEUE_TIMEOUT seconds and then get a 503.
+    AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS")) if os.getenv("AUTH_HASH_WORKERS") else None
+    AUTH_HASH_QUEUE_SIZE = int(os.getenv("AUTH_HASH_QUEUE_SIZE")) if os.getenv("AUTH_HASH_QUEUE_SIZE") else None
+    AUTH_HASH_QUEUE_TIMEOUT = float(os.getenv("AUTH_HASH_QUEUE_TIMEOUT", 5))
+
+    # Realtime change delivery: changes to one event within the window are
+    # coalesced into one message; batch creations go out in chunks.
+    REALTIME_COALESCE_SECONDS = float(os.getenv("REALTIME_COALESCE_SECONDS", 0.25))
+    REALTIME_BATCH_SIZE = int(os.getenv("REALTIME_BATCH_SIZE", 500))
+
+    # Socket.IO message bus shared by all workers. Unset keeps delivery
+    # in-process; local:///path uses Unix sockets in that directory (single
+    # host, no broker); redis:// or amqp:// URLs go through Flask-SocketIO.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+
+    # Free/busy and slot searches: how many users one request may cover and
+    # how long its window may be; user ids are queried in batches.
+    SCHEDULING_MAX_USERS = int(os.getenv("SCHEDULING_MAX_USERS", 500))
+    SCHEDULING_MAX_DAYS = int(os.getenv("SCHEDULING_MAX_DAYS", 92))
+    SCHEDULING_QUERY_BATCH = int(os.getenv("SCHEDULING_QUERY_BATCH", 500))
+    # Slot searches load busy time this many days at a time and stop once
+    # enough slots are found.
+    SCHEDULING_SLOT_CHUNK_DAYS = int(os.getenv("SCHEDULING_SLOT_CHUNK_DAYS", 7))
+
+    # iCalendar imports are parsed as they stream in and committed every
+    # ICS_IMPORT_CHUNK_SIZE events; only the first ICS_IMPORT_MAX_ERRORS
+    # failures are listed in the response.
+    ICS_IMPORT_CHUNK_SIZE = int(os.getenv("ICS_IMPORT_CHUNK_SIZE", 500))
+    ICS_IMPORT_MAX_ERRORS = int(os.getenv("ICS_IMPORT_MAX_ERRORS", 100))
+
+    # Event and role lookups are read through a cache: an LRU of
+    # EVENT_CACHE_SIZE entries per worker, or a shared backend such as
+    # redis:// given as EVENT_CACHE_URL. Writes drop the entries they change;
+    # other workers' writes show up within EVENT_CACHE_TTL seconds.
+    EVENT_CACHE_ENABLED = os.getenv("EVENT_CACHE_ENABLED", "true").lower() == "true"
+    EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", 10000))
+    EVENT_CACHE_TTL = float(os.getenv("EVENT_CACHE_TTL", 10))
+    EVENT_CACHE_URL = os.getenv("EVENT_CACHE_URL")
+
+    # JSON responses are encoded with orjson when it is installed; set
+    # JSON_ENCODER=json to use the standard library encoder instead.
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson").lower()
+
+    # GET /api/events returns at most LIST_MAX_PER_PAGE events per page.
+    LIST_MAX_PER_PAGE = int(os.getenv("LIST_MAX_PER_PAGE", 100))
+
+    # GET /api/events/search uses the first SEARCH_MAX_TERMS words of q and
+    # returns at most SEARCH_MAX_PER_PAGE events per page.
+    SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", 8))
+    SEARCH_MAX_PER_PAGE = int(os.getenv("SEARCH_MAX_PER_PAGE", 100))
+
+    # Share, unshare and role changes take at most this many users per call.
+    SHARE_MAX_USERS = int(os.getenv("SHARE_MAX_USERS", 1000))
+
+    # A write bumps calendar_version (the list ETag) of everyone who sees the
+    # event, at most CALENDAR_VERSION_BATCH users per UPDATE.
+    CALENDAR_VERSION_BATCH = int(os.getenv("CALENDAR_VERSION_BATCH", 500))
+
+    # Request and Socket.IO handler instrumentation, served on /metrics
+    # (protected by METRICS_TOKEN when set). A request running one statement
+    # more than SQL_N_PLUS_ONE_THRESHOLD times is logged as a likely N+1.
+    # METRICS_PROFILE_SAMPLE_RATE of requests run under cProfile; those slower
+    # than METRICS_SLOW_REQUEST_SECONDS are dumped to METRICS_PROFILE_DIR.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 10))
+    METRICS_PROFILE_SAMPLE_RATE = float(os.getenv("METRICS_PROFILE_SAMPLE_RATE", 0))
+    METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", 1))
+    METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR")
+
+    # STARTUP_MODE=production is for short-lived, autoscaled workers: .env is
+    # not read and AUTO_MIGRATE defaults to off, leaving the schema to a
+    # `db upgrade` run before the workers start.
+    STARTUP_MODE = os.getenv("STARTUP_MODE", "development").lower()
+
+    # The schema is owned by app/migrations. With AUTO_MIGRATE each worker
+    # applies pending steps at startup; deployments running several workers
+    # should turn it off and run `flask --app app db upgrade` before starting.
+    AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false" if STARTUP_MODE == "production" else "true").lower() == "true"
+
+    # Before serving, each worker opens PREWARM_DB_CONNECTIONS pooled
+    # connections per engine and loads the token blocklist (see
+    # app/services/startup.py). Turn PREWARM_ON_CREATE off to run that from
+    # a post-fork hook instead.
+    PREWARM_ON_CREATE = os.getenv("PREWARM_ON_CREATE", "true").lower() == "true"
+    PREWARM_DB_CONNECTIONS = int(os.getenv("PREWARM_DB_CONNECTIONS", 2 if STARTUP_MODE == "production" else 0))
+
+    # ASGI mode (`uvicorn asgi:application`): event reads and Socket.IO run on
+    # async sessions from ASYNC_DATABASE_URI (derived from the database URI
+    # when unset, e.g. mysql+aiomysql), other routes on ASGI_WSGI_THREADS threads.
+    ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI")
+    ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 10))
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", 32))
@@ -0,0 +1,48 @@
+"""Schema migrations.
+
+Each step in ``steps.MIGRATIONS`` runs once per database and is recorded in
+``schema_migrations``. Steps check the live schema before changing it, so a
+database first created by ``db.create_all()`` (or half-migrated when a DDL
+statement auto-committed on MySQL) upgrades cleanly.
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+
+schema_migrations = sa.Table(
+    "schema_migrations", sa.MetaData(),
+    sa.Column("id", sa.String(64), primary_key=True),
+    sa.Column("applied_at", sa.DateTime, nullable=False),
+)
+
+
+class MigrationError(Exception):
+    """Raised when a step cannot bring the schema to the expected state."""
+
+
+def applied(engine):
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return {row[0] for row in conn.execute(sa.select(schema_migrations.c.id))}
+
+
+def pending(engine):
+    from app.migrations.steps import MIGRATIONS
+
+    done = applied(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in done]
+
+
+def upgrade(engine, log=print):
+    """Apply every pending step in order; returns the ids applied."""
+    ran = []
+    for migration_id, description, step in pending(engine):
+        log(f"Applying {migration_id}: {description}")
+        try:
+            with engine.begin() as conn:
+                step(conn)
+                conn.execute(schema_migrations.insert().values(id=migration_id, applied_at=datetime.utcnow()))
+        except sa.exc.SQLAlchemyError as exc:
+            raise MigrationError(f"{migration_id} failed: {exc}") from exc
+        ran.append(migration_id)
+    return ran
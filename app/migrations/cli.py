@@ -0,0 +1,69 @@
+import sqlite3
+import sys
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.engine import make_url
+
+from app import db
+from app.migrations import MigrationError, applied, pending, upgrade
+from app.migrations.plans import check_plans
+from app.migrations.steps import MIGRATIONS
+
+db_cli = AppGroup("db", help="Schema migrations.")
+
+
+@db_cli.command("upgrade")
+def upgrade_command():
+    """Apply pending schema migrations."""
+    try:
+        ran = upgrade(db.engine)
+    except MigrationError as exc:
+        click.echo(str(exc), err=True)
+        sys.exit(1)
+    click.echo(f"Applied {len(ran)} migration(s)" if ran else "Schema is up to date")
+
+
+@db_cli.command("status")
+def status_command():
+    """List migrations and whether each has been applied."""
+    done = applied(db.engine)
+    for migration_id, description, _ in MIGRATIONS:
+        click.echo(f"[{'x' if migration_id in done else ' '}] {migration_id}  {description}")
+    waiting = len(pending(db.engine))
+    if waiting:
+        click.echo(f"{waiting} pending")
+
+
+@db_cli.command("check-plans")
+def check_plans_command():
+    """EXPLAIN the hot queries; exit 1 if one scans its table."""
+    failed = 0
+    for name, sql, problems in check_plans(db.engine):
+        click.echo(f"{'FAIL' if problems else 'ok  '}  {name}")
+        if problems:
+            failed += 1
+            click.echo(f"      {sql}")
+            for problem in problems:
+                click.echo(f"      {problem}")
+    if failed:
+        click.echo(f"{failed} hot quer{'y' if failed == 1 else 'ies'} without an index", err=True)
+        sys.exit(1)
+
+
+@db_cli.command("sync-replica")
+def sync_replica_command():
+    """Copy a SQLite primary onto the SQLite file standing in for the replica."""
+    urls = [make_url(current_app.config[key] or "sqlite://")
+            for key in ("SQLALCHEMY_DATABASE_URI", "SQLALCHEMY_REPLICA_URI")]
+    if any(url.get_backend_name() != "sqlite" or not url.database for url in urls):
+        click.echo("sync-replica copies between SQLite files only; other databases replicate themselves", err=True)
+        sys.exit(1)
+    primary, replica = (sqlite3.connect(url.database) for url in urls)
+    try:
+        primary.backup(replica)
+    finally:
+        primary.close()
+        replica.close()
+    click.echo(f"Copied {urls[0].database} to {urls[1].database}")
@@ -0,0 +1,74 @@
+"""Query-plan checks for the hot queries.
+
+Each query is run under EXPLAIN and its plan is searched for a full scan of
+the table it is meant to reach through an index. Run them with
+``flask --app app db check-plans`` after a migration.
+"""
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models import Event, EventPermission, EventVersion, TokenBlocklist, UserToken
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def hot_queries():
+    """(name, table, statement) for the lookups the request paths depend on."""
+    start = datetime(2030, 1, 1, 9, 0)
+    end = start + timedelta(hours=1)
+    return [
+        ("conflict window", "events", sa.select(Event.id).where(
+            Event.owner_id == 1, Event.start_time < end, Event.end_time > start)),
+        ("events shared with a user", "event_permissions", sa.select(EventPermission.event_id).where(
+            EventPermission.user_id == 1)),
+        ("role on an event", "event_permissions", sa.select(EventPermission.role).where(
+            EventPermission.event_id == 1, EventPermission.user_id == 1)),
+        ("event version", "event_versions", sa.select(EventVersion.id).where(
+            EventVersion.event_id == 1, EventVersion.version_number == 1)),
+        ("version history", "event_versions", sa.select(EventVersion.id).where(
+            EventVersion.event_id == 1).order_by(EventVersion.version_number.desc())),
+        ("revoked token", "token_blocklist", sa.select(TokenBlocklist.id).where(TokenBlocklist.jti == "jti")),
+        ("user session", "user_tokens", sa.select(UserToken.id).where(UserToken.user_id == 1)),
+    ]
+
+
+def _full_scans(dialect, table, rows):
+    if dialect == "sqlite":
+        # Rows are (id, parent, notused, detail); "SCAN t" without
+        # "USING ... INDEX" reads the whole table.
+        details = [row[-1] for row in rows]
+        return [detail for detail in details
+                if detail.split(" ")[:2] == ["SCAN", table] and "INDEX" not in detail]
+    if dialect in ("mysql", "mariadb"):
+        return [f"type=ALL on {row._mapping['table']}" for row in rows
+                if row._mapping["table"] == table and row._mapping["type"] == "ALL"]
+    return [row[0] for row in rows if f"Seq Scan on {table}" in row[0]]
+
+
+def check_plans(engine):
+    """Return ``[(name, sql, problems)]``; an empty ``problems`` means indexed."""
+    results = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Tiny tables are cheaper to scan; ask whether an index is usable at all.
+            conn.execute(sa.text("SET enable_seqscan = off"))
+        for name, table, statement in hot_queries():
+            rows = conn.execute(Explain(statement)).all()
+            sql = str(statement.compile(dialect=conn.dialect))
+            results.append((name, " ".join(sql.split()), _full_scans(conn.dialect.name, table, rows)))
+        conn.rollback()
+    return results
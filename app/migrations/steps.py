@@ -0,0 +1,201 @@
+import sqlalchemy as sa
+
+from app.services import search
+
+
+def _inspect(conn):
+    return sa.inspect(conn)
+
+
+def _columns(conn, table):
+    return {column["name"] for column in _inspect(conn).get_columns(table)}
+
+
+def _index_names(conn, table):
+    inspector = _inspect(conn)
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    names |= {constraint["name"] for constraint in inspector.get_unique_constraints(table) if constraint["name"]}
+    return names
+
+
+def _is_unique(conn, table, columns):
+    inspector = _inspect(conn)
+    candidates = [index["column_names"] for index in inspector.get_indexes(table) if index["unique"]]
+    candidates += [constraint["column_names"] for constraint in inspector.get_unique_constraints(table)]
+    return any(list(found) == list(columns) for found in candidates)
+
+
+def add_column(conn, table, column):
+    """ALTER TABLE ... ADD COLUMN for ``column`` unless the table has it."""
+    if column.name in _columns(conn, table):
+        return False
+    sa.Table(table, sa.MetaData(), column)
+    ddl = sa.schema.CreateColumn(column).compile(dialect=conn.dialect)
+    conn.execute(sa.text(f"ALTER TABLE {conn.dialect.identifier_preparer.quote(table)} ADD COLUMN {ddl}"))
+    return True
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """CREATE [UNIQUE] INDEX ``name`` unless an index or constraint has that name."""
+    if name in _index_names(conn, table):
+        return False
+    detached = sa.Table(table, sa.MetaData(), *(sa.Column(column) for column in columns))
+    sa.Index(name, *(detached.c[column] for column in columns), unique=unique).create(conn)
+    return True
+
+
+# The schema as it stood when migrations were introduced. It is frozen here
+# rather than taken from the models, so 0001 creates the same tables however
+# the models change later; later steps bring them up to date.
+INITIAL_SCHEMA = sa.MetaData()
+
+sa.Table(
+    "user", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("username", sa.String(80), unique=True, nullable=False),
+    sa.Column("email", sa.String(120), unique=True, nullable=False),
+    sa.Column("password", sa.String(200), nullable=False),
+    sa.Column("role", sa.String(20), nullable=False),
+    sa.Column("created_at", sa.DateTime),
+)
+sa.Table(
+    "token_blocklist", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("jti", sa.String(36), nullable=False, unique=True),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("user.id"), nullable=False),
+    sa.Column("access_token", sa.Text, nullable=False),
+    sa.Column("refresh_token", sa.Text, nullable=False),
+    sa.Column("created_at", sa.DateTime),
+    sa.Column("access_expires_at", sa.DateTime, nullable=False),
+    sa.Column("refresh_expires_at", sa.DateTime, nullable=False),
+)
+sa.Table(
+    "user_tokens", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("user.id"), nullable=False),
+    sa.Column("access_token", sa.Text, nullable=False),
+    sa.Column("refresh_token", sa.Text, nullable=False),
+    sa.Column("created_at", sa.DateTime),
+    sa.Column("access_expires_at", sa.DateTime, nullable=False),
+    sa.Column("refresh_expires_at", sa.DateTime, nullable=False),
+)
+sa.Table(
+    "events", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.String(255), nullable=False),
+    sa.Column("description", sa.Text, nullable=True),
+    sa.Column("start_time", sa.DateTime, nullable=False),
+    sa.Column("end_time", sa.DateTime, nullable=False),
+    sa.Column("location", sa.String(255), nullable=True),
+    sa.Column("is_recurring", sa.Boolean),
+    sa.Column("recurrence_pattern", sa.String(255), nullable=True),
+    sa.Column("owner_id", sa.Integer, sa.ForeignKey("user.id"), nullable=False),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("updated_at", sa.DateTime, nullable=False),
+)
+sa.Table(
+    "event_permissions", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("event_id", sa.Integer, sa.ForeignKey("events.id"), nullable=False),
+    sa.Column("user_id", sa.Integer, sa.ForeignKey("user.id"), nullable=False),
+    sa.Column("role", sa.String(20), nullable=False),
+    sa.Column("username", sa.String(80), nullable=False),
+)
+sa.Table(
+    "event_versions", INITIAL_SCHEMA,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("event_id", sa.Integer, nullable=False),
+    sa.Column("version_id", sa.Integer, nullable=False),
+    sa.Column("version_number", sa.Integer, nullable=False),
+    sa.Column("data", sa.JSON, nullable=False),
+    sa.Column("created_at", sa.DateTime),
+    sa.Column("modified_by", sa.String(120)),
+    sa.Column("updated_by", sa.String(128), nullable=True),
+)
+
+
+def create_tables(conn):
+    """Tables of ``INITIAL_SCHEMA`` that do not exist yet."""
+    INITIAL_SCHEMA.create_all(conn, checkfirst=True)
+
+
+def event_version_counters(conn):
+    """Per-event version counter and delta-encoded versions."""
+    if add_column(conn, "events", sa.Column("version_counter", sa.Integer, nullable=False, server_default="0")):
+        conn.execute(sa.text(
+            "UPDATE events SET version_counter = COALESCE("
+            "(SELECT MAX(v.version_number) FROM event_versions v WHERE v.event_id = events.id), 0)"
+        ))
+    add_column(conn, "event_versions", sa.Column("is_keyframe", sa.Boolean, nullable=False, server_default=sa.true()))
+    add_column(conn, "event_versions", sa.Column("changes", sa.JSON, nullable=True))
+
+
+def user_calendar_version(conn):
+    add_column(conn, "user", sa.Column("calendar_version", sa.Integer, nullable=False, server_default="0"))
+
+
+def hot_path_indexes(conn):
+    """Indexes behind conflict checks, visibility, version and token lookups."""
+    create_index(conn, "idx_events_owner_start_end", "events", ["owner_id", "start_time", "end_time"])
+    create_index(conn, "idx_event_permissions_user_event", "event_permissions", ["user_id", "event_id"])
+    if not _is_unique(conn, "event_permissions", ["event_id", "user_id"]):
+        # Keep the newest of duplicated shares; the derived table lets MySQL
+        # delete from the table it selects from.
+        conn.execute(sa.text(
+            "DELETE FROM event_permissions WHERE id NOT IN (SELECT id FROM ("
+            "SELECT MAX(id) AS id FROM event_permissions GROUP BY event_id, user_id) AS keep)"
+        ))
+        create_index(conn, "uq_event_permissions_event_user", "event_permissions", ["event_id", "user_id"], unique=True)
+    create_index(conn, "idx_event_versions_event_number", "event_versions", ["event_id", "version_number"])
+    create_index(conn, "idx_user_tokens_user", "user_tokens", ["user_id"])
+    if not _is_unique(conn, "token_blocklist", ["jti"]):
+        create_index(conn, "uq_token_blocklist_jti", "token_blocklist", ["jti"], unique=True)
+
+
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE {search.SQLITE_TABLE} USING fts5(title, description, location, content='events', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {search.SQLITE_TABLE}_ai AFTER INSERT ON events BEGIN "
+    f"INSERT INTO {search.SQLITE_TABLE}(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    f"CREATE TRIGGER {search.SQLITE_TABLE}_ad AFTER DELETE ON events BEGIN "
+    f"INSERT INTO {search.SQLITE_TABLE}({search.SQLITE_TABLE}, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    f"CREATE TRIGGER {search.SQLITE_TABLE}_au AFTER UPDATE OF title, description, location ON events BEGIN "
+    f"INSERT INTO {search.SQLITE_TABLE}({search.SQLITE_TABLE}, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    f"INSERT INTO {search.SQLITE_TABLE}(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    f"INSERT INTO {search.SQLITE_TABLE}({search.SQLITE_TABLE}) VALUES ('rebuild')",
+]
+
+
+def event_search(conn):
+    """Full-text index over title, description and location (see app/services/search.py)."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        if search.SQLITE_TABLE in _inspect(conn).get_table_names():
+            return
+        for statement in SQLITE_SEARCH_DDL:
+            conn.execute(sa.text(statement))
+    elif dialect in ("mysql", "mariadb"):
+        if search.MYSQL_INDEX not in _index_names(conn, "events"):
+            conn.execute(sa.text(
+                f"ALTER TABLE events ADD FULLTEXT INDEX {search.MYSQL_INDEX} (title, description, location)"
+            ))
+    elif dialect == "postgresql":
+        conn.execute(sa.text(
+            f"CREATE INDEX IF NOT EXISTS {search.POSTGRES_INDEX} ON events USING GIN (({search.POSTGRES_DOCUMENT}))"
+        ))
+
+
+# (id, description, step) in the order they apply; never reorder or edit an
+# applied step, add a new one instead.
+MIGRATIONS = [
+    ("0001_create_tables", "create missing tables", create_tables),
+    ("0002_event_version_counters", "events.version_counter, event_versions.is_keyframe/changes",
+     event_version_counters),
+    ("0003_user_calendar_version", "user.calendar_version", user_calendar_version),
+    ("0004_hot_path_indexes", "indexes and unique constraints for hot queries", hot_path_indexes),
+    ("0005_event_search", "full-text index over event title, description and location", event_search),
+]
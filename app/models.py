@@ -15,6 +15,8 @@ class User(db.Model):
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=now_ist)
+    # Bumped whenever an event this user can see changes; drives list ETags.
+    calendar_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     user_tokens = db.relationship('UserToken', backref='user', lazy=True)
 
 class TokenBlocklist(db.Model):
@@ -30,6 +32,9 @@ class TokenBlocklist(db.Model):
 
 class UserToken(db.Model):
     __tablename__ = 'user_tokens'
+    __table_args__ = (
+        db.Index('idx_user_tokens_user', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     access_token = db.Column(db.Text, nullable=False)
@@ -48,6 +53,9 @@ class UserToken(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        db.Index('idx_events_owner_start_end', 'owner_id', 'start_time', 'end_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -57,9 +65,14 @@ class Event(db.Model):
     is_recurring = db.Column(db.Boolean, default=False)
     recurrence_pattern = db.Column(db.String(255), nullable=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version_counter = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, nullable=False, default=now_ist)
     updated_at = db.Column(db.DateTime, nullable=False, default=now_ist, onupdate=now_ist)
 
+    # Every UPDATE or DELETE of a loaded event is conditional on the
+    # version_counter it was loaded with and raises StaleDataError if another
+    # write got there first. next_version_number moves the counter.
+    __mapper_args__ = {"version_id_col": version_counter, "version_id_generator": False}
 
     def to_dict(self):
         return {
@@ -78,6 +91,10 @@ class Event(db.Model):
 
 class EventPermission(db.Model):
     __tablename__ = 'event_permissions'
+    __table_args__ = (
+        db.Index('idx_event_permissions_user_event', 'user_id', 'event_id'),
+        db.UniqueConstraint('event_id', 'user_id', name='uq_event_permissions_event_user'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -86,12 +103,19 @@ class EventPermission(db.Model):
 
 class EventVersion(db.Model):
     __tablename__ = 'event_versions'
+    __table_args__ = (
+        db.Index('idx_event_versions_event_number', 'event_id', 'version_number'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, nullable=False)
     version_id = db.Column(db.Integer, nullable=False)
     version_number = db.Column(db.Integer, nullable=False)
+    # Full snapshot on keyframes, only the changed fields otherwise.
     data = db.Column(db.JSON, nullable=False)
+    is_keyframe = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    # {field: {"old": ..., "new": ...}} against the previous version.
+    changes = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     modified_by = db.Column(db.String(120)) 
     updated_by = db.Column(db.String(128), nullable=True)
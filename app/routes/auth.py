@@ -1,21 +1,36 @@
 from datetime import datetime
+import click
 import pytz  
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, g, request, jsonify
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity, get_jwt, decode_token
+    jwt_required, get_jwt_identity, get_jwt
 )
-from app import db, bcrypt, jwt
+from app import db, jwt
 from app.models import User, TokenBlocklist, UserToken
+from app.services.hashing import HashingBusy, password_hasher
+from app.services.timing import StageTimer
+from app.services.token_cache import purge_expired_tokens, revoked_tokens
 
 auth_bp = Blueprint("auth", __name__)
 IST = pytz.timezone("Asia/Kolkata")
 
 @jwt.additional_claims_loader
 def add_claims_to_access_token(identity):
+    # Login, register and refresh already know the claims; only fall back to
+    # loading the user for tokens minted elsewhere.
+    claims = g.get("token_claims")
+    if claims is not None:
+        return claims
     user = User.query.get(identity)
     return {"role": user.role} if user else {}
 
+@auth_bp.errorhandler(HashingBusy)
+def handle_hashing_busy(error):
+    response = jsonify({"error": "Authentication is busy, please retry"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -30,18 +45,23 @@ def register():
     if not data["email"].strip() or not data["password"].strip():
         return jsonify({"error": "Email and password required"}), 400
 
-    existing = User.query.filter(
-        (User.username == data["username"]) | (User.email == data["email"])
-    ).first()
+    timer = StageTimer()
+    with timer.stage("lookup"):
+        existing = User.query.filter(
+            (User.username == data["username"]) | (User.email == data["email"])
+        ).first()
     if existing:
         return jsonify({"error": "User already exists"}), 409
 
-    hashed_pw = bcrypt.generate_password_hash(data["password"]).decode("utf-8")
-    user = User(username=data["username"], email=data["email"], password=hashed_pw, role=data["role"])
-    db.session.add(user)
-    db.session.commit()
+    with timer.stage("hash"):
+        hashed_pw = password_hasher.generate(data["password"])
+    with timer.stage("persist"):
+        user = User(username=data["username"], email=data["email"], password=hashed_pw, role=data["role"])
+        db.session.add(user)
+        db.session.flush()
 
-    return _generate_token_response(user), 201
+    # The user row is committed together with its token row.
+    return _generate_token_response(user, timer), 201
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -49,65 +69,81 @@ def login():
     if not data or not data.get("email") or not data.get("password"):
         return jsonify({"error": "Missing email or password"}), 400
 
-    user = User.query.filter(
-        (User.username == data.get("username")) | (User.email == data.get("email"))
-    ).first()
+    timer = StageTimer()
+    with timer.stage("lookup"):
+        user = User.query.filter(
+            (User.username == data.get("username")) | (User.email == data.get("email"))
+        ).first()
 
-    if not user or not bcrypt.check_password_hash(user.password, data["password"]):
+    with timer.stage("hash"):
+        valid = user is not None and password_hasher.check(user.password, data["password"])
+    if not valid:
         return jsonify({"error": "Invalid credentials"}), 401
 
-    return _generate_token_response(user)
-
-def _generate_token_response(user):
-    access_token = create_access_token(identity=str(user.id))
-    refresh_token = create_refresh_token(identity=str(user.id))
-
-    access_decoded = decode_token(access_token)
-    refresh_decoded = decode_token(refresh_token)
-
-    access_expires = datetime.fromtimestamp(access_decoded['exp'], tz=IST)
-    refresh_expires = datetime.fromtimestamp(refresh_decoded['exp'], tz=IST)
-
-    UserToken.query.filter_by(user_id=user.id).delete()
-    db.session.add(UserToken(
-        user_id=user.id,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        access_expires_at=access_expires,
-        refresh_expires_at=refresh_expires
-    ))
-    db.session.commit()
+    return _generate_token_response(user, timer)
+
+def _generate_token_response(user, timer=None):
+    timer = timer or StageTimer()
+    # Read before the commit below expires the instance.
+    user_data = {"id": user.id, "username": user.username, "email": user.email, "role": user.role}
+    with timer.stage("token"):
+        g.token_claims = {"role": user_data["role"]}
+        issued_at = datetime.now(IST)
+        access_token = create_access_token(identity=str(user_data["id"]))
+        refresh_token = create_refresh_token(identity=str(user_data["id"]))
+
+        # Same lifetimes flask-jwt-extended encodes, without decoding the tokens.
+        access_expires = issued_at + current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+        refresh_expires = issued_at + current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+
+    with timer.stage("persist"):
+        values = {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "access_expires_at": access_expires,
+            "refresh_expires_at": refresh_expires
+        }
+        if not UserToken.query.filter_by(user_id=user_data["id"]).update(values, synchronize_session=False):
+            db.session.add(UserToken(user_id=user_data["id"], **values))
+        db.session.commit()
 
-    return jsonify({
-        "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role},
+    response = jsonify({
+        "user": user_data,
         "access_token": access_token,
         "refresh_token": refresh_token
     })
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
 
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
-    user_id = int(get_jwt_identity())
-    return jsonify(access_token=create_access_token(identity=user_id)), 200
+    claims = get_jwt()
+    if "role" in claims:
+        g.token_claims = {"role": claims["role"]}
+    return jsonify(access_token=create_access_token(identity=get_jwt_identity())), 200
 
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required(refresh=True)
 def logout():
     try:
-        jti = get_jwt()["jti"]  
+        claims = get_jwt()
+        jti = claims["jti"]
         user_id = get_jwt_identity()
+        expires_at = datetime.fromtimestamp(claims["exp"], tz=IST)
 
         token = TokenBlocklist(
             jti=jti,
             user_id=user_id,
             access_token="",
             refresh_token="",
-            access_expires_at=datetime.utcnow(),
-            refresh_expires_at=datetime.utcnow()
+            access_expires_at=expires_at,
+            refresh_expires_at=expires_at
         )
 
         db.session.add(token)
         db.session.commit()
+        revoked_tokens.add(jti, expires_at)
 
         return jsonify({"msg": "Logout successful"}), 200
 
@@ -115,8 +151,10 @@ def logout():
         return jsonify({"error": f"Logout failed: {str(e)}"}), 400
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload["jti"]
+    return revoked_tokens.is_revoked(jwt_payload["jti"])
 
-    if TokenBlocklist.query.filter_by(jti=jti).first():
-        return True 
-    return False 
+@auth_bp.cli.command("purge-tokens")
+def purge_tokens_command():
+    """Delete expired blocklist entries and user sessions."""
+    blocklisted, sessions = purge_expired_tokens()
+    click.echo(f"Purged {blocklisted} blocklisted token(s) and {sessions} expired session(s)")
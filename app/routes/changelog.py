@@ -1,52 +1,89 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Event, EventVersion, User
+from app.models import EventVersion, User
 from app import db
-from deepdiff import DeepDiff
 import json
+from app.routes.versioning import compose_changes, diff_snapshots, materialize_versions, version_data
+from app.services.cache import event_cache
+from app.services.replicas import replica_reads
 
 changelog_bp = Blueprint("changelog", __name__)
 
-def serialize_event_version(version):
+def usernames_for(user_ids):
+    user_ids = {int(user_id) for user_id in user_ids if user_id}
+    if not user_ids:
+        return {}
+    return {str(user_id): username for user_id, username in
+            db.session.query(User.id, User.username).filter(User.id.in_(user_ids))}
+
+def serialize_event_version(version, data=None, usernames=None):
+    if data is None:
+        data = version_data(version.event_id, version.version_number)
+    if usernames is None:
+        usernames = usernames_for([version.modified_by])
     return {
         "version_id": version.id,
         "version_number": version.version_number,
         "created_at": version.created_at.isoformat() if version.created_at else None,
-        "modified_by": User.query.get(version.modified_by).username if version.modified_by else None,
-        "data": json.loads(version.data) if isinstance(version.data, str) else version.data
+        "modified_by": usernames.get(str(version.modified_by)) if version.modified_by else None,
+        "data": json.loads(data) if isinstance(data, str) else data
     }
 
-def make_diff_serializable(diff_tree):
-    if isinstance(diff_tree, dict):
-        return {k: make_diff_serializable(v) for k, v in diff_tree.items()}
-    elif isinstance(diff_tree, list):
-        return [make_diff_serializable(i) for i in diff_tree]
-    elif hasattr(diff_tree, '__dict__'):
-        return make_diff_serializable(vars(diff_tree))
-    else:
-        return diff_tree
+def stream_changes(versions, usernames):
+    previous = {}
+    for version, data in materialize_versions(versions):
+        changes = version.changes if version.changes is not None else diff_snapshots(previous, data)
+        previous = data
+        yield json.dumps({
+            "version_id": version.id,
+            "version_number": version.version_number,
+            "created_at": version.created_at.isoformat() if version.created_at else None,
+            "modified_by": usernames.get(str(version.modified_by)) if version.modified_by else None,
+            "changes": changes
+        }) + "\n"
+
+def version_values(version):
+    return json.loads(version.data) if isinstance(version.data, str) else (version.data or {})
+
+def values_changed(changes):
+    """Old/new changes in the ``values_changed`` form of the diff response."""
+    return {
+        f"root['{field}']": {"new_value": change["new"], "old_value": change["old"]}
+        for field, change in changes.items()
+    }
 
 @changelog_bp.route('/events/<int:event_id>/changelog', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_changelog(event_id):
     user_id = int(get_jwt_identity())
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
+    versions = EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.version_number.asc())
+    modified_by = db.session.query(EventVersion.modified_by).filter_by(event_id=event_id).distinct()
+    usernames = usernames_for(m for (m,) in modified_by)
+
+    if request.args.get("format") == "changes":
+        return Response(
+            stream_with_context(stream_changes(versions.yield_per(500), usernames)),
+            mimetype="application/x-ndjson"
+        )
 
-    versions = EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.created_at.asc()).all()
+    versions = versions.all()
     if not versions:
         return jsonify({"error": "No versions found for this event"}), 404
 
-    return jsonify([serialize_event_version(v) for v in versions]), 200
+    return jsonify([serialize_event_version(v, data, usernames) for v, data in materialize_versions(versions)]), 200
 
 
 @changelog_bp.route('/events/<int:event_id>/diff/<int:vid1>/<int:vid2>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_diff(event_id, vid1, vid2):
     user_id = int(get_jwt_identity())
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
@@ -57,11 +94,34 @@ def get_diff(event_id, vid1, vid2):
     if not v1 or not v2:
         return jsonify({"error": "One or both versions not found"}), 404
 
-    try:
-        data1 = json.loads(v1.data) if isinstance(v1.data, str) else v1.data
-        data2 = json.loads(v2.data) if isinstance(v2.data, str) else v2.data
-    except json.JSONDecodeError:
-        return jsonify({"error": "Failed to parse version data as JSON"}), 500
+    low, high = sorted((v1.version_number, v2.version_number))
+    changesets = [changes for (changes,) in db.session.query(EventVersion.changes).filter(
+        EventVersion.event_id == event_id,
+        EventVersion.version_number > low,
+        EventVersion.version_number <= high
+    ).order_by(EventVersion.version_number.asc())]
+
+    if any(changes is None for changes in changesets):
+        # Versions written before diffs were stored.
+        try:
+            data1 = version_data(event_id, v1.version_number)
+            data2 = version_data(event_id, v2.version_number)
+            data1 = json.loads(data1) if isinstance(data1, str) else data1
+            data2 = json.loads(data2) if isinstance(data2, str) else data2
+        except json.JSONDecodeError:
+            return jsonify({"error": "Failed to parse version data as JSON"}), 500
+        data1, data2 = data1 or {}, data2 or {}
+        changes = diff_snapshots(data1, data2)
+    else:
+        changes = compose_changes(changesets)
+        if v1.version_number > v2.version_number:
+            changes = {field: {"old": change["new"], "new": change["old"]} for field, change in changes.items()}
+        try:
+            data1, data2 = version_values(v1), version_values(v2)
+        except json.JSONDecodeError:
+            return jsonify({"error": "Failed to parse version data as JSON"}), 500
 
-    raw_diff = DeepDiff(data1, data2)
-    return jsonify({"diff": raw_diff}), 200
+    # Every version records when it was made, keyframe or not.
+    if data1.get("modified_at") != data2.get("modified_at"):
+        changes["modified_at"] = {"old": data1.get("modified_at"), "new": data2.get("modified_at")}
+    return jsonify({"diff": {"values_changed": values_changed(changes)} if changes else {}}), 200
@@ -1,33 +1,96 @@
-from flask import Blueprint, request, jsonify
-from app.models import Event, EventPermission, db
+from flask import Blueprint, current_app, request, jsonify
+from app.models import EventPermission
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.cache import event_cache
+from app.services.replicas import replica_reads
+from app.services.sharing import ROLES, change_roles, commit_changes, parse_roles, parse_user_ids, unshare
 
 collab_bp = Blueprint("collaboration", __name__)
 
+def owned_event(event_id):
+    """The event if the caller owns it, else ``(None, error response)``."""
+    event = event_cache.event(event_id)
+    if not event:
+        return None, (jsonify({"error": "Event not found"}), 404)
+    if event.owner_id != int(get_jwt_identity()):
+        return None, (jsonify({"error": "Only the owner can change permissions"}), 403)
+    return event, None
+
+def too_many(values):
+    limit = current_app.config["SHARE_MAX_USERS"]
+    if len(values) > limit:
+        return jsonify({"error": f"At most {limit} users per request"}), 400
+    return None
+
 @collab_bp.route('/events/<int:event_id>/permissions', methods=['GET'])
 @jwt_required()
+@replica_reads
 def list_permissions(event_id):
     perms = EventPermission.query.filter_by(event_id=event_id).all()
     return jsonify([{"user_id": p.user_id, "role": p.role} for p in perms]), 200
 
+@collab_bp.route('/events/<int:event_id>/permissions', methods=['PUT'])
+@jwt_required()
+def update_permissions(event_id):
+    """Change the roles of many users the event is shared with."""
+    event, error = owned_event(event_id)
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get("users"), list):
+        return jsonify({"error": "Missing 'users' list in request body"}), 400
+    error = too_many(data["users"])
+    if error:
+        return error
+
+    roles, skipped = parse_roles(data["users"], event.owner_id)
+    updated, not_shared, changed = change_roles(event_id, roles)
+    commit_changes(event, changed, 'permissions_changed',
+                   {"users": [entry for entry in updated if entry["user_id"] in changed]})
+    return jsonify({"updated": updated, "skipped": skipped + not_shared}), 200
+
+@collab_bp.route('/events/<int:event_id>/unshare', methods=['POST'])
+@jwt_required()
+def unshare_event(event_id):
+    """Remove the permissions of many users in one call."""
+    event, error = owned_event(event_id)
+    if error:
+        return error
+    user_ids = parse_user_ids((request.get_json(silent=True) or {}).get("user_ids"))
+    if user_ids is None:
+        return jsonify({"error": "'user_ids' must be a list of user ids"}), 400
+    error = too_many(user_ids)
+    if error:
+        return error
+
+    removed, skipped = unshare(event_id, user_ids)
+    commit_changes(event, set(removed), 'event_unshared', {"user_ids": removed})
+    return jsonify({"removed": removed, "skipped": skipped}), 200
+
 @collab_bp.route('/events/<int:event_id>/permissions/<int:user_id>', methods=['PUT'])
 @jwt_required()
 def update_permission(event_id, user_id):
-    data = request.json
-    role = data['role']
-    perm = EventPermission.query.filter_by(event_id=event_id, user_id=user_id).first_or_404()
-    perm.role = role
-    db.session.commit()
+    event, error = owned_event(event_id)
+    if error:
+        return error
+    role = (request.get_json(silent=True) or {}).get('role')
+    if role not in ROLES:
+        return jsonify({"error": f"role must be one of {', '.join(ROLES)}"}), 400
+    updated, _, changed = change_roles(event_id, {user_id: role})
+    if not updated:
+        return jsonify({"error": "Permission not found"}), 404
+    commit_changes(event, changed, 'permissions_changed', {"users": updated})
     return jsonify({"message": "Permission updated."}), 200
 
 @collab_bp.route('/events/<int:event_id>/permissions/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_permission(event_id, user_id):
-    if Event.owner_id != user_id:
-        return jsonify({"error": "Only the owner can delete the event"}), 403
-
+    event, error = owned_event(event_id)
+    if error:
+        return error
 
-    perm = EventPermission.query.filter_by(event_id=event_id, user_id=user_id).first_or_404()
-    db.session.delete(perm)
-    db.session.commit()
+    removed, _ = unshare(event_id, [user_id])
+    if not removed:
+        return jsonify({"error": "Permission not found"}), 404
+    commit_changes(event, set(removed), 'event_unshared', {"user_ids": removed})
     return jsonify({"message": "Permission removed."}), 200
@@ -1,12 +1,27 @@
-from flask import Blueprint, json, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import pytz
 from app import db
-from app.models import Event, EventPermission, EventVersion, User
+from app.models import Event, EventPermission, EventVersion, now_ist
 from datetime import datetime
-from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.routes.versioning import save_event_version
+from app.services.broadcast import broadcaster
+from app.services.bulk import event_row, insert_events, record_inserted, row_to_dict, screen_conflicts
+from app.services.cache import event_cache
+from app.services.conditional import (
+    bump_calendar_versions, bump_event_audience, conditional, event_etag, not_modified,
+    not_modified_response, precondition_failed
+)
+from app.services.conflicts import conflict_index, find_conflicting_ids
+from app.services.listing import EVENT_COLUMNS, ROW_KEYS, EventListing, event_to_dict, visible_events
+from app.services.recurrence import is_valid_pattern, occurrence_cache
+from app.services.replicas import replica_reads
+from app.services.search import EventSearch, SearchUnavailable
+from app.services.serialization import ndjson
+from app.services.sharing import commit_changes, parse_roles, share
 
 events_bp = Blueprint("events", __name__)
 
@@ -18,30 +33,30 @@ def parse_datetime(dt_str):
     except Exception:
         return None
 
-def emit_event(event_type, event_data):
-    
-    print(f"Emitted event: {event_type} with data: {event_data}")
-
-def check_user_role(event, user_id):
-    if event.owner_id == user_id:
-        return "Owner"
-    perm = EventPermission.query.filter_by(event_id=event.id, user_id=user_id).first()
-    return perm.role if perm else None
-
-def check_event_conflicts(user_id, start_time, end_time, exclude_event_id=None):
-    query = Event.query.filter(
-        Event.owner_id == user_id,
-        Event.start_time < end_time,
-        Event.end_time > start_time
-    )
-    if exclude_event_id:
-        query = query.filter(Event.id != exclude_event_id)
-    return query.all()
+def emit_event(event_type, event_data, user_ids=None):
+    # Delivered to Socket.IO rooms by the broadcaster's background task.
+    event_id = event_data.get("id", event_data.get("event_id"))
+    broadcaster.publish(event_type, event_data, event_id=event_id, user_ids=user_ids)
 
-def event_to_dict(event, user_role=None):
-    data = event.to_dict()
-    data["permissions"] = user_role or "None"
-    return data
+def check_user_role(event, user_id, fresh=False):
+    return event_cache.role(event, user_id, fresh=fresh)
+
+def check_event_conflicts(user_id, start_time, end_time, exclude_event_id=None, recurrence_pattern=None):
+    try:
+        if isinstance(start_time, str):
+            start_time = datetime.fromisoformat(start_time)
+        if isinstance(end_time, str):
+            end_time = datetime.fromisoformat(end_time)
+    except ValueError:
+        return []
+    if start_time is None or end_time is None:
+        return []
+    return find_conflicting_ids(user_id, start_time, end_time, exclude_event_id, recurrence_pattern)
+
+def recurrence_of(data, event=None):
+    is_recurring = data.get("is_recurring", event.is_recurring if event else False)
+    pattern = data.get("recurrence_pattern", event.recurrence_pattern if event else None)
+    return pattern if is_recurring else None
 
 def validate_event_data(data, for_update=False):
     errors = []
@@ -64,6 +79,8 @@ def validate_event_data(data, for_update=False):
 
     if data.get("is_recurring") and not data.get("recurrence_pattern"):
         errors.append("recurrence_pattern required if is_recurring is True")
+    elif data.get("recurrence_pattern") and not is_valid_pattern(data["recurrence_pattern"]):
+        errors.append("recurrence_pattern must be an RRULE such as FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10")
 
     return errors
 
@@ -81,17 +98,19 @@ def create_event():
         return jsonify({"error": "You cannot assign owner_id manually."}), 403
 
 
-    conflicts = check_event_conflicts(user_id, data.get('start_time'), data.get('end_time'))
+    errors = validate_event_data(data)
+    if errors:
+        return jsonify({"errors": errors}), 400
+
+    conflicts = check_event_conflicts(
+        user_id, data.get('start_time'), data.get('end_time'), recurrence_pattern=recurrence_of(data)
+    )
     if conflicts:
         return jsonify({
             "message": "Event conflict detected",
-            "conflicts": [event.id for event in conflicts]
+            "conflicts": conflicts
         }), 409
 
-    errors = validate_event_data(data)
-    if errors:
-        return jsonify({"errors": errors}), 400
-
     event = Event(
         title=data.get('title'),
         description=data.get('description'),
@@ -100,12 +119,16 @@ def create_event():
         location=data.get('location'),
         is_recurring=data.get('is_recurring', False),
         owner_id=user_id,
-        recurrence_pattern=data.get('recurrence_pattern')
+        recurrence_pattern=data.get('recurrence_pattern'),
+        version_counter=1
     )
     db.session.add(event)
+    db.session.flush()
+    save_event_version(event, user_id, created=True)
+    bump_calendar_versions({user_id})
     db.session.commit()
+    conflict_index.record(event)
 
-    save_event_version(event, user_id) 
     emit_event('event_created', event.to_dict())
 
     return jsonify({
@@ -121,55 +144,76 @@ def create_event():
 
 @events_bp.route('/events', methods=['GET'])
 @jwt_required()
+@replica_reads
 def list_events():
+    listing = EventListing(int(get_jwt_identity()), request.args, current_app.config["LIST_MAX_PER_PAGE"])
+
+    calendar_version = db.session.execute(listing.calendar_version_statement()).scalar()
+    etag = listing.etag(calendar_version, request.query_string.decode())
+    if not_modified(etag):
+        return not_modified_response(etag)
+
+    max_occurrences = current_app.config["RECURRENCE_MAX_OCCURRENCES"]
+    try:
+        query = listing.statement()
+        series_query = listing.series_statement(query)
+        if series_query is not None:
+            query = listing.without_empty_series(query, db.session.execute(series_query).all(), max_occurrences)
+        page_query = listing.page_statement(query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    total = db.session.execute(listing.count_statement(query)).scalar() if listing.include_total else None
+    rows = db.session.execute(page_query).all()
+    response = listing.response(rows, total, max_occurrences)
+    return conditional(jsonify(response), etag), 200
+
+@events_bp.route('/events/stream', methods=['GET'])
+@jwt_required()
+@replica_reads
+def stream_events():
+    """Every event the caller can see as newline-delimited JSON, by id."""
     user_id = int(get_jwt_identity())
+    rows = db.session.execute(
+        visible_events(user_id, *EVENT_COLUMNS).order_by(Event.id).execution_options(yield_per=1000)
+    )
+    return Response(stream_with_context(ndjson(rows, ROW_KEYS)), mimetype="application/x-ndjson")
 
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 10))
-    start_filter = request.args.get('start_time')
-    end_filter = request.args.get('end_time')
-    owner_filter = request.args.get('owner_id')
-    is_recurring_filter = request.args.get('is_recurring')
+@events_bp.route('/events/search', methods=['GET'])
+@jwt_required()
+@replica_reads
+def search_events():
+    """Visible events whose title, description or location match ``q``, best first."""
+    search = EventSearch(int(get_jwt_identity()), request.args,
+                         current_app.config["SEARCH_MAX_TERMS"], current_app.config["SEARCH_MAX_PER_PAGE"])
 
-    query = Event.query.join(EventPermission, isouter=True).filter(
-        or_(Event.owner_id == user_id, EventPermission.user_id == user_id)
-    ).distinct()
+    calendar_version = db.session.execute(search.calendar_version_statement()).scalar()
+    etag = search.etag(calendar_version, request.query_string.decode())
+    if not_modified(etag):
+        return not_modified_response(etag)
 
     try:
-        if start_filter:
-            query = query.filter(Event.start_time >= datetime.fromisoformat(start_filter))
-        if end_filter:
-            query = query.filter(Event.end_time <= datetime.fromisoformat(end_filter))
-    except Exception:
-        return jsonify({"error": "Invalid start_time or end_time filter"}), 400
+        query = search.statement(db.session.get_bind().dialect.name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SearchUnavailable as e:
+        return jsonify({"error": str(e)}), 501
 
-    if owner_filter:
-        try:
-            query = query.filter(Event.owner_id == int(owner_filter))
-        except ValueError:
-            return jsonify({"error": "Invalid owner_id"}), 400
-
-    if is_recurring_filter:
-        if is_recurring_filter.lower() == "true":
-            query = query.filter(Event.is_recurring.is_(True))
-        elif is_recurring_filter.lower() == "false":
-            query = query.filter(Event.is_recurring.is_(False))
-        else:
-            return jsonify({"error": "Invalid is_recurring filter"}), 400
-
-    paginated = query.order_by(Event.start_time.asc()).paginate(page=page, per_page=per_page, error_out=False)
-    return jsonify({
-        "page": page,
-        "per_page": per_page,
-        "total": paginated.total,
-        "events": [event_to_dict(event, check_user_role(event, user_id)) for event in paginated.items]
-    }), 200
+    rows = db.session.execute(query).all()
+    return conditional(jsonify(search.response(rows)), etag), 200
+
+@events_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    """Hit/miss counters of this worker's event and role cache."""
+    return jsonify(event_cache.stats()), 200
 
 @events_bp.route('/events/<int:event_id>', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_event(event_id):
     user_id = int(get_jwt_identity())
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
@@ -177,7 +221,10 @@ def get_event(event_id):
     # if not role:
     #     return jsonify({"error": "Permission denied"}), 403
 
-    return jsonify(event_to_dict(event, role)), 200
+    etag = event_etag(event, role)
+    if not_modified(etag, event.updated_at):
+        return not_modified_response(etag, event.updated_at)
+    return conditional(jsonify(event_to_dict(event, role)), etag, event.updated_at), 200
 
 @events_bp.route('/events/<int:event_id>', methods=['PUT'])
 @jwt_required()
@@ -187,21 +234,30 @@ def update_event(event_id):
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
-    role = check_user_role(event, user_id)
+    role = check_user_role(event, user_id, fresh=True)
     if role not in ("Owner", "Editor"):
         return jsonify({"error": "Permission denied"}), 403
+    if precondition_failed(event_etag(event, role)):
+        return jsonify({"error": "Event was modified since it was fetched"}), 412
     data = request.get_json() or {}
-    conflicts = check_event_conflicts(user_id, data.get('start_time'), data.get('end_time'), exclude_event_id=event_id)
-    if conflicts:
-        return jsonify({
-            "message": "Event conflict detected",
-            "conflicts": [event.id for event in conflicts]
-        }), 409
-
     errors = validate_event_data(data, for_update=True)
     if errors:
         return jsonify({"errors": errors}), 400
 
+    if any(field in data for field in ("start_time", "end_time", "is_recurring", "recurrence_pattern")):
+        conflicts = check_event_conflicts(
+            event.owner_id,
+            data.get('start_time', event.start_time),
+            data.get('end_time', event.end_time),
+            exclude_event_id=event_id,
+            recurrence_pattern=recurrence_of(data, event)
+        )
+        if conflicts:
+            return jsonify({
+                "message": "Event conflict detected",
+                "conflicts": conflicts
+            }), 409
+
     updated = False
     for field in ["title", "description", "location", "is_recurring", "recurrence_pattern"]:
         if field in data and getattr(event, field) != data[field]:
@@ -221,13 +277,22 @@ def update_event(event_id):
     if not updated:
         return jsonify({"msg": "No changes detected"}), 200
 
-    db.session.commit()
+    try:
+        save_event_version(event, user_id)
+        bump_event_audience(event_id, event.owner_id)
+        db.session.commit()
+    except StaleDataError:
+        # Another write moved version_counter after the If-Match check.
+        db.session.rollback()
+        return jsonify({"error": "Event was modified since it was fetched"}), 412
+    event_cache.invalidate_event(event_id)
+    conflict_index.record(event)
+    occurrence_cache.invalidate(event_id)
     emit_event('event_updated', event.to_dict())
-    save_event_version(event, user_id)
     role = check_user_role(event, user_id)
     if not role:
         return jsonify({"error": "Permission denied"}), 403
-    return jsonify(event_to_dict(event, role)), 200
+    return conditional(jsonify(event_to_dict(event, role)), event_etag(event, role), event.updated_at), 200
 
 @events_bp.route('/events/<int:event_id>', methods=['DELETE'])
 @jwt_required()
@@ -240,12 +305,21 @@ def delete_event(event_id):
     if event.owner_id != user_id:
         return jsonify({"error": "Only the owner can delete the event"}), 403
 
+    shared_with = {uid for (uid,) in db.session.query(EventPermission.user_id).filter_by(event_id=event.id)}
+    bump_calendar_versions(shared_with | {user_id})
     EventPermission.query.filter_by(event_id=event.id).delete()
     EventVersion.query.filter_by(event_id=event.id).delete()
     db.session.delete(event)
-    db.session.commit()
-
-    emit_event('event_deleted', {"id": event_id, "owner_id": user_id})
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"error": "Event was changed concurrently, retry the request"}), 409
+    event_cache.invalidate_event(event_id, shared_with)
+    conflict_index.discard(user_id, event_id)
+    occurrence_cache.invalidate(event_id)
+
+    emit_event('event_deleted', {"id": event_id, "owner_id": user_id}, user_ids=shared_with)
     
     return jsonify({"msg": "Event deleted"}), 200
 
@@ -257,48 +331,51 @@ def batch_create_events():
     if not data or not isinstance(data, list):
         return jsonify({"error": "Expected a list of event objects"}), 400
 
-    created_events = []
-    errors = []
+    mode = request.args.get('mode', 'partial')
+    if mode not in ("partial", "all_or_nothing"):
+        return jsonify({"error": "mode must be 'partial' or 'all_or_nothing'"}), 400
 
+    now = now_ist().replace(tzinfo=None)
+    errors = []
+    rows, indexes = [], []
     for idx, entry in enumerate(data):
-        errs = validate_event_data(entry)
+        errs = validate_event_data(entry) if isinstance(entry, dict) else ["Expected an event object"]
         if errs:
             errors.append({"index": idx, "errors": errs})
             continue
+        rows.append(event_row(entry, user_id, now))
+        indexes.append(idx)
 
-        try:
-            event = Event(
-                title=entry["title"],
-                description=entry.get("description"),
-                start_time=datetime.fromisoformat(entry["start_time"]),
-                end_time=datetime.fromisoformat(entry["end_time"]),
-                location=entry.get("location"),
-                is_recurring=entry.get("is_recurring", False),
-                recurrence_pattern=entry.get("recurrence_pattern"),
-                owner_id=user_id
-            )
-            db.session.add(event)
-            db.session.flush()
-
-            save_event_version(event, user_id)
-            emit_event('event_created', event.to_dict())
-            created_events.append(event.to_dict())
-            role = check_user_role(event, user_id)
-            if not role:
-                return jsonify({"error": "Only owner and editor can create multiple events"}), 403
-
-        except Exception as e:
-            errors.append({"index": idx, "errors": [str(e)]})
-    db.session.commit()
-    
-    return jsonify({"created": created_events, "errors": errors}), 207
+    accepted, conflicts = screen_conflicts(user_id, rows, indexes)
+    errors.extend(conflicts)
+
+    errors.sort(key=lambda e: e["index"])
+    if errors and mode == "all_or_nothing":
+        status = 409 if all("conflicts" in e for e in errors) else 400
+        return jsonify({"created": [], "errors": errors}), status
+
+    try:
+        ids = insert_events(accepted, user_id)
+        bump_calendar_versions({user_id})
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Batch insert failed: {str(e)}"}), 500
+
+    record_inserted(user_id, ids, accepted)
+    created_events = [row_to_dict(event_id, row) for event_id, row in zip(ids, accepted)]
+    if created_events:
+        broadcaster.publish_batch('events_created', user_id, created_events)
+
+    return jsonify({"created": created_events, "errors": errors}), 201 if not errors else 207
 
 @events_bp.route('/events/<int:event_id>/share', methods=['POST'])
 @jwt_required()
 def share_event(event_id):
+    """Share an event with many users at once, or change their roles."""
     user_id = int(get_jwt_identity())
 
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
@@ -308,55 +385,19 @@ def share_event(event_id):
     data = request.get_json()
     if not data or "users" not in data:
         return jsonify({"error": "Missing 'users' list in request body"}), 400
+    if not isinstance(data["users"], list) or len(data["users"]) > current_app.config["SHARE_MAX_USERS"]:
+        return jsonify({"error": f"'users' must be a list of at most {current_app.config['SHARE_MAX_USERS']} entries"}), 400
 
-    shared_users = []
-    for entry in data["users"]:
-        share_with_user_id = entry.get("user_id")
-        role = entry.get("permission")
-
-        if not share_with_user_id or role not in ("Editor", "Viewer"):
-            continue  # skip invalid entries
-
-        if int(share_with_user_id) == user_id:
-            continue  # skip owner
-
-        share_with_user = User.query.get(share_with_user_id)
-        if not share_with_user:
-            continue  # skip if target user doesn't exist
-
-        # Create or update permission
-        perm = EventPermission.query.filter_by(event_id=event_id, user_id=share_with_user_id).first()
-        if perm:
-            perm.role = role
-        else:
-            perm = EventPermission(
-                event_id=event_id,
-                user_id=share_with_user_id,
-                role=role,
-                username=share_with_user.username
-            )
-            db.session.add(perm)
-
-        shared_users.append({
-            "user_id": share_with_user_id,
-            "role": role
-        })
-
-        emit_event('event_shared', {
-            "event_id": event_id,
-            "shared_with_user_id": share_with_user_id,
-            "role": role,
-            "owner_id": user_id
-        })
+    roles, skipped = parse_roles(data["users"], user_id, role_key="permission")
+    try:
+        shared_users, not_found, changed = share(event_id, roles)
+        commit_changes(event, changed, 'event_shared', {"shared_users": shared_users})
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Permissions were changed concurrently, retry the request"}), 409
 
-    db.session.commit()
-    emit_event('event_shared', {
-        "event_id": event_id,
-        "shared_users": shared_users,
-        "role": role,
-        "owner_id": user_id
-    })
     return jsonify({
         "msg": f"Event shared with {len(shared_users)} user(s)",
-        "shared": shared_users
+        "shared": shared_users,
+        "skipped": skipped + not_found
     }), 200
@@ -0,0 +1,116 @@
+import io
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models import Event, now_ist
+from app.routes.events import validate_event_data
+from app.services.listing import visible_events
+from app.services.broadcast import broadcaster
+from app.services.conditional import bump_calendar_versions
+from app.services.bulk import event_row, insert_events, record_inserted, row_to_dict, screen_conflicts
+from app.services.ics import export_calendar, parse_calendar
+from app.services.replicas import replica_reads
+
+ical_bp = Blueprint("ical", __name__)
+
+EXPORT_COLUMNS = (
+    Event.id, Event.title, Event.description, Event.location, Event.start_time, Event.end_time,
+    Event.is_recurring, Event.recurrence_pattern, Event.created_at, Event.updated_at
+)
+
+
+@ical_bp.route('/events/export.ics', methods=['GET'])
+@jwt_required()
+@replica_reads
+def export_ics():
+    user_id = int(get_jwt_identity())
+    rows = db.session.execute(
+        visible_events(user_id, *EXPORT_COLUMNS).order_by(Event.start_time, Event.id).execution_options(yield_per=1000)
+    )
+    return Response(
+        stream_with_context(export_calendar(rows)),
+        mimetype="text/calendar",
+        headers={"Content-Disposition": "attachment; filename=events.ics"}
+    )
+
+
+def import_chunk(entries, user_id):
+    """Validate, conflict-check and insert one chunk; the caller commits.
+
+    Returns ``(created_dicts, errors)``.
+    """
+    now = now_ist().replace(tzinfo=None)
+    rows, indexes, errors = [], [], []
+    for position, entry in entries:
+        errs = validate_event_data(entry)
+        if errs:
+            errors.append({"index": position, "errors": errs})
+            continue
+        rows.append(event_row(entry, user_id, now))
+        indexes.append(position)
+    accepted, conflicts = screen_conflicts(user_id, rows, indexes)
+    errors.extend(conflicts)
+    ids = insert_events(accepted, user_id)
+    bump_calendar_versions({user_id})
+    db.session.commit()
+    record_inserted(user_id, ids, accepted)
+    return [row_to_dict(event_id, row) for event_id, row in zip(ids, accepted)], errors
+
+
+@ical_bp.route('/events/import', methods=['POST'])
+@jwt_required()
+def import_ics():
+    """Import the VEVENTs of an iCalendar body, committed chunk by chunk.
+
+    Entries that fail validation or conflict are reported by their VEVENT
+    position; everything else is created (partial mode of the batch API).
+    If a chunk cannot be written the import stops with a 422 that reports
+    what was committed and ``stopped_at``, the first VEVENT not imported.
+    """
+    user_id = int(get_jwt_identity())
+    chunk_size = current_app.config["ICS_IMPORT_CHUNK_SIZE"]
+    max_errors = current_app.config["ICS_IMPORT_MAX_ERRORS"]
+
+    created, failed, errors = 0, 0, []
+    chunk, parsed = [], 0
+
+    def flush():
+        nonlocal created, failed
+        try:
+            created_events, chunk_errors = import_chunk(chunk, user_id)
+        except Exception:
+            db.session.rollback()
+            raise
+        chunk.clear()
+        created += len(created_events)
+        failed += len(chunk_errors)
+        errors.extend(sorted(chunk_errors, key=lambda e: e["index"])[:max_errors - len(errors)])
+        if created_events:
+            broadcaster.publish_batch('events_created', user_id, created_events)
+
+    lines = io.BufferedReader(request.stream, 64 * 1024)
+    try:
+        for position, entry, entry_errors in parse_calendar(lines):
+            parsed = position + 1
+            if entry_errors:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"index": position, "errors": entry_errors})
+                continue
+            chunk.append((position, entry))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    except Exception as e:
+        # Earlier chunks stay committed; the client can resume from stopped_at.
+        current_app.logger.exception("ICS import stopped: %s", e)
+        stopped_at = chunk[0][0] if chunk else parsed
+        return jsonify({
+            "error": f"Import stopped at VEVENT {stopped_at}: {str(e)}",
+            "created": created, "failed": failed, "errors": errors, "stopped_at": stopped_at
+        }), 422
+
+    if not created and not failed:
+        return jsonify({"error": "No VEVENT found in request body"}), 400
+    return jsonify({"created": created, "failed": failed, "errors": errors}), 201 if not failed else 207
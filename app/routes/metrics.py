@@ -0,0 +1,26 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.services.cache import event_cache
+from app.services.metrics import registry
+from app.sockets.realtime import authenticated
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@registry.collector
+def cache_and_socket_metrics():
+    stats = event_cache.stats()
+    kinds = ("event", "role")
+    yield ("event_cache_hits_total", "counter", "Event cache lookups answered from the cache.",
+           [({"kind": kind}, stats[kind]["hits"]) for kind in kinds])
+    yield ("event_cache_misses_total", "counter", "Event cache lookups that went to the database.",
+           [({"kind": kind}, stats[kind]["misses"]) for kind in kinds])
+    yield ("socketio_authenticated_clients", "gauge", "Socket.IO connections with a valid token on this worker.",
+           [({}, len(authenticated))])
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """This worker's metrics in the Prometheus text format."""
+    token = current_app.config["METRICS_TOKEN"]
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,113 @@
+from datetime import datetime, time, timedelta
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from app.services.conflicts import naive
+from app.services.scheduling import busy_intervals, find_slots, merge_blocks, merge_intervals, unrelated_users
+
+scheduling_bp = Blueprint("scheduling", __name__)
+
+def parse_window(data):
+    """Return ``(window_start, window_end, error)`` from a request body."""
+    try:
+        window_start = naive(datetime.fromisoformat(data["start_time"]))
+        window_end = naive(datetime.fromisoformat(data["end_time"]))
+    except (KeyError, TypeError, ValueError):
+        return None, None, "start_time and end_time must be ISO datetimes"
+    if window_end <= window_start:
+        return None, None, "end_time must be after start_time"
+    if window_end - window_start > timedelta(days=current_app.config["SCHEDULING_MAX_DAYS"]):
+        return None, None, f"Window cannot exceed {current_app.config['SCHEDULING_MAX_DAYS']} days"
+    return window_start, window_end, None
+
+def parse_user_ids(value, field="user_ids"):
+    """Return ``(user_ids, error, status)``; only the caller and users sharing
+    an event with the caller may be asked about."""
+    if not isinstance(value, list) or not value:
+        return None, f"{field} must be a non-empty list", 400
+    try:
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in value))
+    except (TypeError, ValueError):
+        return None, f"{field} must be integers", 400
+    if len(user_ids) > current_app.config["SCHEDULING_MAX_USERS"]:
+        return None, f"At most {current_app.config['SCHEDULING_MAX_USERS']} users per request", 400
+    unrelated = unrelated_users(int(get_jwt_identity()), user_ids)
+    if unrelated:
+        return None, f"No shared events with user(s) {', '.join(map(str, unrelated))}", 403
+    return user_ids, None, None
+
+def parse_working_hours(value):
+    if value is None:
+        return None, None
+    try:
+        hours = (time.fromisoformat(value["start"]), time.fromisoformat(value["end"]))
+    except (KeyError, TypeError, ValueError):
+        return None, "working_hours must have start and end times like 09:00"
+    if hours[1] <= hours[0]:
+        return None, "working_hours end must be after start"
+    return hours, None
+
+def parse_working_days(value):
+    if value is None:
+        return None, None
+    if not isinstance(value, list) or not all(isinstance(day, int) and 0 <= day <= 6 for day in value):
+        return None, "working_days must be a list of weekdays, 0 (Monday) to 6 (Sunday)"
+    return set(value), None
+
+def blocks_to_json(blocks):
+    return [{"start": start.isoformat(), "end": end.isoformat()} for start, end in blocks]
+
+
+@scheduling_bp.route('/freebusy', methods=['POST'])
+@jwt_required()
+def freebusy():
+    data = request.get_json(silent=True) or {}
+    user_ids, error, status = parse_user_ids(data.get("user_ids"))
+    if error:
+        return jsonify({"error": error}), status
+    window_start, window_end, error = parse_window(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    intervals = busy_intervals(user_ids, window_start, window_end, current_app.config["SCHEDULING_QUERY_BATCH"])
+    busy = {user_id: merge_intervals(user_intervals) for user_id, user_intervals in intervals.items()}
+
+    return jsonify({
+        "start_time": window_start.isoformat(),
+        "end_time": window_end.isoformat(),
+        "users": {str(user_id): blocks_to_json(blocks) for user_id, blocks in busy.items()},
+        "combined": blocks_to_json(merge_blocks(busy.values()))
+    }), 200
+
+
+@scheduling_bp.route('/events/find-slots', methods=['POST'])
+@jwt_required()
+def find_common_slots():
+    data = request.get_json(silent=True) or {}
+    user_ids, error, status = parse_user_ids(data.get("participants"), "participants")
+    if error:
+        return jsonify({"error": error}), status
+    window_start, window_end, error = parse_window(data)
+    if error:
+        return jsonify({"error": error}), 400
+    hours, error = parse_working_hours(data.get("working_hours"))
+    if error:
+        return jsonify({"error": error}), 400
+    days, error = parse_working_days(data.get("working_days"))
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        duration = timedelta(minutes=int(data["duration_minutes"]))
+        step = timedelta(minutes=int(data.get("step_minutes", 15)))
+        limit = int(data.get("limit", 5))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "duration_minutes is required; duration_minutes, step_minutes and limit must be integers"}), 400
+    if duration <= timedelta(0) or step <= timedelta(0) or not 1 <= limit <= 100:
+        return jsonify({"error": "duration_minutes and step_minutes must be positive and limit between 1 and 100"}), 400
+
+    slots = find_slots(
+        user_ids, duration, window_start, window_end, hours, days, limit, step,
+        batch_size=current_app.config["SCHEDULING_QUERY_BATCH"],
+        chunk=timedelta(days=current_app.config["SCHEDULING_SLOT_CHUNK_DAYS"])
+    )
+    return jsonify({"slots": blocks_to_json(slots)}), 200
@@ -1,81 +1,188 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import EventVersion, Event, User
 from app import db
 from datetime import datetime
 import pytz
-from sqlalchemy import func
+from sqlalchemy import func, inspect
+from sqlalchemy.orm.exc import StaleDataError
+from app.services.broadcast import broadcaster
+from app.services.cache import event_cache
+from app.services.conditional import bump_event_audience, conditional, make_etag, not_modified, not_modified_response
+from app.services.conflicts import conflict_index
+from app.services.recurrence import occurrence_cache
+from app.services.replicas import replica_reads
 
 version_bp = Blueprint("version", __name__)
 IST = pytz.timezone("Asia/Kolkata")
 
-def get_next_version_id(event_id):
-    max_version = db.session.query(func.max(EventVersion.version_id)).filter_by(event_id=event_id).scalar()
-    if max_version is None:
-        return 1
-    else:
-        return max_version + 1
-    
-def save_event_version(event, user_id):
-    last_version = EventVersion.query.filter_by(event_id=event.id).order_by(EventVersion.version_number.desc()).first()
-    version_number = last_version.version_number + 1 if last_version else 1
-
-    data_snapshot = {
-        "title": event.title,
-        "description": event.description,
-        "start_time": event.start_time.isoformat() if event.start_time else None,
-        "end_time": event.end_time.isoformat() if event.end_time else None,
-        "location": event.location,
-        "is_recurring": event.is_recurring,
-        "recurrence_pattern": event.recurrence_pattern,
-        "modified_at": datetime.now(IST).isoformat()
+SNAPSHOT_FIELDS = ("title", "description", "start_time", "end_time", "location", "is_recurring", "recurrence_pattern")
+
+def snapshot_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def event_snapshot(values, modified_at=None):
+    data_snapshot = {field: snapshot_value(values.get(field)) for field in SNAPSHOT_FIELDS}
+    data_snapshot["modified_at"] = (modified_at or datetime.now(IST)).isoformat()
+    return data_snapshot
+
+def initial_changes(data_snapshot):
+    return {
+        field: {"old": None, "new": data_snapshot[field]}
+        for field in SNAPSHOT_FIELDS if data_snapshot[field] is not None
+    }
+
+def diff_snapshots(old, new):
+    return {
+        field: {"old": old.get(field), "new": new.get(field)}
+        for field in SNAPSHOT_FIELDS if old.get(field) != new.get(field)
     }
 
-    new_version_id = get_next_version_id(event.id)
-    
+def compose_changes(changesets):
+    """Fold consecutive per-version changes into one old/new record per field."""
+    composed = {}
+    for changes in changesets:
+        for field, change in changes.items():
+            if field in composed:
+                composed[field]["new"] = change["new"]
+            else:
+                composed[field] = dict(change)
+    return {field: change for field, change in composed.items() if change["old"] != change["new"]}
+
+def next_version_number(event):
+    if not event.version_counter:
+        # Events created before the per-event counter existed.
+        latest = db.session.query(func.max(EventVersion.version_number)).filter_by(event_id=event.id).scalar()
+        event.version_counter = latest or 0
+    event.version_counter += 1
+    return event.version_counter
+
+def is_keyframe(version_number):
+    return (version_number - 1) % current_app.config["VERSION_KEYFRAME_INTERVAL"] == 0
+
+def pending_changes(event):
+    """Old/new values of the snapshot fields changed on ``event`` since it was loaded.
+
+    Returns None when an old value was never loaded and has to come from the
+    previous version instead.
+    """
+    state = inspect(event)
+    changes = {}
+    for field in SNAPSHOT_FIELDS:
+        history = state.attrs[field].history
+        if not history.added:
+            continue
+        if not history.deleted:
+            return None
+        old, new = snapshot_value(history.deleted[0]), snapshot_value(history.added[0])
+        if old != new:
+            changes[field] = {"old": old, "new": new}
+    return changes
+
+def save_event_version(event, user_id, created=False):
+    """Add the next EventVersion for ``event`` to the session; the caller commits.
+
+    Every VERSION_KEYFRAME_INTERVAL-th version stores the full snapshot, the
+    ones in between only the fields that changed. The field-level changes
+    against the previous version are stored alongside for the changelog.
+    ``created`` marks a new event inserted with ``version_counter=1``, whose
+    first version this is.
+    """
+    # Read the attribute history before anything can autoflush it away.
+    changes = pending_changes(event)
+    with db.session.no_autoflush:
+        version_number = event.version_counter if created else next_version_number(event)
+        data_snapshot = event_snapshot({field: getattr(event, field) for field in SNAPSHOT_FIELDS})
+        if version_number == 1:
+            changes = initial_changes(data_snapshot)
+        elif changes is None:
+            changes = diff_snapshots(version_data(event.id, version_number - 1) or {}, data_snapshot)
+
+    keyframe = is_keyframe(version_number)
+    if not keyframe:
+        data_snapshot = {k: v for k, v in data_snapshot.items() if k in changes or k == "modified_at"}
+
     version = EventVersion(
         event_id=event.id,
         version_number=version_number,
         data=data_snapshot,
+        changes=changes,
+        is_keyframe=keyframe,
         modified_by=user_id,
-        version_id=new_version_id,
+        version_id=version_number,
         updated_by=user_id
     )
     db.session.add(version)
-    db.session.commit()
+    return version
+
+def materialize_versions(versions):
+    """Yield ``(version, full_data)`` for versions ordered by version_number."""
+    state = {}
+    for version in versions:
+        if version.is_keyframe or version.is_keyframe is None:
+            state = dict(version.data)
+        else:
+            state = {**state, **version.data}
+        yield version, state
+
+def version_data(event_id, version_number):
+    """Rebuild one version from its nearest keyframe in a single query."""
+    keyframe = db.session.query(func.max(EventVersion.version_number)).filter(
+        EventVersion.event_id == event_id,
+        EventVersion.version_number <= version_number,
+        EventVersion.is_keyframe.isnot(False)
+    ).scalar_subquery()
+    versions = EventVersion.query.filter(
+        EventVersion.event_id == event_id,
+        EventVersion.version_number >= func.coalesce(keyframe, 1),
+        EventVersion.version_number <= version_number
+    ).order_by(EventVersion.version_number.asc()).all()
+    data = None
+    for _, data in materialize_versions(versions):
+        pass
+    return data
 
 
 @version_bp.route("/events/<int:event_id>/versions", methods=["GET"])
 @jwt_required()
+@replica_reads
 def list_event_versions(event_id):
     user_id = int(get_jwt_identity())
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
    
         return jsonify({"error": "Permission denied"}), 403
 
-    versions = EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.created_at.desc()).all()
+    # Versions are append-only and every new one moves version_counter.
+    etag = make_etag("versions", event_id, event.version_counter)
+    if not_modified(etag, event.updated_at):
+        return not_modified_response(etag, event.updated_at)
+
+    versions = EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.version_number.asc()).all()
+    user_ids = {int(v.modified_by) for v in versions if v.modified_by}
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids))) if user_ids else {}
     result = []
-    for v in versions:
-        user = User.query.get(v.modified_by)
+    for v, data in materialize_versions(versions):
         result.append({
             "version_id": v.id,
             "version_number": v.version_number,
-            **v.data,
-            "modified_by": user.username if user else "Unknown",
+            **data,
+            "modified_by": usernames.get(int(v.modified_by), "Unknown") if v.modified_by else "Unknown",
             "created_at": v.created_at.isoformat()
         })
+    result.reverse()
 
-    return jsonify(result), 200
+    return conditional(jsonify(result), etag, event.updated_at), 200
 
 @version_bp.route("/events/<int:event_id>/history/<int:version_id>", methods=["GET"])
 @jwt_required()
+@replica_reads
 def get_event_version(event_id, version_id):
     user_id = int(get_jwt_identity())
 
-    event = Event.query.get(event_id)
+    event = event_cache.event(event_id)
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
@@ -89,7 +196,7 @@ def get_event_version(event_id, version_id):
     response = {
         "version_id": version.version_id,
         "version_number": version.version_number,
-        **version.data,
+        **version_data(event_id, version.version_number),
         "modified_by": user.username if user else "Unknown",
         "created_at": version.created_at.isoformat()
     }
@@ -106,16 +213,14 @@ def rollback_event(event_id, version_id):
     if not event:
         return jsonify({"error": "Event not found"}), 404
 
-    if event.owner_id != user_id and not any(
-        perm.user_id == user_id and perm.role == "Editor" for perm in event.permissions
-    ):
+    if event_cache.role(event, user_id, fresh=True) not in ("Owner", "Editor"):
         return jsonify({"error": "Permission denied"}), 403
 
     version = EventVersion.query.filter_by(version_id=version_id, event_id=event_id).first()
     if not version:
         return jsonify({"error": "Version not found"}), 404
 
-    data = version.data
+    data = version_data(event_id, version.version_number)
     event.title = data.get("title")
     event.description = data.get("description")
     event.start_time = datetime.fromisoformat(data["start_time"]) if data.get("start_time") else None
@@ -124,7 +229,16 @@ def rollback_event(event_id, version_id):
     event.is_recurring = data.get("is_recurring")
     event.recurrence_pattern = data.get("recurrence_pattern")
 
-    db.session.commit()
-    save_event_version(event, user_id)
+    try:
+        save_event_version(event, user_id)
+        bump_event_audience(event_id, event.owner_id)
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"error": "Event was changed concurrently, retry the request"}), 409
+    event_cache.invalidate_event(event_id)
+    conflict_index.record(event)
+    occurrence_cache.invalidate(event_id)
+    broadcaster.publish('event_updated', event.to_dict(), event_id=event_id)
 
     return jsonify({"msg": f"Rolled back to version {version_id}"}), 200
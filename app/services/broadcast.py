@@ -0,0 +1,109 @@
+import itertools
+import threading
+from collections import OrderedDict
+
+from app import db, socketio
+from app.models import EventPermission
+
+COALESCED = ("event_created", "event_updated", "event_deleted")
+
+
+def event_room(event_id):
+    return f"event:{event_id}"
+
+
+def user_room(user_id):
+    return f"user:{user_id}"
+
+
+class ChangeBroadcaster:
+    """Fans event changes out to Socket.IO rooms from a background task.
+
+    ``publish`` only records the change, so the HTTP request never waits on
+    delivery. Every REALTIME_COALESCE_SECONDS the pending changes are sent to
+    ``event:<id>`` and to ``user:<id>`` of the owner and everyone the event
+    is shared with; several changes to one event inside a window go out as a
+    single message carrying the latest state. ``emitter`` replaces
+    ``socketio.emit`` when clients are served by another Socket.IO server,
+    as in the ASGI mode.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._worker = None
+        self.emitter = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def publish(self, event_type, payload, event_id=None, user_ids=None):
+        with self._lock:
+            if event_type in COALESCED and event_id is not None:
+                key = ("event", event_id)
+                previous = self._pending.get(key)
+                if previous and event_type != "event_deleted" and previous[0] == "event_created":
+                    event_type = "event_created"
+                if previous and previous[3] is not None:
+                    user_ids = set(previous[3]) | set(user_ids or ())
+            else:
+                key = (event_type, next(self._sequence))
+            self._pending[key] = (event_type, payload, event_id, user_ids)
+            self._pending.move_to_end(key)
+        self._ensure_worker()
+
+    def publish_batch(self, event_type, owner_id, items):
+        size = self.app.config["REALTIME_BATCH_SIZE"] if self.app else 500
+        for start in range(0, len(items), size):
+            self.publish(event_type, {"owner_id": owner_id, "events": items[start:start + size]},
+                         user_ids={owner_id})
+
+    def _ensure_worker(self):
+        if self._worker is None and self.app is not None and self.app.config["REALTIME_COALESCE_SECONDS"] > 0:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = socketio.start_background_task(self._run)
+        elif self.app is not None and self.app.config["REALTIME_COALESCE_SECONDS"] <= 0:
+            self.flush()
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.app.config["REALTIME_COALESCE_SECONDS"])
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.exception("Realtime flush failed: %s", e)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        if not pending:
+            return 0
+
+        unresolved = {event_id for _, _, event_id, user_ids in pending.values()
+                      if event_id is not None and user_ids is None}
+        shared = {}
+        if unresolved:
+            with self.app.app_context():
+                rows = db.session.query(EventPermission.event_id, EventPermission.user_id).filter(
+                    EventPermission.event_id.in_(unresolved)
+                ).all()
+                db.session.remove()
+            for event_id, user_id in rows:
+                shared.setdefault(event_id, set()).add(user_id)
+
+        for event_type, payload, event_id, user_ids in pending.values():
+            recipients = set(user_ids) if user_ids is not None else set(shared.get(event_id, ()))
+            if isinstance(payload, dict) and payload.get("owner_id") is not None:
+                recipients.add(payload["owner_id"])
+            rooms = [user_room(user_id) for user_id in sorted(recipients)]
+            if event_id is not None:
+                rooms.append(event_room(event_id))
+            if rooms:
+                (self.emitter or socketio.emit)(event_type, payload, to=rooms)
+        return len(pending)
+
+
+broadcaster = ChangeBroadcaster()
@@ -0,0 +1,183 @@
+import heapq
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_
+
+from app import db
+from app.models import Event, EventVersion, IST
+from app.routes.versioning import event_snapshot, initial_changes
+from app.services.conflicts import conflict_index
+from app.services.recurrence import series_occurrences
+
+EVENT_FIELDS = ("title", "description", "start_time", "end_time", "location", "is_recurring", "recurrence_pattern")
+
+
+def event_row(entry, owner_id, now):
+    pattern = entry.get("recurrence_pattern")
+    return {
+        "title": entry["title"],
+        "description": entry.get("description"),
+        "start_time": datetime.fromisoformat(entry["start_time"]).replace(tzinfo=None),
+        "end_time": datetime.fromisoformat(entry["end_time"]).replace(tzinfo=None),
+        "location": entry.get("location"),
+        "is_recurring": bool(entry.get("is_recurring", False)),
+        "recurrence_pattern": pattern,
+        "owner_id": owner_id,
+        "version_counter": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _intervals(start, end, pattern, horizon):
+    if not pattern:
+        return [(start, end)]
+    return list(series_occurrences(start, end, pattern, None, horizon))
+
+
+def find_batch_conflicts(owner_id, rows):
+    """Sweep the batch and the owner's existing events in one pass.
+
+    Returns ``(existing, internal)``: for each row index, the ids of existing
+    events it overlaps and the indexes of other batch rows it overlaps.
+    """
+    existing = {i: set() for i in range(len(rows))}
+    internal = {i: set() for i in range(len(rows))}
+    if not rows:
+        return existing, internal
+
+    horizon_days = timedelta(days=current_app.config["RECURRENCE_CONFLICT_HORIZON_DAYS"])
+    span_start = min(row["start_time"] for row in rows)
+    span_end = max(
+        row["start_time"] + horizon_days if row["is_recurring"] else row["end_time"] for row in rows
+    )
+
+    intervals = []
+    for i, row in enumerate(rows):
+        pattern = row["recurrence_pattern"] if row["is_recurring"] else None
+        horizon = row["start_time"] + horizon_days
+        for start, end in _intervals(row["start_time"], row["end_time"], pattern, horizon):
+            intervals.append((start, end, "batch", i))
+
+    stored = db.session.query(
+        Event.id, Event.start_time, Event.end_time, Event.is_recurring, Event.recurrence_pattern
+    ).filter(
+        Event.owner_id == owner_id,
+        Event.start_time < span_end,
+        or_(Event.is_recurring.is_(True), Event.end_time > span_start)
+    )
+    for event_id, start, end, is_recurring, pattern in stored:
+        if is_recurring and pattern:
+            for occurrence in series_occurrences(start, end, pattern, span_start, span_end):
+                intervals.append((occurrence[0], occurrence[1], "event", event_id))
+        else:
+            intervals.append((start, end, "event", event_id))
+
+    intervals.sort(key=lambda item: item[0])
+    active = []  # heap of (end, seq, kind, ref)
+    for seq, (start, end, kind, ref) in enumerate(intervals):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, other_kind, other_ref in active:
+            if kind == "batch" and other_kind == "batch":
+                if other_ref != ref:
+                    internal[ref].add(other_ref)
+                    internal[other_ref].add(ref)
+            elif kind == "batch":
+                existing[ref].add(other_ref)
+            elif other_kind == "batch":
+                existing[other_ref].add(ref)
+        heapq.heappush(active, (end, seq, kind, ref))
+    return existing, internal
+
+
+def screen_conflicts(owner_id, rows, indexes):
+    """Split validated rows into accepted rows and conflict errors.
+
+    A row is rejected if it overlaps a stored event or an earlier accepted
+    row of the same batch; ``indexes`` maps rows back to request positions.
+    """
+    existing, internal = find_batch_conflicts(owner_id, rows)
+    accepted, errors = [], []
+    accepted_positions = set()
+    for pos, row in enumerate(rows):
+        clashes = sorted(existing[pos])
+        earlier = sorted(indexes[other] for other in internal[pos] if other < pos and other in accepted_positions)
+        if clashes or earlier:
+            error = {"index": indexes[pos], "errors": ["Event conflict detected"], "conflicts": clashes}
+            if earlier:
+                error["batch_conflicts"] = earlier
+            errors.append(error)
+            continue
+        accepted.append(row)
+        accepted_positions.add(pos)
+    return accepted, errors
+
+
+def insert_events(rows, user_id):
+    """Insert events and their first EventVersion rows without committing.
+
+    Returns the new event ids in the order of ``rows``.
+    """
+    if not rows:
+        return []
+    table = Event.__table__
+    dialect = db.session.get_bind().dialect
+    if dialect.name == "sqlite" and dialect.insert_executemany_returning:
+        # SQLite hands out rowids in VALUES order and the batches run in
+        # sequence, so sorting the returned ids restores parameter order
+        # without the row-at-a-time path sort_by_parameter_order needs here.
+        ids = sorted(db.session.execute(table.insert().returning(table.c.id), rows).scalars())
+    elif dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.session.execute(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+        )
+        ids = list(result.scalars())
+    else:
+        events = [Event(**row) for row in rows]
+        db.session.add_all(events)
+        db.session.flush()
+        ids = [event.id for event in events]
+
+    modified_at = datetime.now(IST)
+    created_at = datetime.utcnow()
+    versions = []
+    for event_id, row in zip(ids, rows):
+        data_snapshot = event_snapshot(row, modified_at)
+        versions.append({
+            "event_id": event_id,
+            "version_id": 1,
+            "version_number": 1,
+            "data": data_snapshot,
+            "changes": initial_changes(data_snapshot),
+            "is_keyframe": True,
+            "created_at": created_at,
+            "modified_by": user_id,
+            "updated_by": user_id,
+        })
+    db.session.execute(EventVersion.__table__.insert(), versions)
+    return ids
+
+
+def record_inserted(owner_id, ids, rows):
+    conflict_index.record_many(owner_id, [
+        (event_id, row["start_time"], row["end_time"], row["recurrence_pattern"] if row["is_recurring"] else None)
+        for event_id, row in zip(ids, rows)
+    ])
+
+
+def row_to_dict(event_id, row):
+    return {
+        "id": event_id,
+        "title": row["title"],
+        "description": row["description"],
+        "location": row["location"],
+        "is_recurring": row["is_recurring"],
+        "recurrence_pattern": row["recurrence_pattern"],
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat(),
+        "start_time": row["start_time"].isoformat(),
+        "end_time": row["end_time"].isoformat(),
+        "owner_id": row["owner_id"]
+    }
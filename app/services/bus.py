@@ -0,0 +1,126 @@
+import atexit
+import itertools
+import json
+import os
+import socket
+import struct
+import tempfile
+from urllib.parse import urlparse
+
+from socketio import PubSubManager
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "event-scheduler-bus")
+# Unix datagrams are capped by the socket buffer (wmem_default, ~208KB on
+# Linux); larger messages are sent as numbered fragments.
+FRAGMENT_SIZE = 64 * 1024
+HEADER = struct.Struct("!16sQII")
+
+
+class LocalSocketManager(PubSubManager):
+    """Socket.IO client manager that shares emits between processes on one host.
+
+    Every worker that has clients binds a Unix datagram socket named after
+    its host id in a shared directory; publishing sends the message to every
+    socket in that directory. There is no broker process: a socket file left
+    behind by a worker that died is removed the first time a send to it is
+    refused. Use ``local:///path/to/dir`` as the message queue URL; all
+    workers of one deployment must point at the same directory.
+    """
+
+    name = "local"
+
+    def __init__(self, url="local://", channel="flask-socketio", write_only=False,
+                 logger=None, send_timeout=1.0):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.directory = os.path.join(urlparse(url).path or DEFAULT_DIRECTORY, channel)
+        self.send_timeout = send_timeout
+        self.path = None
+        self._listener = None
+        self._sender = None
+        self._message_ids = itertools.count()
+
+    def initialize(self):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        if not self.write_only:
+            self.path = os.path.join(self.directory, f"{self.host_id}.sock")
+            self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._listener.bind(self.path)
+            atexit.register(self.close)
+        super().initialize()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def _peers(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names if name.endswith(".sock")]
+
+    def _fragments(self, data):
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        host, message_id = bytes.fromhex(self.host_id), next(self._message_ids)
+        chunks = [payload[i:i + FRAGMENT_SIZE] for i in range(0, len(payload), FRAGMENT_SIZE)] or [b""]
+        return [HEADER.pack(host, message_id, index, len(chunks)) + chunk for index, chunk in enumerate(chunks)]
+
+    def _publish(self, data):
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.settimeout(self.send_timeout)
+        fragments = self._fragments(data)
+        for peer in self._peers():
+            if peer == self.path:
+                continue
+            try:
+                for fragment in fragments:
+                    self._sender.sendto(fragment, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+            except socket.timeout:
+                self._get_logger().warning("Message bus peer %s is not reading; dropped a message", peer)
+
+    def _listen(self):
+        # Datagrams from one sender arrive in order, so fragments only need
+        # to be collected per (host, message id).
+        partial = {}
+        while True:
+            packet = self._listener.recv(FRAGMENT_SIZE + HEADER.size)
+            host, message_id, index, count = HEADER.unpack_from(packet)
+            chunk = packet[HEADER.size:]
+            if count == 1:
+                yield chunk
+                continue
+            key = (host, message_id)
+            chunks = partial.setdefault(key, [])
+            if index != len(chunks):
+                partial.pop(key, None)
+                continue
+            chunks.append(chunk)
+            if len(chunks) == count:
+                yield b"".join(partial.pop(key))
+
+
+def client_manager_options(url):
+    """Keyword arguments for ``socketio.init_app`` selecting the message bus.
+
+    No URL keeps delivery in-process, ``local://`` selects the broker-less
+    Unix socket bus and anything else (``redis://``, ``amqp://``, ...) is
+    handed to Flask-SocketIO's own message queue support.
+    """
+    if not url:
+        return {}
+    if url.startswith("local:"):
+        return {"client_manager": LocalSocketManager(url)}
+    return {"message_queue": url}
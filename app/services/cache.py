@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy import select
+
+from app import db
+from app.models import Event, EventPermission
+
+EVENT_FIELDS = (
+    "id", "title", "description", "location", "is_recurring", "recurrence_pattern",
+    "start_time", "end_time", "owner_id", "version_counter", "created_at", "updated_at"
+)
+DATETIME_FIELDS = ("start_time", "end_time", "created_at", "updated_at")
+
+
+class CacheBackend(ABC):
+    """Key/value store behind ``EventCache``.
+
+    ``get`` returns None on a miss, so None itself is never stored. Values
+    are strings and dicts of ``EVENT_FIELDS``, which a shared backend stores
+    as JSON.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        pass
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        pass
+
+    @abstractmethod
+    def delete(self, *keys):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class LocalCache(CacheBackend):
+    """In-process LRU with a per-entry TTL, bounded by number of entries."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "local", "size": len(self._entries), "max_entries": self.max_entries,
+                "evictions": self.evictions, "expirations": self.expirations
+            }
+
+
+class RedisCache(CacheBackend):
+    """Shared backend for several workers; needs the ``redis`` package."""
+
+    def __init__(self, url, prefix="event-scheduler:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return decode_value(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, encode_value(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + "*", count=1000):
+            self._client.delete(key)
+
+    def stats(self):
+        return {"backend": "redis"}
+
+
+def encode_value(value):
+    """JSON for a cached value, with datetimes as ISO 8601 strings."""
+    return json.dumps(value, default=datetime.isoformat, separators=(",", ":"))
+
+
+def decode_value(raw):
+    value = json.loads(raw)
+    if isinstance(value, dict):
+        for field in DATETIME_FIELDS:
+            if value.get(field) is not None:
+                value[field] = datetime.fromisoformat(value[field])
+    return value
+
+
+def cache_backend(url, max_entries):
+    """Backend for EVENT_CACHE_URL: unset keeps entries in this worker."""
+    if not url:
+        return LocalCache(max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    raise ValueError(f"Unsupported EVENT_CACHE_URL {url!r}")
+
+
+def _replica_view():
+    """True inside a view whose reads ``replica_reads`` sent to the replica."""
+    return has_app_context() and bool(g.get("db_replica"))
+
+
+class CachedEvent:
+    """Read-only stand-in for an ``Event`` served from the cache."""
+
+    __slots__ = EVENT_FIELDS
+
+    def __init__(self, values):
+        for field in EVENT_FIELDS:
+            setattr(self, field, values[field])
+
+    def to_dict(self):
+        return Event.to_dict(self)
+
+
+class EventCache:
+    """Read-through cache of events and of each user's role on an event.
+
+    Lookups miss to the database and store the result for EVENT_CACHE_TTL
+    seconds. Writes drop exactly the entries they change: an event edit
+    drops ``event:<id>``, a share or permission change drops
+    ``role:<event>:<user>``. With the default per-worker backend another
+    worker's write is seen once the TTL runs out; a shared backend sees it
+    immediately. Misses loaded from the replica are returned but not stored.
+    Routes that modify an event still load it from the session.
+    """
+
+    def __init__(self):
+        self.backend = LocalCache()
+        self.enabled = True
+        self.ttl = 10
+        self._lock = threading.Lock()
+        self._counts = {"event": [0, 0], "role": [0, 0]}
+
+    def init_app(self, app):
+        self.enabled = app.config["EVENT_CACHE_ENABLED"]
+        self.ttl = app.config["EVENT_CACHE_TTL"]
+        self.backend = cache_backend(app.config["EVENT_CACHE_URL"], app.config["EVENT_CACHE_SIZE"])
+
+    def _count(self, kind, hit):
+        with self._lock:
+            self._counts[kind][0 if hit else 1] += 1
+
+    def _lookup(self, kind, key):
+        value = self.backend.get(key) if self.enabled else None
+        self._count(kind, value is not None)
+        return value
+
+    def _store(self, key, value, from_replica=False):
+        # What a lagging replica returned is not cached, or readers on the
+        # primary would be served it for a whole TTL.
+        if self.enabled and not from_replica:
+            self.backend.set(key, value, self.ttl)
+
+    def _store_event(self, key, event, from_replica=False):
+        if event is None:
+            return None
+        values = {field: getattr(event, field) for field in EVENT_FIELDS}
+        self._store(key, values, from_replica)
+        return values
+
+    def event(self, event_id):
+        """The event as a ``CachedEvent``, or None if it does not exist."""
+        key = f"event:{event_id}"
+        values = self._lookup("event", key)
+        if values is None:
+            values = self._store_event(key, db.session.get(Event, event_id), _replica_view())
+            if values is None:
+                return None
+        return CachedEvent(values)
+
+    async def event_async(self, session, event_id):
+        """``event`` with misses loaded through the ``AsyncSession`` ``session``."""
+        key = f"event:{event_id}"
+        values = self._lookup("event", key)
+        if values is None:
+            values = self._store_event(key, await session.get(Event, event_id), session.info.get("replica", False))
+            if values is None:
+                return None
+        return CachedEvent(values)
+
+    def role(self, event, user_id, fresh=False):
+        """Role of ``user_id`` on ``event`` (Owner, Editor or Viewer), or None.
+
+        ``fresh`` skips the cached value (and replaces it), for checks that
+        authorize a write and must not trust another worker's stale entry.
+        """
+        if event.owner_id == user_id:
+            return "Owner"
+        key = f"role:{event.id}:{user_id}"
+        role = None if fresh else self._lookup("role", key)
+        if role is None:
+            role = db.session.execute(self._role_statement(event.id, user_id)).scalar() or ""
+            self._store(key, role, _replica_view())
+        return role or None
+
+    async def role_async(self, session, event, user_id):
+        """``role`` with a miss loaded through the ``AsyncSession`` ``session``."""
+        if event.owner_id == user_id:
+            return "Owner"
+        key = f"role:{event.id}:{user_id}"
+        role = self._lookup("role", key)
+        if role is None:
+            role = (await session.execute(self._role_statement(event.id, user_id))).scalar() or ""
+            self._store(key, role, session.info.get("replica", False))
+        return role or None
+
+    def _role_statement(self, event_id, user_id):
+        return select(EventPermission.role).where(
+            EventPermission.event_id == event_id, EventPermission.user_id == user_id
+        )
+
+    def invalidate_event(self, event_id, user_ids=()):
+        """Drop an event and, when it is deleted, the roles of ``user_ids`` on it."""
+        self.backend.delete(f"event:{event_id}", *(f"role:{event_id}:{int(user_id)}" for user_id in user_ids))
+
+    def invalidate_roles(self, event_id, user_ids):
+        self.backend.delete(*(f"role:{event_id}:{int(user_id)}" for user_id in user_ids))
+
+    def stats(self):
+        with self._lock:
+            counts = {kind: {"hits": hits, "misses": misses} for kind, (hits, misses) in self._counts.items()}
+        for kind in counts.values():
+            total = kind["hits"] + kind["misses"]
+            kind["hit_ratio"] = round(kind["hits"] / total, 4) if total else None
+        return {"enabled": self.enabled, "ttl": self.ttl, **counts, **self.backend.stats()}
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self._counts = {"event": [0, 0], "role": [0, 0]}
+
+
+event_cache = EventCache()
@@ -0,0 +1,73 @@
+import hashlib
+
+from flask import current_app, request
+from sqlalchemy import select
+
+from app import db
+from app.models import EventPermission, IST, User
+
+
+def make_etag(*parts):
+    """Strong (unquoted) entity tag over the parts that shape a response."""
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def event_etag(event, role):
+    # version_counter moves on every write even when updated_at keeps the
+    # same value at the column's precision (DATETIME is whole seconds on MySQL).
+    return make_etag("event", event.id, event.version_counter, event.updated_at.isoformat(), role)
+
+
+def aware(value):
+    """Stored IST wall clock as an aware datetime for HTTP dates."""
+    return IST.localize(value)
+
+
+def not_modified(etag, last_modified=None):
+    """True when the request's validators say the client copy is current.
+
+    If-None-Match wins over If-Modified-Since, as in RFC 9110.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return aware(last_modified).replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def precondition_failed(etag):
+    """True when If-Match is present and does not name ``etag``."""
+    return bool(request.if_match) and not request.if_match.contains(etag)
+
+
+def conditional(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = aware(last_modified)
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return conditional(current_app.response_class(status=304), etag, last_modified)
+
+
+def bump_calendar_versions(user_ids):
+    """Invalidate the list ETags of ``user_ids``; the caller commits.
+
+    Rows are updated in id order, CALENDAR_VERSION_BATCH per statement, so
+    writes with overlapping audiences lock them in the same order.
+    """
+    user_ids = sorted({int(user_id) for user_id in user_ids if user_id})
+    batch = current_app.config["CALENDAR_VERSION_BATCH"]
+    for start in range(0, len(user_ids), batch):
+        db.session.execute(
+            User.__table__.update().where(User.id.in_(user_ids[start:start + batch])).values(
+                calendar_version=User.calendar_version + 1
+            )
+        )
+
+
+def bump_event_audience(event_id, owner_id):
+    """Invalidate the list ETags of the owner and everyone an event is shared with."""
+    shared = db.session.execute(select(EventPermission.user_id).where(EventPermission.event_id == event_id))
+    bump_calendar_versions(set(shared.scalars()) | {owner_id})
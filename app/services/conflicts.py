@@ -0,0 +1,219 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import timedelta
+
+from flask import current_app
+from app import db
+from app.models import Event, User
+from app.services.recurrence import series_occurrences
+
+
+class OwnerIntervalIndex:
+    """Events of one owner kept as parallel arrays sorted by (start_time, id).
+
+    ``max_span`` is the longest duration seen, so an overlap query only has to
+    scan starts inside ``[start - max_span, end)``. Recurring series are kept
+    apart and expanded lazily over the query window only.
+    """
+
+    def __init__(self, rows, version=0):
+        self.version = version
+        self.recurring = {
+            event_id: (start, end, pattern) for event_id, start, end, pattern in rows if pattern
+        }
+        rows = sorted((r for r in rows if not r[3]), key=lambda r: (r[1], r[0]))
+        self.keys = [(start, event_id) for event_id, start, _, _ in rows]
+        self.ends = [end for _, _, end, _ in rows]
+        self.spans = {event_id: (start, end) for event_id, start, end, _ in rows}
+        self.max_span = max((end - start for _, start, end, _ in rows), default=timedelta(0))
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.keys) + len(self.recurring)
+
+    def add(self, event_id, start, end, pattern=None):
+        self.remove(event_id)
+        if pattern:
+            self.recurring[event_id] = (start, end, pattern)
+            return
+        pos = bisect_left(self.keys, (start, event_id))
+        self.keys.insert(pos, (start, event_id))
+        self.ends.insert(pos, end)
+        self.spans[event_id] = (start, end)
+        if end - start > self.max_span:
+            self.max_span = end - start
+
+    def remove(self, event_id):
+        self.recurring.pop(event_id, None)
+        span = self.spans.pop(event_id, None)
+        if span is None:
+            return
+        pos = bisect_left(self.keys, (span[0], event_id))
+        del self.keys[pos]
+        del self.ends[pos]
+
+    def overlapping(self, start, end, exclude_event_id=None):
+        return self.overlapping_single(start, end, exclude_event_id) + \
+            overlapping_series(self.recurring.items(), start, end, exclude_event_id)
+
+    def overlapping_single(self, start, end, exclude_event_id=None):
+        lo = bisect_left(self.keys, (start - self.max_span,))
+        hi = bisect_left(self.keys, (end,))
+        return [
+            self.keys[i][1] for i in range(lo, hi)
+            if self.ends[i] > start and self.keys[i][1] != exclude_event_id
+        ]
+
+
+def overlapping_series(series, start, end, exclude_event_id=None):
+    """Ids among ``(event_id, (start, end, pattern))`` with an occurrence in ``[start, end)``."""
+    return [
+        event_id for event_id, (series_start, series_end, pattern) in series
+        if event_id != exclude_event_id and series_start < end
+        and next(series_occurrences(series_start, series_end, pattern, start, end), None)
+    ]
+
+
+class ConflictIndex:
+    """Per-owner interval indexes, loaded lazily and kept in step with writes.
+
+    Each process holds its own copy, tagged with the owner's
+    ``calendar_version`` at load time. Every write to an owner's events, on
+    any worker, bumps that counter, so each lookup reads it (one primary-key
+    query) and reloads the index when it moved. A write made through this
+    worker updates the index in place and moves its tag along when no other
+    write came in between. ``CONFLICT_INDEX_TTL`` only bounds how long an
+    unchanged index is kept.
+    """
+
+    def __init__(self):
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(owner_id):
+        return db.session.query(User.calendar_version).filter(User.id == owner_id).scalar() or 0
+
+    def _get(self, owner_id):
+        config = current_app.config
+        version = self._version(owner_id)
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is not None and index.version == version and \
+                    time.monotonic() - index.loaded_at < config["CONFLICT_INDEX_TTL"]:
+                self._owners.move_to_end(owner_id)
+                return index
+
+        # Rows are read after the version, so a write committed in between
+        # leaves the index tagged older than its contents and it is reloaded.
+        rows = db.session.query(
+            Event.id, Event.start_time, Event.end_time, Event.is_recurring, Event.recurrence_pattern
+        ).filter(Event.owner_id == owner_id).all()
+        index = OwnerIntervalIndex([
+            (event_id, start, end, pattern if is_recurring else None)
+            for event_id, start, end, is_recurring, pattern in rows
+        ], version)
+
+        with self._lock:
+            current = self._owners.get(owner_id)
+            if current is not None and current.version > version:
+                # Another thread installed a newer load meanwhile; keep it.
+                return current
+            self._owners[owner_id] = index
+            self._owners.move_to_end(owner_id)
+            while len(self._owners) > config["CONFLICT_INDEX_MAX_OWNERS"]:
+                self._owners.popitem(last=False)
+        return index
+
+    def find(self, owner_id, start, end, exclude_event_id=None):
+        index = self._get(owner_id)
+        with self._lock:
+            found = index.overlapping_single(start, end, exclude_event_id)
+            series = list(index.recurring.items())
+        # Expanding series can be slow; other owners' checks need not wait.
+        return found + overlapping_series(series, start, end, exclude_event_id)
+
+    def _apply(self, owner_id, change):
+        """Apply ``change`` to the owner's index after a committed write."""
+        with self._lock:
+            if owner_id not in self._owners:
+                return
+        version = self._version(owner_id)
+        with self._lock:
+            index = self._owners.get(owner_id)
+            if index is None:
+                return
+            change(index)
+            # The write bumped the counter once; one step past the tag means
+            # it was the only write since the load.
+            if index.version == version - 1:
+                index.version = version
+
+    def record(self, event):
+        row = (event.id, naive(event.start_time), naive(event.end_time),
+               event.recurrence_pattern if event.is_recurring else None)
+        self._apply(event.owner_id, lambda index: index.add(*row))
+
+    def record_many(self, owner_id, rows):
+        def add_all(index):
+            for event_id, start, end, pattern in rows:
+                index.add(event_id, start, end, pattern)
+        self._apply(owner_id, add_all)
+
+    def discard(self, owner_id, event_id):
+        self._apply(owner_id, lambda index: index.remove(event_id))
+
+    def clear(self):
+        with self._lock:
+            self._owners.clear()
+
+
+conflict_index = ConflictIndex()
+
+
+def naive(value):
+    # Event times are stored as naive wall-clock datetimes.
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+def find_conflicting_ids(owner_id, start, end, exclude_event_id=None, recurrence_pattern=None):
+    """Ids of the owner's events overlapping ``[start, end)``.
+
+    With ``recurrence_pattern`` the candidate is itself a series and each of
+    its occurrences within ``RECURRENCE_CONFLICT_HORIZON_DAYS`` is checked.
+    """
+    start, end = naive(start), naive(end)
+    if not recurrence_pattern:
+        return _find(owner_id, start, end, exclude_event_id)
+
+    horizon = start + timedelta(days=current_app.config["RECURRENCE_CONFLICT_HORIZON_DAYS"])
+    found = {}
+    for occurrence_start, occurrence_end in series_occurrences(start, end, recurrence_pattern, None, horizon):
+        for event_id in _find(owner_id, occurrence_start, occurrence_end, exclude_event_id):
+            found.setdefault(event_id, None)
+    return list(found)
+
+
+def _find(owner_id, start, end, exclude_event_id):
+    if current_app.config["CONFLICT_INDEX_ENABLED"]:
+        return conflict_index.find(owner_id, start, end, exclude_event_id)
+
+    query = db.session.query(Event.id).filter(
+        Event.owner_id == owner_id,
+        Event.is_recurring.isnot(True),
+        Event.start_time < end,
+        Event.end_time > start
+    )
+    if exclude_event_id:
+        query = query.filter(Event.id != exclude_event_id)
+    found = [event_id for (event_id,) in query.all()]
+
+    series = db.session.query(Event.id, Event.start_time, Event.end_time, Event.recurrence_pattern).filter(
+        Event.owner_id == owner_id,
+        Event.is_recurring.is_(True),
+        Event.start_time < end
+    )
+    series = [(event_id, (series_start, series_end, pattern)) for event_id, series_start, series_end, pattern in series]
+    return found + overlapping_series(series, start, end, exclude_event_id)
@@ -0,0 +1,58 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import bcrypt
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; callers answer 503."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool.
+
+    At most AUTH_HASH_WORKERS hashes run at once and AUTH_HASH_QUEUE_SIZE more
+    may wait; a request that cannot get a slot within AUTH_HASH_QUEUE_TIMEOUT
+    seconds is refused instead of piling onto the workers. Setting
+    AUTH_HASH_WORKERS to 0 hashes inline on the request thread.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._queue_timeout = None
+
+    def init_app(self, app):
+        workers = app.config["AUTH_HASH_WORKERS"]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if workers > 0:
+            queue_size = app.config["AUTH_HASH_QUEUE_SIZE"]
+            if queue_size is None:
+                queue_size = workers * 4
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+            self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._queue_timeout = app.config["AUTH_HASH_QUEUE_TIMEOUT"]
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self._queue_timeout):
+            raise HashingBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def generate(self, password):
+        return self._run(bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def check(self, pw_hash, password):
+        return self._run(bcrypt.check_password_hash, pw_hash, password)
+
+
+password_hasher = PasswordHasher()
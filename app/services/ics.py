@@ -0,0 +1,228 @@
+import re
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.models import IST
+from app.services.recurrence import is_valid_pattern, parse_rule
+
+PRODID = "-//Event Scheduler//EN"
+TZID = "Asia/Kolkata"
+LOCAL_FORMAT = "%Y%m%dT%H%M%S"
+DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+CALENDAR_HEADER = "\r\n".join((
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    f"PRODID:{PRODID}",
+    "CALSCALE:GREGORIAN",
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TZID}",
+    "BEGIN:STANDARD",
+    "DTSTART:19700101T000000",
+    "TZOFFSETFROM:+0530",
+    "TZOFFSETTO:+0530",
+    "TZNAME:IST",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)) + "\r\n"
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+
+def escape_text(value):
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def unescape_text(value):
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def fold(line):
+    """Fold a content line into 75-octet pieces without splitting characters."""
+    if len(line.encode()) <= 75:
+        return line + "\r\n"
+    pieces, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (75 if not pieces else 74):
+            pieces.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    pieces.append("".join(current))
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def utc_stamp(value):
+    # IST has had a fixed offset since 1945, so no zone lookup is needed.
+    return (value - IST_OFFSET).strftime(LOCAL_FORMAT) + "Z"
+
+
+def vevent(row):
+    """One VEVENT for an event row; times are stored as IST wall clock."""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{row.id}@event-scheduler",
+        f"DTSTAMP:{utc_stamp(row.updated_at)}",
+        f"CREATED:{utc_stamp(row.created_at)}",
+        f"LAST-MODIFIED:{utc_stamp(row.updated_at)}",
+        f"DTSTART;TZID={TZID}:{row.start_time.strftime(LOCAL_FORMAT)}",
+        f"DTEND;TZID={TZID}:{row.end_time.strftime(LOCAL_FORMAT)}",
+        "SUMMARY:" + escape_text(row.title),
+    ]
+    if row.description:
+        lines.append("DESCRIPTION:" + escape_text(row.description))
+    if row.location:
+        lines.append("LOCATION:" + escape_text(row.location))
+    if row.is_recurring and row.recurrence_pattern and is_valid_pattern(row.recurrence_pattern):
+        rule = parse_rule(row.recurrence_pattern)
+        rrule = rule.to_rrule()
+        if rule.until is not None:
+            # UNTIL has to be UTC when DTSTART carries a TZID.
+            rrule = rrule.replace(f"UNTIL={rule.until.strftime(LOCAL_FORMAT)}", f"UNTIL={utc_stamp(rule.until)}")
+        lines.append("RRULE:" + rrule)
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def export_calendar(rows):
+    yield CALENDAR_HEADER
+    for row in rows:
+        yield vevent(row)
+    yield CALENDAR_FOOTER
+
+
+def unfold(raw_lines):
+    """Yield logical content lines from an iterable of raw byte lines."""
+    pending = None
+    for raw in raw_lines:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def parse_line(line):
+    """Split ``NAME;PARAM=VALUE:text`` into ``(name, params, text)``."""
+    quoted = False
+    for pos, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            head, value = line[:pos], line[pos + 1:]
+            break
+    else:
+        return None, {}, line
+    name, *raw_params = head.split(";")
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def parse_datetime(value, params):
+    """Return ``(naive IST datetime, is_date)`` for a DTSTART/DTEND value."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d"), True
+    moment = datetime.strptime(value.rstrip("Z"), LOCAL_FORMAT)
+    if value.endswith("Z"):
+        return pytz.utc.localize(moment).astimezone(IST).replace(tzinfo=None), False
+    if params.get("TZID"):
+        try:
+            zone = pytz.timezone(params["TZID"])
+        except pytz.UnknownTimeZoneError:
+            return moment, False  # unknown zones are taken as local wall clock
+        return zone.localize(moment).astimezone(IST).replace(tzinfo=None), False
+    return moment, False
+
+
+def parse_duration(value):
+    match = DURATION.match(value.strip())
+    if not match or not any(match.groups()[1:]):
+        raise ValueError(f"invalid DURATION {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == "-" else duration
+
+
+def normalize_rrule(value):
+    """Fit an RRULE to what the scheduler stores.
+
+    WKST only matters for rules we do not support and is dropped; a UTC
+    UNTIL is converted to IST wall clock like every other stored time.
+    """
+    parts = []
+    for part in value.split(";"):
+        key, _, part_value = part.partition("=")
+        key = key.strip().upper()
+        if key == "WKST" or not key:
+            continue
+        if key == "UNTIL" and part_value.endswith("Z") and "T" in part_value:
+            part_value = parse_datetime(part_value, {})[0].strftime(LOCAL_FORMAT)
+        parts.append(f"{key}={part_value}")
+    return ";".join(parts)
+
+
+def vevent_entry(props):
+    """Turn collected VEVENT properties into a batch-style event dict."""
+    start, start_is_date = parse_datetime(*props["DTSTART"])
+    if "DTEND" in props:
+        end = parse_datetime(*props["DTEND"])[0]
+    elif "DURATION" in props:
+        end = start + parse_duration(props["DURATION"][0])
+    else:
+        end = start + timedelta(days=1) if start_is_date else start
+    entry = {
+        "title": unescape_text(props["SUMMARY"][0]) if "SUMMARY" in props else "",
+        "description": unescape_text(props["DESCRIPTION"][0]) if "DESCRIPTION" in props else None,
+        "location": unescape_text(props["LOCATION"][0]) if "LOCATION" in props else None,
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+    }
+    if "RRULE" in props:
+        entry["is_recurring"] = True
+        entry["recurrence_pattern"] = normalize_rrule(props["RRULE"][0])
+    return entry
+
+
+def parse_calendar(raw_lines):
+    """Yield ``(position, entry, errors)`` for each VEVENT, reading lazily.
+
+    Properties of components nested in a VEVENT (VALARM, ...) are ignored.
+    """
+    stack = []
+    props = None
+    position = 0
+    for line in unfold(raw_lines):
+        name, params, value = parse_line(line)
+        if name == "BEGIN":
+            stack.append(value.strip().upper())
+            if stack[-1] == "VEVENT":
+                props = {}
+            continue
+        if name == "END":
+            component = stack.pop() if stack else None
+            if component == "VEVENT" and props is not None:
+                if "DTSTART" not in props:
+                    yield position, None, ["Missing DTSTART"]
+                else:
+                    try:
+                        yield position, vevent_entry(props), []
+                    except ValueError as e:
+                        yield position, None, [f"Invalid VEVENT: {e}"]
+                props = None
+                position += 1
+            continue
+        if props is not None and stack and stack[-1] == "VEVENT" and name:
+            props.setdefault(name, (value, params))
@@ -0,0 +1,209 @@
+"""Statements behind ``GET /api/events``.
+
+They are built once here and executed by the Flask route on the regular
+session and by the ASGI read path on an async session.
+"""
+import base64
+from datetime import datetime
+
+from flask import json
+from sqlalchemy import and_, case, func, or_, select
+
+from app.models import Event, EventPermission, User
+from app.services.conditional import make_etag
+from app.services.recurrence import occurrence_cache
+
+# Read-only paths select these columns instead of loading Event objects;
+# datetimes are left to the JSON encoder.
+EVENT_COLUMNS = (
+    Event.id, Event.title, Event.description, Event.location, Event.is_recurring, Event.recurrence_pattern,
+    Event.created_at, Event.updated_at, Event.start_time, Event.end_time, Event.owner_id
+)
+EVENT_KEYS = tuple(column.key for column in EVENT_COLUMNS)
+# Keys of the rows of ``visible_events(user_id, *EVENT_COLUMNS)``.
+ROW_KEYS = EVENT_KEYS + ("permissions",)
+RESPONSE_FORMATS = ("objects", "columns")
+
+
+def visible_events(user_id, *columns):
+    """Owned or shared events with the caller's role resolved in the same
+    select, instead of one EventPermission lookup per row."""
+    role = case((Event.owner_id == user_id, "Owner"), else_=func.max(EventPermission.role)).label("role")
+    return select(*(columns or (Event,)), role).outerjoin(
+        EventPermission, and_(EventPermission.event_id == Event.id, EventPermission.user_id == user_id)
+    ).where(
+        or_(Event.owner_id == user_id, EventPermission.id.isnot(None))
+    ).group_by(Event.id)
+
+
+def encode_cursor(event):
+    raw = json.dumps([event.start_time.isoformat(), event.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    start, event_id = json.loads(raw)
+    return datetime.fromisoformat(start), int(event_id)
+
+
+def event_to_dict(event, user_role=None):
+    data = {key: getattr(event, key) for key in EVENT_KEYS}
+    data["permissions"] = user_role or "None"
+    return data
+
+
+class EventListing:
+    """One page of the caller's events for the query arguments ``args``.
+
+    Methods that build statements raise ``ValueError`` with the message for
+    a 400 response when an argument is invalid.
+    """
+
+    def __init__(self, user_id, args, max_per_page):
+        self.user_id = user_id
+        self.args = args
+        self.max_per_page = max_per_page
+        self.page, self.per_page = 1, 10
+        self.cursor = args.get('cursor')
+        self.include_total = args.get('include_total', 'true').lower() != 'false'
+        self.format = args.get('format', 'objects')
+        self.window_start = self.window_end = None
+
+    def calendar_version_statement(self):
+        return select(User.calendar_version).where(User.id == self.user_id)
+
+    def etag(self, calendar_version, query_string):
+        # Any write visible to this user bumps calendar_version, so it and the
+        # query string identify the response before anything is loaded.
+        return make_etag("events", self.user_id, calendar_version, query_string)
+
+    def statement(self):
+        """Visible events matching the filters, unordered."""
+        if self.format not in RESPONSE_FORMATS:
+            raise ValueError(f"Invalid format; use one of {', '.join(RESPONSE_FORMATS)}")
+        try:
+            page = int(self.args.get('page', 1))
+            per_page = int(self.args.get('per_page', 10))
+        except ValueError:
+            raise ValueError("page and per_page must be integers")
+        self.page, self.per_page = max(page, 1), min(max(per_page, 1), self.max_per_page)
+        query = visible_events(self.user_id, *EVENT_COLUMNS)
+        start_filter = self.args.get('start_time')
+        end_filter = self.args.get('end_time')
+        owner_filter = self.args.get('owner_id')
+        is_recurring_filter = self.args.get('is_recurring')
+
+        try:
+            self.window_start = datetime.fromisoformat(start_filter) if start_filter else None
+            self.window_end = datetime.fromisoformat(end_filter) if end_filter else None
+        except Exception:
+            raise ValueError("Invalid start_time or end_time filter")
+
+        # Single events must lie inside the window; recurring series are kept if
+        # they start before its end, and those without an occurrence in it are
+        # dropped by ``without_empty_series``.
+        if self.window_start or self.window_end:
+            single = []
+            if self.window_start:
+                single.append(Event.start_time >= self.window_start)
+            if self.window_end:
+                single.append(Event.end_time <= self.window_end)
+            series = [Event.is_recurring.is_(True)]
+            if self.window_end:
+                series.append(Event.start_time < self.window_end)
+            query = query.where(or_(and_(Event.is_recurring.isnot(True), *single), and_(*series)))
+
+        if owner_filter:
+            try:
+                query = query.where(Event.owner_id == int(owner_filter))
+            except ValueError:
+                raise ValueError("Invalid owner_id")
+
+        if is_recurring_filter:
+            if is_recurring_filter.lower() == "true":
+                query = query.where(Event.is_recurring.is_(True))
+            elif is_recurring_filter.lower() == "false":
+                query = query.where(Event.is_recurring.is_(False))
+            else:
+                raise ValueError("Invalid is_recurring filter")
+        return query
+
+    def series_statement(self, query):
+        """Recurring series in ``query`` to expand before paginating, or None
+        without a window."""
+        if not (self.window_start or self.window_end):
+            return None
+        return query.where(Event.is_recurring.is_(True)).with_only_columns(
+            Event.id, Event.is_recurring, Event.recurrence_pattern, Event.start_time, Event.end_time
+        )
+
+    def without_empty_series(self, query, series_rows, max_occurrences):
+        """``query`` without the series of ``series_statement`` that have no
+        occurrence in the window, so pages, total and cursor agree."""
+        empty = [
+            row.id for row in series_rows
+            if not occurrence_cache.occurrences(row, self.window_start, self.window_end, max_occurrences)
+        ]
+        return query.where(Event.id.notin_(empty)) if empty else query
+
+    def count_statement(self, query):
+        return select(func.count()).select_from(query.order_by(None).subquery())
+
+    def page_statement(self, query):
+        ordered = query.order_by(Event.start_time.asc(), Event.id.asc())
+        if self.cursor is None:
+            return ordered.limit(self.per_page).offset((self.page - 1) * self.per_page)
+        if self.cursor:
+            try:
+                after_start, after_id = decode_cursor(self.cursor)
+            except Exception:
+                raise ValueError("Invalid cursor")
+            ordered = ordered.where(or_(
+                Event.start_time > after_start,
+                and_(Event.start_time == after_start, Event.id > after_id)
+            ))
+        return ordered.limit(self.per_page + 1)
+
+    def response(self, rows, total, max_occurrences):
+        """The response body for the rows of ``page_statement``.
+
+        ``format=columns`` lists the keys once under ``columns`` and each
+        event as an array under ``rows``, for clients fetching many pages.
+        """
+        next_cursor = None
+        if self.cursor is not None:
+            next_cursor = encode_cursor(rows[self.per_page - 1]) if len(rows) > self.per_page else None
+            rows = rows[:self.per_page]
+
+        events = []
+        windowed = self.window_start or self.window_end
+        columnar = self.format == "columns"
+        for row in rows:
+            occurrences = None
+            if row.is_recurring and windowed:
+                occurrences = occurrence_cache.occurrences(row, self.window_start, self.window_end, max_occurrences)
+            if columnar:
+                values = list(row)
+                if windowed:
+                    values.append([[start, end] for start, end in occurrences] if occurrences else None)
+                events.append(values)
+                continue
+            data = dict(zip(ROW_KEYS, row))
+            if occurrences:
+                data["occurrences"] = [{"start_time": start, "end_time": end} for start, end in occurrences]
+            events.append(data)
+
+        response = {"per_page": self.per_page}
+        if columnar:
+            response["columns"] = list(ROW_KEYS) + (["occurrences"] if windowed else [])
+            response["rows"] = events
+        else:
+            response["events"] = events
+        if self.cursor is not None:
+            response["next_cursor"] = next_cursor
+        else:
+            response["page"] = self.page
+        if self.include_total:
+            response["total"] = total
+        return response
@@ -0,0 +1,305 @@
+import cProfile
+import collections
+import functools
+import inspect
+import os
+import random
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+INF = 'le="+Inf"'
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._le = [f'le="{bound}"' for bound in self.buckets]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for le, bucket in zip(self._le, counts):
+                cumulative += bucket
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, [le])} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labels, label_values, [INF])} {count}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """Register ``fn() -> [(name, kind, documentation, [(labels, value)])]`` read at scrape time."""
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in self.collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route.", ("method", "route", "status"))
+request_queries = registry.histogram(
+    "http_request_sql_queries", "SQL statements executed per request.", ("method", "route"), QUERY_BUCKETS)
+request_sql_seconds = registry.histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL per request.", ("method", "route"))
+socket_seconds = registry.histogram(
+    "socketio_handler_duration_seconds", "Time spent in Socket.IO event handlers.", ("event",))
+socket_queries = registry.histogram(
+    "socketio_handler_sql_queries", "SQL statements executed per Socket.IO event.", ("event",), QUERY_BUCKETS)
+n_plus_one = registry.counter(
+    "sql_n_plus_one_total", "Requests that ran one statement more times than SQL_N_PLUS_ONE_THRESHOLD.",
+    ("route",))
+profiles_written = registry.counter(
+    "profiles_written_total", "cProfile dumps written for slow sampled requests.", ("route",))
+
+
+class QueryScope:
+    """SQL statements run while handling one request or socket event."""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = collections.Counter()
+
+    def repeated(self, threshold):
+        """Statements run more than ``threshold`` times, most frequent first."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+
+_scope = ContextVar("query_scope", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _scope.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    scope = _scope.get()
+    started = conn.info.get("query_started")
+    if scope is None or not started:
+        return
+    scope.count += 1
+    scope.seconds += time.perf_counter() - started.pop()
+    scope.statements[statement] += 1
+
+
+class Instrumentation:
+    """Request and Socket.IO handler timing with per-scope SQL accounting.
+
+    Every request records its latency, statement count and SQL time by route
+    template. A request that runs the same statement more than
+    SQL_N_PLUS_ONE_THRESHOLD times is counted and logged as a likely N+1.
+    With METRICS_PROFILE_SAMPLE_RATE above zero, that fraction of requests
+    runs under cProfile and the ones slower than METRICS_SLOW_REQUEST_SECONDS
+    are dumped to METRICS_PROFILE_DIR. Streaming responses are timed up to
+    the point their body starts.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        if not app.config["METRICS_ENABLED"]:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        _scope.set(QueryScope())
+        g.metrics_profile = None
+        if random.random() < self.app.config["METRICS_PROFILE_SAMPLE_RATE"]:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active on this thread
+                return
+            g.metrics_profile = profile
+
+    def _after_request(self, response):
+        started = g.pop("metrics_started", None)
+        scope = _scope.get()
+        if started is None or scope is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+
+        request_seconds.observe(elapsed, request.method, route, str(response.status_code))
+        request_queries.observe(scope.count, request.method, route)
+        request_sql_seconds.observe(scope.seconds, request.method, route)
+        self._check_repeats(scope, route)
+        self._dump_profile(g.pop("metrics_profile", None), elapsed, route)
+
+        timing = f"db;dur={scope.seconds * 1000:.2f};desc=\"{scope.count} queries\", app;dur={elapsed * 1000:.2f}"
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+        return response
+
+    def _teardown_request(self, error=None):
+        profile = g.pop("metrics_profile", None)
+        if profile is not None:
+            profile.disable()
+        _scope.set(None)
+
+    def _check_repeats(self, scope, route):
+        repeated = scope.repeated(self.app.config["SQL_N_PLUS_ONE_THRESHOLD"])
+        if repeated:
+            n_plus_one.inc(route)
+            statement, count = repeated[0]
+            self.app.logger.warning("Possible N+1 on %s %s: %d runs of %s",
+                                    request.method, route, count, " ".join(statement.split())[:300])
+
+    def _dump_profile(self, profile, elapsed, route):
+        if profile is None:
+            return
+        profile.disable()
+        if elapsed < self.app.config["METRICS_SLOW_REQUEST_SECONDS"]:
+            return
+        directory = self.app.config["METRICS_PROFILE_DIR"] or os.path.join(tempfile.gettempdir(), "event_scheduler_profiles")
+        os.makedirs(directory, exist_ok=True)
+        name = request.endpoint or "unmatched"
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}-{int(elapsed * 1000)}ms.prof")
+        profile.dump_stats(path)
+        profiles_written.inc(route)
+        self.app.logger.info("Profiled slow request %s %s (%.0f ms) to %s", request.method, route, elapsed * 1000, path)
+
+    def socket_handler(self, name):
+        """Decorator timing a Socket.IO handler and its SQL under ``name``.
+
+        Coroutine handlers (the ASGI mode's server) get a coroutine wrapper.
+        """
+        def enabled():
+            # Handlers called from other handlers count toward the outer one.
+            return self.app is not None and self.app.config["METRICS_ENABLED"] and _scope.get() is None
+
+        def finish(scope, token, started):
+            socket_seconds.observe(time.perf_counter() - started, name)
+            socket_queries.observe(scope.count, name)
+            _scope.reset(token)
+
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not enabled():
+                        return await fn(*args, **kwargs)
+                    scope = QueryScope()
+                    token, started = _scope.set(scope), time.perf_counter()
+                    try:
+                        return await fn(*args, **kwargs)
+                    finally:
+                        finish(scope, token, started)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not enabled():
+                    return fn(*args, **kwargs)
+                scope = QueryScope()
+                token, started = _scope.set(scope), time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    finish(scope, token, started)
+            return wrapper
+        return decorate
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,262 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from math import gcd
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+UNTIL_FORMATS = ("%Y%m%dT%H%M%S", "%Y%m%d")
+# The Gregorian calendar repeats every 400 years.
+CALENDAR_CYCLE_MONTHS = 400 * 12
+
+
+class RecurrenceRule:
+    """The subset of an RFC 5545 RRULE the scheduler understands."""
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+
+    def to_rrule(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.strftime(UNTIL_FORMATS[0])}")
+        if self.byday:
+            names = {v: k for k, v in WEEKDAYS.items()}
+            parts.append("BYDAY=" + ",".join(names[d] for d in self.byday))
+        return ";".join(parts)
+
+
+def parse_rule(pattern):
+    """Parse ``FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10`` (or ``daily``/``weekly``/...).
+
+    Raises ValueError for anything that cannot be expanded.
+    """
+    if not pattern or not pattern.strip():
+        raise ValueError("empty recurrence pattern")
+    text = pattern.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    if text.upper() in FREQUENCIES:
+        return RecurrenceRule(text.upper())
+
+    parts = {}
+    for part in text.split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"invalid rule part {part!r}")
+        parts[key.strip().upper()] = value.strip()
+
+    freq = parts.pop("FREQ", "").upper()
+    if freq not in FREQUENCIES:
+        raise ValueError("FREQ must be one of " + ", ".join(FREQUENCIES))
+    rule = RecurrenceRule(freq)
+    if "INTERVAL" in parts:
+        rule.interval = int(parts.pop("INTERVAL"))
+        if rule.interval < 1:
+            raise ValueError("INTERVAL must be positive")
+    if "COUNT" in parts:
+        rule.count = int(parts.pop("COUNT"))
+        if rule.count < 1:
+            raise ValueError("COUNT must be positive")
+    if "UNTIL" in parts:
+        rule.until = _parse_until(parts.pop("UNTIL"))
+    if "BYDAY" in parts:
+        try:
+            rule.byday = sorted({WEEKDAYS[day.strip().upper()] for day in parts.pop("BYDAY").split(",")})
+        except KeyError as e:
+            raise ValueError(f"invalid BYDAY value {e.args[0]!r}")
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+    if parts:
+        raise ValueError("unsupported rule parts: " + ", ".join(sorted(parts)))
+    return rule
+
+
+def _parse_until(value):
+    value = value.rstrip("Z")
+    for fmt in UNTIL_FORMATS:
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return until if fmt != "%Y%m%d" else until.replace(hour=23, minute=59, second=59)
+    raise ValueError(f"invalid UNTIL value {value!r}")
+
+
+def is_valid_pattern(pattern):
+    try:
+        parse_rule(pattern)
+    except ValueError:
+        return False
+    return True
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    try:
+        return value.replace(year=year, month=month % 12 + 1)
+    except ValueError:
+        return None  # e.g. the 31st in a 30-day month: RFC 5545 skips it
+
+
+def _candidates(start, rule, window_start):
+    """Yield ``(index, occurrence_start)`` in order, skipping ahead to the window.
+
+    ``index`` is the zero-based position in the full series and is what COUNT
+    is checked against.
+    """
+    if rule.freq in ("DAILY", "WEEKLY") and not rule.byday:
+        step = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+        k = max(0, (window_start - start) // step) if window_start is not None else 0
+        while True:
+            yield k, start + k * step
+            k += 1
+
+    elif rule.freq == "WEEKLY":
+        week_start = start - timedelta(days=start.weekday())
+        first_week = [d for d in rule.byday if d >= start.weekday()]
+        step = timedelta(weeks=rule.interval)
+        k = max(0, (window_start - week_start) // step) if window_start is not None else 0
+        while True:
+            days = first_week if k == 0 else rule.byday
+            base = len(first_week) + (k - 1) * len(rule.byday) if k else 0
+            for pos, day in enumerate(days):
+                yield base + pos, week_start + k * step + timedelta(days=day)
+            k += 1
+
+    else:
+        months = rule.interval * (12 if rule.freq == "YEARLY" else 1)
+        k = 0
+        if window_start is not None and window_start > start:
+            elapsed = (window_start.year - start.year) * 12 + window_start.month - start.month
+            k = max(0, elapsed // months - 1)
+        index, first = _real_dates(start, months, k), k
+        while True:
+            occurrence = _add_months(start, k * months)
+            if occurrence is not None:
+                yield index, occurrence
+                index += 1
+            k += 1
+            if k > first + 12 * 10000:
+                return
+
+
+def _real_dates(start, months, steps):
+    """How many of the first ``steps`` steps of ``months`` from ``start`` land on a real date."""
+    if start.day <= 28:
+        return steps
+    counts = _real_date_counts(start.year % 400, start.month, start.day, months)
+    cycles, rest = divmod(steps, len(counts) - 1)
+    return cycles * counts[-1] + counts[rest]
+
+
+@lru_cache(maxsize=256)
+def _real_date_counts(year, month, day, months):
+    """Running count of real dates over one calendar cycle of steps."""
+    start = datetime(year or 400, month, day)
+    counts = [0]
+    for i in range(CALENDAR_CYCLE_MONTHS // gcd(months, CALENDAR_CYCLE_MONTHS)):
+        counts.append(counts[-1] + (_add_months(start, i * months) is not None))
+    return counts
+
+
+def iter_occurrences(start, end, rule, window_start=None, window_end=None):
+    """Lazily yield ``(start, end)`` of each occurrence overlapping the window.
+
+    Either bound may be None for an open window. Periods before the window
+    are skipped arithmetically rather than iterated.
+    """
+    duration = end - start
+    lookback = window_start - duration if window_start is not None else None
+    for index, occurrence in _candidates(start, rule, lookback):
+        if rule.count is not None and index >= rule.count:
+            return
+        if rule.until is not None and occurrence > rule.until:
+            return
+        if window_end is not None and occurrence >= window_end:
+            return
+        if window_start is not None and occurrence + duration <= window_start:
+            continue
+        yield occurrence, occurrence + duration
+
+
+def series_occurrences(start, end, pattern, window_start=None, window_end=None):
+    rule = None
+    if pattern:
+        try:
+            rule = parse_rule(pattern)
+        except ValueError:
+            pass  # legacy free-form patterns are treated as a single occurrence
+    if rule is None:
+        if (window_end is None or start < window_end) and (window_start is None or end > window_start):
+            yield start, end
+        return
+    yield from iter_occurrences(start, end, rule, window_start, window_end)
+
+
+def event_occurrences(event, window_start=None, window_end=None):
+    pattern = event.recurrence_pattern if event.is_recurring else None
+    return series_occurrences(event.start_time, event.end_time, pattern, window_start, window_end)
+
+
+class OccurrenceCache:
+    """Expanded occurrences per (event, window), bounded by number of events.
+
+    Entries carry the series definition they were expanded from, so a stale
+    entry left behind by another worker's update is recomputed rather than
+    served.
+    """
+
+    def __init__(self, max_events=2048, max_windows=8):
+        self.max_events = max_events
+        self.max_windows = max_windows
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def occurrences(self, event, window_start, window_end, limit):
+        signature = (event.start_time, event.end_time, event.recurrence_pattern)
+        key = (window_start, window_end, limit)
+        with self._lock:
+            entry = self._events.get(event.id)
+            if entry is not None and entry[0] == signature and key in entry[1]:
+                self._events.move_to_end(event.id)
+                return entry[1][key]
+
+        result = tuple(islice(event_occurrences(event, window_start, window_end), limit))
+
+        with self._lock:
+            entry = self._events.get(event.id)
+            if entry is None or entry[0] != signature:
+                entry = (signature, OrderedDict())
+                self._events[event.id] = entry
+            entry[1][key] = result
+            while len(entry[1]) > self.max_windows:
+                entry[1].popitem(last=False)
+            self._events.move_to_end(event.id)
+            while len(self._events) > self.max_events:
+                self._events.popitem(last=False)
+        return result
+
+    def invalidate(self, event_id):
+        with self._lock:
+            self._events.pop(event_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+occurrence_cache = OccurrenceCache()
@@ -0,0 +1,122 @@
+"""Connection pools and read-replica routing.
+
+With SQLALCHEMY_REPLICA_URI set, the queries of views decorated with
+``replica_reads`` go to the ``replica`` bind unless the caller wrote within
+the last REPLICA_STICKY_SECONDS, so users always read their own writes.
+Everything else, including the JWT and blocklist checks that run before
+the view, stays on the primary. Flushes and statements that modify data
+are never routed to the replica.
+"""
+import functools
+
+import sqlalchemy as sa
+from flask import g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+
+REPLICA = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _in_memory_sqlite(url):
+    url = sa.engine.make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url, config):
+    """Pool settings from the DB_POOL_* config for the engine at ``url``."""
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"], "pool_recycle": config["DB_POOL_RECYCLE"]}
+    # In-memory SQLite uses one shared connection without a sized pool.
+    if not _in_memory_sqlite(url):
+        options.update(pool_size=config["DB_POOL_SIZE"], max_overflow=config["DB_MAX_OVERFLOW"],
+                       pool_timeout=config["DB_POOL_TIMEOUT"])
+    return options
+
+
+def configure_engines(app):
+    """Engine options and the replica bind; call before ``db.init_app``."""
+    config = app.config
+    if config["SQLALCHEMY_DATABASE_URI"]:
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **engine_options(config["SQLALCHEMY_DATABASE_URI"], config),
+            **config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        }
+    if config["SQLALCHEMY_REPLICA_URI"]:
+        binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+        binds[REPLICA] = {"url": config["SQLALCHEMY_REPLICA_URI"],
+                          **engine_options(config["SQLALCHEMY_REPLICA_URI"], config)}
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+def _identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:  # no token was verified for this request
+        return None
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica while a replica view runs."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get("db_replica")
+                and not isinstance(clause, sa.sql.dml.UpdateBase)):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Decides per request whether reads may use the replica.
+
+    A successful write request marks its user as sticky for
+    REPLICA_STICKY_SECONDS; the marks live in the same backend as the event
+    cache. A worker that cannot see the marks of the others would send a
+    user's next read to the replica, so startup requires a shared
+    EVENT_CACHE_URL unless REPLICA_STICKY_LOCAL declares a single process.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 0
+        self.marks = None
+
+    def init_app(self, app):
+        from app.services.cache import cache_backend
+
+        self.enabled = bool(app.config["SQLALCHEMY_REPLICA_URI"])
+        self.sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+        if not self.enabled:
+            return
+        if self.sticky_seconds > 0 and not app.config["EVENT_CACHE_URL"] and not app.config["REPLICA_STICKY_LOCAL"]:
+            raise ValueError("SQLALCHEMY_REPLICA_URI needs a shared EVENT_CACHE_URL for the sticky write marks; "
+                             "set REPLICA_STICKY_LOCAL=true if this is the only worker")
+        self.marks = cache_backend(app.config["EVENT_CACHE_URL"], app.config["EVENT_CACHE_SIZE"])
+        app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = _identity()
+            if user_id is not None and self.sticky_seconds > 0:
+                self.marks.set(f"sticky:{user_id}", True, self.sticky_seconds)
+        return response
+
+    def prefers_replica(self, user_id):
+        """True when ``user_id`` may read from the replica now."""
+        return self.enabled and (user_id is None or self.marks.get(f"sticky:{user_id}") is None)
+
+
+replica_router = ReplicaRouter()
+
+
+def replica_reads(fn):
+    """Route the queries of a read-only view to the replica.
+
+    Put it below ``jwt_required`` so token checks run on the primary first.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if replica_router.prefers_replica(_identity()):
+            g.db_replica = True
+        return fn(*args, **kwargs)
+    return wrapper
+
@@ -0,0 +1,165 @@
+import heapq
+import math
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from sqlalchemy import and_, or_, select, union, union_all
+
+from app import db
+from app.models import Event, EventPermission
+from app.services.recurrence import series_occurrences
+
+
+def unrelated_users(user_id, user_ids):
+    """Ids in ``user_ids``, other than ``user_id``, with no event in common with
+    ``user_id``; their calendars are not the caller's to see."""
+    others = set(user_ids) - {user_id}
+    if not others:
+        return []
+    shared = select(EventPermission.event_id).where(EventPermission.user_id == user_id)
+    common = or_(Event.owner_id == user_id, Event.id.in_(shared))
+    owners = select(Event.owner_id).where(common, Event.owner_id.in_(others))
+    members = select(EventPermission.user_id).join(
+        Event, Event.id == EventPermission.event_id
+    ).where(common, EventPermission.user_id.in_(others))
+    related = set(db.session.execute(union(owners, members)).scalars())
+    return sorted(others - related)
+
+
+def _busy_rows(user_ids, window_start, window_end):
+    in_window = or_(
+        and_(Event.is_recurring.isnot(True), Event.start_time < window_end, Event.end_time > window_start),
+        and_(Event.is_recurring.is_(True), Event.start_time < window_end)
+    )
+    columns = (Event.start_time, Event.end_time, Event.is_recurring, Event.recurrence_pattern)
+    owned = select(Event.owner_id.label("user_id"), *columns).where(Event.owner_id.in_(user_ids), in_window)
+    shared = select(EventPermission.user_id, *columns).join(
+        Event, Event.id == EventPermission.event_id
+    ).where(EventPermission.user_id.in_(user_ids), in_window)
+    return db.session.execute(union_all(owned, shared)).all()
+
+
+def busy_intervals(user_ids, window_start, window_end, batch_size=500):
+    """Unsorted ``(start, end)`` intervals per user, clipped to the window.
+
+    Covers events a user owns or has been shared, with recurring series
+    expanded over the window; one query per ``batch_size`` users.
+    """
+    intervals = {user_id: [] for user_id in user_ids}
+    ids = list(intervals)
+    for i in range(0, len(ids), batch_size):
+        for user_id, start, end, recurring, pattern in _busy_rows(ids[i:i + batch_size], window_start, window_end):
+            if not recurring:
+                # Already known to overlap the window.
+                intervals[user_id].append((max(start, window_start), min(end, window_end)))
+                continue
+            for occ_start, occ_end in series_occurrences(start, end, pattern, window_start, window_end):
+                occ_start, occ_end = max(occ_start, window_start), min(occ_end, window_end)
+                if occ_start < occ_end:
+                    intervals[user_id].append((occ_start, occ_end))
+    return intervals
+
+
+def iter_blocks(intervals):
+    """Merge ``(start, end)`` pairs sorted by start into disjoint blocks, lazily."""
+    current = None
+    for start, end in intervals:
+        if current is None:
+            current = (start, end)
+        elif start <= current[1]:
+            if end > current[1]:
+                current = (current[0], end)
+        else:
+            yield current
+            current = (start, end)
+    if current is not None:
+        yield current
+
+
+def sweep(intervals):
+    return list(iter_blocks(intervals))
+
+
+def merge_intervals(intervals):
+    return sweep(sorted(intervals))
+
+
+def merge_blocks(block_lists):
+    """Union of several already merged block lists.
+
+    Each list is a sorted run, which timsort merges in close to linear time.
+    """
+    return sweep(sorted(chain.from_iterable(block_lists)))
+
+
+def free_gaps(user_ids, window_start, window_end, batch_size=500, chunk=timedelta(days=7)):
+    """Yield the gaps in ``[window_start, window_end)`` where nobody is busy.
+
+    The window is searched chunk by chunk so a caller that stops early never
+    loads the rest of it. Per-user busy intervals are sorted and heap-merged
+    into one stream that is swept for gaps; a gap running into the next
+    chunk is joined with its continuation.
+    """
+    pending = None
+    chunk_start = window_start
+    while chunk_start < window_end:
+        chunk_end = min(chunk_start + chunk, window_end)
+        busy = busy_intervals(user_ids, chunk_start, chunk_end, batch_size)
+        free_from = chunk_start
+        gaps = []
+        for start, end in iter_blocks(heapq.merge(*(sorted(intervals) for intervals in busy.values()))):
+            if start > free_from:
+                gaps.append((free_from, start))
+            free_from = max(free_from, end)
+        if free_from < chunk_end:
+            gaps.append((free_from, chunk_end))
+        for gap in gaps:
+            if pending and pending[1] == gap[0]:
+                pending = (pending[0], gap[1])
+                continue
+            if pending:
+                yield pending
+            pending = gap
+        chunk_start = chunk_end
+    if pending:
+        yield pending
+
+
+def working_windows(start, end, hours=None, days=None):
+    """Parts of ``[start, end)`` inside working hours on working days.
+
+    ``hours`` is a ``(time, time)`` pair and ``days`` a set of weekdays
+    (Monday is 0); either may be None for no constraint.
+    """
+    if hours is None and days is None:
+        yield start, end
+        return
+    day = start.date()
+    while datetime.combine(day, time.min) < end:
+        if days is None or day.weekday() in days:
+            open_at = datetime.combine(day, hours[0] if hours else time.min)
+            close_at = datetime.combine(day, hours[1]) if hours else datetime.combine(day, time.min) + timedelta(days=1)
+            if max(open_at, start) < min(close_at, end):
+                yield max(open_at, start), min(close_at, end)
+        day += timedelta(days=1)
+
+
+def align(value, step):
+    """Round ``value`` up to the next multiple of ``step`` since midnight."""
+    midnight = datetime.combine(value.date(), time.min)
+    return midnight + step * math.ceil((value - midnight) / step)
+
+
+def find_slots(user_ids, duration, window_start, window_end, hours=None, days=None, limit=5,
+               step=timedelta(minutes=15), batch_size=500, chunk=timedelta(days=7)):
+    """The earliest ``limit`` slots of ``duration`` when every user is free."""
+    slots = []
+    for gap_start, gap_end in free_gaps(user_ids, window_start, window_end, batch_size, chunk):
+        for open_start, open_end in working_windows(gap_start, gap_end, hours, days):
+            slot_start = align(open_start, step)
+            while slot_start + duration <= open_end:
+                slots.append((slot_start, slot_start + duration))
+                if len(slots) >= limit:
+                    return slots
+                slot_start = align(slot_start + duration, step)
+    return slots
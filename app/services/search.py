@@ -0,0 +1,122 @@
+"""Full-text search over event title, description and location.
+
+The index belongs to the database, created by migration 0005: an FTS5
+table kept current by triggers on SQLite, a FULLTEXT index on
+MySQL/MariaDB and a GIN expression index on PostgreSQL. Every write path,
+batch imports and rollbacks included, therefore updates it without help
+from the routes. ``EventSearch`` matches, ranks and applies the caller's
+visibility in one statement.
+"""
+import re
+
+from sqlalchemy import Float, Integer, case, or_, select, text
+
+from app.models import Event, EventPermission, User
+from app.services.conditional import make_etag
+from app.services.listing import EVENT_COLUMNS, EVENT_KEYS
+
+SQLITE_TABLE = "events_fts"
+MYSQL_INDEX = "ft_events_search"
+POSTGRES_INDEX = "ix_events_search"
+# Title matches rank above location matches, and those above description.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+# (event_id, score) of the events matching :terms; higher scores rank first.
+MATCHES = {
+    # bm25 weights follow the column order: title, description, location.
+    "sqlite": f"SELECT rowid AS event_id, -bm25({SQLITE_TABLE}, 5.0, 1.0, 2.0) AS score "
+              f"FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH :terms",
+    "mysql": "SELECT id AS event_id, MATCH (title, description, location) AGAINST (:terms IN BOOLEAN MODE) AS score "
+             "FROM events WHERE MATCH (title, description, location) AGAINST (:terms IN BOOLEAN MODE)",
+    "postgresql": f"SELECT id AS event_id, ts_rank({POSTGRES_DOCUMENT}, to_tsquery('simple', :terms)) AS score "
+                  f"FROM events WHERE ({POSTGRES_DOCUMENT}) @@ to_tsquery('simple', :terms)",
+}
+MATCHES["mariadb"] = MATCHES["mysql"]
+
+TERM = re.compile(r"[^\W_]+")
+
+
+class SearchUnavailable(Exception):
+    """Raised for a database without a full-text index behind ``EventSearch``."""
+
+
+def search_terms(query, limit):
+    """Lower-cased words of ``query``, at most ``limit`` of them."""
+    return TERM.findall(query.lower())[:limit]
+
+
+def match_expression(dialect, terms):
+    """Every term, matched as a word prefix, in the dialect's query syntax."""
+    if dialect == "sqlite":
+        return " ".join(f'"{term}"*' for term in terms)
+    if dialect in ("mysql", "mariadb"):
+        return " ".join(f"+{term}*" for term in terms)
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+class EventSearch:
+    """One page of the caller's events matching ``q`` in the query ``args``.
+
+    ``statement`` raises ``ValueError`` with the message for a 400 response
+    when an argument is invalid.
+    """
+
+    def __init__(self, user_id, args, max_terms, max_per_page):
+        self.user_id = user_id
+        self.args = args
+        self.max_terms = max_terms
+        self.max_per_page = max_per_page
+
+    def calendar_version_statement(self):
+        return select(User.calendar_version).where(User.id == self.user_id)
+
+    def etag(self, calendar_version, query_string):
+        # The index changes only with writes, which bump calendar_version.
+        return make_etag("search", self.user_id, calendar_version, query_string)
+
+    def statement(self, dialect):
+        if dialect not in MATCHES:
+            raise SearchUnavailable(f"Full-text search is not available on {dialect}")
+        terms = search_terms(self.args.get('q', ''), self.max_terms)
+        if not terms:
+            raise ValueError("q must contain at least one word")
+        try:
+            page = int(self.args.get('page', 1))
+            per_page = int(self.args.get('per_page', 20))
+        except ValueError:
+            raise ValueError("page and per_page must be integers")
+        if page < 1 or not 1 <= per_page <= self.max_per_page:
+            raise ValueError(f"page must be positive and per_page between 1 and {self.max_per_page}")
+        self.page, self.per_page = page, per_page
+
+        matches = text(MATCHES[dialect]).bindparams(terms=match_expression(dialect, terms)).columns(
+            event_id=Integer, score=Float
+        ).subquery("matches")
+        # Visibility is checked per matching row rather than through the
+        # grouped join of visible_events: SQLite cannot rank inside an
+        # aggregate query.
+        shared = select(EventPermission.role).where(
+            EventPermission.event_id == Event.id, EventPermission.user_id == self.user_id
+        )
+        role = case((Event.owner_id == self.user_id, "Owner"), else_=shared.limit(1).scalar_subquery()).label("role")
+        return select(*EVENT_COLUMNS, matches.c.score, role).join(
+            matches, matches.c.event_id == Event.id
+        ).where(
+            or_(Event.owner_id == self.user_id, shared.exists())
+        ).order_by(
+            matches.c.score.desc(), Event.start_time.asc(), Event.id.asc()
+        ).limit(per_page).offset((page - 1) * per_page)
+
+    def response(self, rows):
+        """The response body for the rows of ``statement``."""
+        events = []
+        for row in rows:
+            data = dict(zip(EVENT_KEYS, row))
+            data["permissions"] = row.role
+            data["score"] = row.score
+            events.append(data)
+        return {"query": self.args.get('q', ''), "page": self.page, "per_page": self.per_page, "events": events}
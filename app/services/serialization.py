@@ -0,0 +1,75 @@
+import json
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Compact JSON as bytes; datetimes are written in ISO format."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def ndjson(rows, keys, batch_size=1000):
+    """Yield newline-delimited JSON for tuples ``rows`` named by ``keys``.
+
+    Lines are joined per ``batch_size`` rows so the response writes a few
+    large chunks instead of one per row.
+    """
+    batch = []
+    for row in rows:
+        batch.append(dumps(dict(zip(keys, row))))
+        if len(batch) >= batch_size:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+class JSONProvider(DefaultJSONProvider):
+    """``app.json``: the default provider, encoding with orjson when installed.
+
+    Keys are sorted and output is compact outside debug mode as before, but
+    dates and datetimes are written in ISO format like the rest of the API,
+    so views can return database rows without formatting each value.
+    JSON_ENCODER=json keeps encoding on the standard library.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.fast = orjson is not None and app.config.get("JSON_ENCODER", "orjson") == "orjson"
+
+    @staticmethod
+    def default(value):
+        if isinstance(value, date):
+            return value.isoformat()
+        return DefaultJSONProvider.default(value)
+
+    def _options(self, indent):
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        return options | orjson.OPT_INDENT_2 if indent else options
+
+    def dumps(self, obj, **kwargs):
+        if self.fast and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._options(False)).decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.fast:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,136 @@
+from app import db
+from app.models import EventPermission, User
+from app.services.broadcast import broadcaster
+from app.services.cache import event_cache
+from app.services.conditional import bump_calendar_versions
+
+ROLES = ("Editor", "Viewer")
+
+permissions = EventPermission.__table__
+
+
+def parse_roles(entries, owner_id, role_key="role"):
+    """Map ``[{"user_id", <role_key>}]`` to ``{user_id: role}``.
+
+    Returns ``(roles, skipped)``; the last entry for a user wins, and
+    malformed entries, unknown roles and the owner are skipped with a reason.
+    """
+    roles, skipped = {}, []
+    for entry in entries if isinstance(entries, list) else ():
+        raw_id = entry.get("user_id") if isinstance(entry, dict) else None
+        try:
+            user_id = int(raw_id)
+        except (TypeError, ValueError):
+            skipped.append({"user_id": raw_id, "error": "Invalid user_id"})
+            continue
+        role = entry.get(role_key)
+        if role not in ROLES:
+            skipped.append({"user_id": user_id, "error": f"{role_key} must be one of {', '.join(ROLES)}"})
+        elif user_id == owner_id:
+            skipped.append({"user_id": user_id, "error": "User owns the event"})
+        else:
+            roles[user_id] = role
+    return roles, skipped
+
+
+def parse_user_ids(values):
+    """Integer user ids of a list, dropping duplicates; None if malformed."""
+    if not isinstance(values, list):
+        return None
+    try:
+        return list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        return None
+
+
+def existing_roles(event_id, user_ids):
+    return dict(db.session.query(EventPermission.user_id, EventPermission.role).filter(
+        EventPermission.event_id == event_id, EventPermission.user_id.in_(user_ids)
+    ))
+
+
+def _set_roles(event_id, changed):
+    # One UPDATE per role instead of one per permission row.
+    by_role = {}
+    for user_id, role in changed.items():
+        by_role.setdefault(role, []).append(user_id)
+    for role, user_ids in by_role.items():
+        db.session.execute(permissions.update().where(
+            permissions.c.event_id == event_id, permissions.c.user_id.in_(user_ids)
+        ).values(role=role))
+
+
+def share(event_id, roles):
+    """Create or update the permissions in ``roles``; the caller commits.
+
+    Users and existing permissions are read in one query each, new rows are
+    inserted in one statement. Returns ``(shared, skipped, changed_ids)``.
+    """
+    if not roles:
+        return [], [], set()
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(list(roles))))
+    existing = existing_roles(event_id, list(usernames))
+
+    shared, skipped, new_rows, changed = [], [], [], {}
+    for user_id, role in roles.items():
+        if user_id not in usernames:
+            skipped.append({"user_id": user_id, "error": "User not found"})
+            continue
+        shared.append({"user_id": user_id, "role": role})
+        if user_id not in existing:
+            new_rows.append({"event_id": event_id, "user_id": user_id, "role": role, "username": usernames[user_id]})
+        elif existing[user_id] != role:
+            changed[user_id] = role
+
+    if new_rows:
+        db.session.execute(permissions.insert(), new_rows)
+    _set_roles(event_id, changed)
+    return shared, skipped, {row["user_id"] for row in new_rows} | set(changed)
+
+
+def change_roles(event_id, roles):
+    """Change the role of users the event is already shared with; the caller commits.
+
+    Returns ``(updated, skipped, changed_ids)``.
+    """
+    if not roles:
+        return [], [], set()
+    existing = existing_roles(event_id, list(roles))
+    updated, skipped, changed = [], [], {}
+    for user_id, role in roles.items():
+        if user_id not in existing:
+            skipped.append({"user_id": user_id, "error": "Event is not shared with this user"})
+            continue
+        updated.append({"user_id": user_id, "role": role})
+        if existing[user_id] != role:
+            changed[user_id] = role
+    _set_roles(event_id, changed)
+    return updated, skipped, set(changed)
+
+
+def unshare(event_id, user_ids):
+    """Delete the permissions of ``user_ids``; the caller commits.
+
+    Returns ``(removed_ids, skipped)``.
+    """
+    if not user_ids:
+        return [], []
+    existing = existing_roles(event_id, user_ids)
+    removed = [user_id for user_id in user_ids if user_id in existing]
+    if removed:
+        db.session.execute(permissions.delete().where(
+            permissions.c.event_id == event_id, permissions.c.user_id.in_(removed)
+        ))
+    skipped = [{"user_id": user_id, "error": "Event is not shared with this user"}
+               for user_id in user_ids if user_id not in existing]
+    return removed, skipped
+
+
+def commit_changes(event, changed_ids, event_type, payload):
+    """Commit a permission change and tell everyone it touched in one message."""
+    bump_calendar_versions(changed_ids)
+    db.session.commit()
+    event_cache.invalidate_roles(event.id, changed_ids)
+    if changed_ids:
+        broadcaster.publish(event_type, {"event_id": event.id, "owner_id": event.owner_id, **payload},
+                            event_id=event.id, user_ids=set(changed_ids))
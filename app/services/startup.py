@@ -0,0 +1,36 @@
+"""Per-worker warm-up.
+
+``prewarm`` does the work a worker would otherwise do on its first
+requests: it opens PREWARM_DB_CONNECTIONS connections on each engine and
+returns them to the pool, and loads the token blocklist. ``create_app``
+runs it unless PREWARM_ON_CREATE is off; servers that fork after loading
+the app (``gunicorn --preload``) should turn that off and call it from
+their post-fork hook, so no connection is shared between processes.
+"""
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+
+
+def prewarm(app):
+    """Warm the connection pools and caches of this process; returns seconds taken."""
+    from app.services.token_cache import revoked_tokens
+
+    began = time.perf_counter()
+    with app.app_context():
+        for engine in db.engines.values():
+            # Connections beyond the pool size would be closed on return.
+            size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+            connections = [engine.connect() for _ in range(min(app.config["PREWARM_DB_CONNECTIONS"], size))]
+            for connection in connections:
+                connection.close()
+        try:
+            revoked_tokens.warm()
+        except SQLAlchemyError as exc:
+            # e.g. `flask db upgrade` starting against an empty database;
+            # the cache loads itself on first use instead.
+            db.session.rollback()
+            app.logger.warning("Token blocklist not prewarmed: %s", exc.__class__.__name__)
+    return time.perf_counter() - began
@@ -0,0 +1,20 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Wall-clock time spent in named stages of one request."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - began
+
+    def server_timing(self):
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
@@ -0,0 +1,138 @@
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app import db
+from app.models import IST, TokenBlocklist, UserToken, now_ist
+
+
+def _epoch(value):
+    # Stored expiry columns hold naive Asia/Kolkata wall-clock times.
+    if value.tzinfo is None:
+        value = IST.localize(value)
+    return value.timestamp()
+
+
+def _refresh_lifetime():
+    lifetime = current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+    return lifetime if isinstance(lifetime, timedelta) else timedelta(seconds=lifetime or 0)
+
+
+def _expiry_bound(created_at, expires_at):
+    # A token revoked at created_at cannot outlive created_at plus the refresh
+    # lifetime, which also covers rows written with a bogus expiry.
+    bound = _epoch(created_at) + _refresh_lifetime().total_seconds() if created_at else 0
+    return max(bound, _epoch(expires_at) if expires_at else 0)
+
+
+class RevokedTokenCache:
+    """Revoked ``jti``s held in memory until the token they belong to expires.
+
+    Each worker pulls rows added by other workers (by id watermark, plus
+    those created in the last TOKEN_BLOCKLIST_SYNC_OVERLAP_SECONDS) at most
+    every TOKEN_BLOCKLIST_SYNC_SECONDS, so the common "not revoked" answer
+    does not touch the database. If more than TOKEN_BLOCKLIST_CACHE_SIZE
+    revocations are live, misses fall back to querying the blocklist.
+    """
+
+    def __init__(self):
+        self._revoked = {}
+        self._last_id = 0
+        self._synced_at = None
+        self._complete = True
+        self._lock = threading.Lock()
+
+    def warm(self):
+        cutoff = now_ist() - _refresh_lifetime()
+        rows = db.session.query(
+            TokenBlocklist.id, TokenBlocklist.jti, TokenBlocklist.created_at, TokenBlocklist.refresh_expires_at
+        ).filter(
+            or_(TokenBlocklist.created_at > cutoff, TokenBlocklist.refresh_expires_at > now_ist())
+        ).all()
+        last_id = db.session.query(db.func.max(TokenBlocklist.id)).scalar() or 0
+        with self._lock:
+            self._revoked = {}
+            self._complete = True
+            self._add_rows(rows)
+            self._last_id = last_id
+            self._synced_at = time.monotonic()
+
+    def _add_rows(self, rows):
+        now = time.time()
+        for row_id, jti, created_at, expires_at in rows:
+            expires = _expiry_bound(created_at, expires_at)
+            if expires > now:
+                self._revoked[jti] = expires
+            self._last_id = max(self._last_id, row_id)
+        self._evict(now)
+
+    def _evict(self, now):
+        limit = current_app.config["TOKEN_BLOCKLIST_CACHE_SIZE"]
+        if len(self._revoked) <= limit:
+            return
+        self._revoked = {jti: expires for jti, expires in self._revoked.items() if expires > now}
+        if len(self._revoked) > limit:
+            keep = sorted(self._revoked.items(), key=lambda item: item[1])[-limit:]
+            self._revoked = dict(keep)
+            self._complete = False
+
+    def _sync(self):
+        if self._synced_at is None:
+            self.warm()
+            return
+        if time.monotonic() - self._synced_at < current_app.config["TOKEN_BLOCKLIST_SYNC_SECONDS"]:
+            return
+        # Ids are handed out before commit, so a row can become visible after
+        # one with a higher id; rows created within the overlap are read again.
+        overlap = now_ist() - timedelta(seconds=current_app.config["TOKEN_BLOCKLIST_SYNC_OVERLAP_SECONDS"])
+        rows = db.session.query(
+            TokenBlocklist.id, TokenBlocklist.jti, TokenBlocklist.created_at, TokenBlocklist.refresh_expires_at
+        ).filter(
+            or_(TokenBlocklist.id > self._last_id, TokenBlocklist.created_at > overlap)
+        ).all()
+        with self._lock:
+            self._add_rows(rows)
+            self._synced_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        self._sync()
+        with self._lock:
+            expires = self._revoked.get(jti)
+            if expires is not None:
+                return True
+            complete = self._complete
+        if complete:
+            return False
+        return db.session.query(TokenBlocklist.id).filter_by(jti=jti).first() is not None
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = _epoch(expires_at)
+            self._evict(time.time())
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._last_id = 0
+            self._synced_at = None
+            self._complete = True
+
+
+revoked_tokens = RevokedTokenCache()
+
+
+def purge_expired_tokens():
+    """Delete blocklist and session rows whose tokens can no longer be used."""
+    now = now_ist()
+    blocklisted = TokenBlocklist.query.filter(
+        TokenBlocklist.refresh_expires_at < now,
+        TokenBlocklist.created_at < now - _refresh_lifetime()
+    ).delete(synchronize_session=False)
+    sessions = UserToken.query.filter(
+        and_(UserToken.access_expires_at < now, UserToken.refresh_expires_at < now)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return blocklisted, sessions
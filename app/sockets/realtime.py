@@ -1,34 +1,91 @@
-from flask_socketio import emit
+from flask import current_app, request
+from flask_jwt_extended import decode_token
+from flask_socketio import emit, join_room as join_socket_room
 from app import socketio
+from app.models import Event, EventPermission
+from app.services.broadcast import event_room, user_room
+from app.services.metrics import instrumentation
+from app.services.token_cache import revoked_tokens
+
+# sid -> user id for connections that presented a valid access token
+authenticated = {}
+
+def _token_from(auth):
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[7:]
+    return request.args.get('token')
+
+def user_from_token(token):
+    """The user id of an unrevoked access token, or None."""
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return None
+    if claims.get('type') != 'access' or revoked_tokens.is_revoked(claims['jti']):
+        return None
+    return int(claims['sub'])
+
+def _can_join(room):
+    user_id = authenticated.get(request.sid)
+    if room.startswith('user:'):
+        return user_id is not None and room == user_room(user_id)
+    if room.startswith('event:'):
+        if user_id is None:
+            return False
+        try:
+            event_id = int(room.split(':', 1)[1])
+        except ValueError:
+            return False
+        event = Event.query.get(event_id)
+        return bool(event) and (
+            event.owner_id == user_id or
+            EventPermission.query.filter_by(event_id=event_id, user_id=user_id).first() is not None
+        )
+    return False
 
 @socketio.on('connect')
-def handle_connect():
-    print('Client connected')
+@instrumentation.socket_handler('connect')
+def handle_connect(auth=None):
+    current_app.logger.debug('Client connected: %s', request.sid)
+    token = _token_from(auth)
+    if token:
+        user_id = user_from_token(token)
+        if user_id is None:
+            return False
+        authenticated[request.sid] = user_id
+        join_socket_room(user_room(user_id))
     emit('message', {'data': 'Connected to server'})
 
 @socketio.on('disconnect')
-def handle_disconnect():
-    print('Client disconnected')
+@instrumentation.socket_handler('disconnect')
+def handle_disconnect(*args):
+    authenticated.pop(request.sid, None)
+    current_app.logger.debug('Client disconnected: %s', request.sid)
 
 @socketio.on('join_room')
+@instrumentation.socket_handler('join_room')
 def handle_join_room(data):
     room = data.get('room')
     if room:
-        from flask_socketio import join_room
-        join_room(room)
+        if not _can_join(room):
+            emit('message', {'data': f'Not allowed to join room {room}'})
+            return
+        join_socket_room(room)
         emit('message', {'data': f'Joined room {room}'}, room=room)
 
+@socketio.on('subscribe_event')
+@instrumentation.socket_handler('subscribe_event')
+def handle_subscribe_event(data):
+    handle_join_room({'room': event_room(data.get('event_id'))})
+
 @socketio.on('leave_room')
+@instrumentation.socket_handler('leave_room')
 def handle_leave_room(data):
     room = data.get('room')
     if room:
         from flask_socketio import leave_room
         leave_room(room)
         emit('message', {'data': f'Left room {room}'}, room=room)
-
-@socketio.on('send_event_update')
-def handle_send_event_update(data):
-    room = data.get('room')
-    event_data = data.get('event')
-    if room and event_data:
-        emit('event_update', event_data, room=room)
@@ -0,0 +1,9 @@
+"""ASGI entry point: ``uvicorn asgi:application --host 127.0.0.1 --port 5000``.
+
+Serves the same app as ``run.py`` with the event read paths and Socket.IO
+on asyncio; see ``app/aio``.
+"""
+from app.aio import create_asgi_app
+from run import app
+
+application = create_asgi_app(app)
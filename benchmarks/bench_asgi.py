@@ -0,0 +1,177 @@
+"""Concurrent-connection capacity of the threaded and ASGI serving modes.
+
+Starts the app once on the threaded server of ``run.py`` (one thread per connection) and
+once with ``uvicorn asgi:application`` (one event loop), against the same
+database, and for each level of concurrency opens that many keep-alive
+connections that fetch ``GET /api/events/<id>`` and ``GET /api/events``
+back to back for ``--seconds`` (reconnecting when the server closes the
+connection after a response). Reports throughput, latency percentiles,
+failed requests and the server's thread count and resident memory while
+all connections are open.
+
+SQLite answers in microseconds, which hides the cost of a thread waiting
+on the database; point ``--database-url`` at MySQL (with ``aiomysql``
+installed) to measure that. The ASGI mode needs ``uvicorn``, ``greenlet``
+and the asyncio driver (``aiosqlite`` for the default database).
+
+Usage: python benchmarks/bench_asgi.py [--concurrency 10 100 500 1000] [--seconds 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_realtime_bus import ROOT, THREADED_SERVER, api, wait_until_up  # noqa: E402
+
+MODES = {
+    "threaded": lambda port: THREADED_SERVER,
+    "asgi": lambda port: [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1",
+                          "--port", str(port), "--log-level", "warning", "--no-access-log"],
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def process_stats(pid):
+    stats = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            if key in ("Threads", "VmRSS"):
+                stats[key] = value.strip()
+    return stats
+
+
+async def fetch(reader, writer, path, token):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, keep_alive = None, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    if length is None:
+        await reader.read()
+        keep_alive = False
+    else:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def connection(port, paths, token, deadline, latencies, errors):
+    """One client; reconnects when the server closes the connection."""
+    writer, i = None, 0
+    try:
+        while time.monotonic() < deadline:
+            began = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), 10)
+            status, keep_alive = await asyncio.wait_for(fetch(reader, writer, paths[i % len(paths)], token), 30)
+            if status != 200:
+                errors.append(status)
+            latencies.append(time.perf_counter() - began)
+            if not keep_alive:
+                writer.close()
+                writer = None
+            i += 1
+    except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        errors.append("dropped")
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def load(port, pid, paths, token, concurrency, seconds):
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+    tasks = [asyncio.create_task(connection(port, paths, token, deadline, latencies, errors))
+             for _ in range(concurrency)]
+    await asyncio.sleep(min(1.0, seconds / 2))
+    stats = process_stats(pid)
+    began = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - began + min(1.0, seconds / 2)
+    return latencies, errors, elapsed, stats
+
+
+def run_mode(mode, args, directory):
+    port = args.port + (0 if mode == "threaded" else 1)
+    env = dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI=args.database_url or "sqlite:///" + os.path.join(directory, "bench_asgi.db"),
+        FLASK_DEBUG="false",
+        PORT=str(port),
+        METRICS_ENABLED="false",
+        SECRET_KEY=os.getenv("SECRET_KEY", "benchmark-secret-key-0123456789abcdef"),
+        JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef"),
+    )
+    log = open(os.path.join(directory, f"{mode}.log"), "w")
+    server = subprocess.Popen(MODES[mode](port), cwd=ROOT, stdout=log, stderr=log, env=env)
+    try:
+        wait_until_up(port)
+        base = f"http://127.0.0.1:{port}"
+        name = f"{mode}{int(time.time() * 1000)}"
+        user = api(base, "/api/auth/register", {"username": name, "email": f"{name}@example.com",
+                                                "password": "password", "role": "Owner"})
+        token = user["access_token"]
+        ids = [api(base, "/api/events", {
+            "title": f"Capacity {i}", "start_time": f"2031-01-{i + 1:02d}T10:00:00",
+            "end_time": f"2031-01-{i + 1:02d}T11:00:00"
+        }, token)["id"] for i in range(10)]
+        paths = [f"/api/events/{event_id}" for event_id in ids] + ["/api/events?per_page=10"]
+
+        for concurrency in args.concurrency:
+            latencies, errors, elapsed, stats = asyncio.run(
+                load(port, server.pid, paths, token, concurrency, args.seconds))
+            print(f"{mode:<9} {concurrency:>6} {len(latencies) / elapsed:>9.0f} "
+                  f"{percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.2f} {len(errors):>7} "
+                  f"{stats.get('Threads', '?'):>8} {stats.get('VmRSS', '?'):>12}", flush=True)
+            yield {"mode": mode, "concurrency": concurrency, "requests": len(latencies),
+                   "rps": len(latencies) / elapsed, "p50": percentile(latencies, 0.5),
+                   "p95": percentile(latencies, 0.95), "p99": percentile(latencies, 0.99),
+                   "errors": len(errors), "threads": stats.get("Threads"), "rss": stats.get("VmRSS")}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["threaded", "asgi"])
+    parser.add_argument("--database-url", help="shared database for both modes (default: a new SQLite file)")
+    parser.add_argument("--port", type=int, default=5300)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    print(f"{'mode':<9} {'conns':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} "
+          f"{'threads':>8} {'rss':>12}")
+    results = []
+    for mode in args.modes:
+        results.extend(run_mode(mode, args, directory))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Login throughput with bcrypt inline versus on the bounded hashing pool.
+
+Usage: python benchmarks/bench_auth.py [--logins 200] [--concurrency 32] [--rounds 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DB_FILE
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef")
+
+from app import bcrypt, create_app, db
+from app.config import Config
+from app.models import User
+
+
+def seed(app, users):
+    with app.app_context():
+        hashed = bcrypt.generate_password_hash("password").decode("utf-8")
+        db.session.add_all([
+            User(username=f"user{i}", email=f"user{i}@example.com", password=hashed, role="Owner")
+            for i in range(users)
+        ])
+        db.session.commit()
+
+
+def run(app, logins, concurrency, users):
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    counter = iter(range(logins))
+
+    def worker():
+        client = app.test_client()
+        for i in iter(lambda: next(counter, None), None):
+            began = time.perf_counter()
+            response = client.post("/api/auth/login", json={
+                "email": f"user{i % users}@example.com", "password": "password"
+            })
+            elapsed = time.perf_counter() - began
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - began
+
+    latencies.sort()
+    ok = statuses.count(200)
+    return {
+        "logins_per_s": ok / wall,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1e3,
+        "rejected": statuses.count(503),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    Config.BCRYPT_LOG_ROUNDS = args.rounds
+    seeded = False
+    for label, workers in (("inline", 0), (f"pool({args.workers})", args.workers)):
+        Config.AUTH_HASH_WORKERS = workers
+        app = create_app()
+        if not seeded:
+            seed(app, args.users)
+            seeded = True
+        result = run(app, args.logins, args.concurrency, args.users)
+        print(f"{label:>10} | {result['logins_per_s']:7.1f} logins/s | p50 {result['p50_ms']:7.1f} ms | "
+              f"p95 {result['p95_ms']:7.1f} ms | 503s {result['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
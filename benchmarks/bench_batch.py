@@ -0,0 +1,62 @@
+"""Time POST /api/events/batch end to end against a fresh SQLite file.
+
+Usage: python benchmarks/bench_batch.py [--sizes 1000 10000] [--mode partial|all_or_nothing]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_batch.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DB_FILE
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef")
+
+from app import create_app
+
+
+def payload(count, year):
+    base = datetime(year, 1, 1, 8, 0)
+    return json.dumps([
+        {
+            "title": f"imported {i}",
+            "description": "synthetic",
+            "location": "Room 1",
+            "start_time": (base + timedelta(hours=i)).isoformat(),
+            "end_time": (base + timedelta(hours=i, minutes=45)).isoformat(),
+        }
+        for i in range(count)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--mode", default="all_or_nothing")
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    response = client.post("/api/auth/register", json={
+        "username": "bench", "email": "bench@example.com", "password": "bench", "role": "Owner"
+    })
+    headers = {"Authorization": "Bearer " + response.get_json()["access_token"]}
+
+    for offset, count in enumerate(args.sizes):
+        body = payload(count, 2030 + offset * 10)
+        began = time.perf_counter()
+        response = client.post(f"/api/events/batch?mode={args.mode}", data=body,
+                               content_type="application/json", headers=headers)
+        elapsed = time.perf_counter() - began
+        created = len(response.get_json()["created"])
+        print(f"{count:>7} events | status {response.status_code} | created {created:>7} | "
+              f"{elapsed * 1e3:8.1f} ms | {created / elapsed:9.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare conflict lookups through the database and the in-memory interval index.
+
+Usage: python benchmarks/bench_conflicts.py [--sizes 1000 10000 100000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_conflicts.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DB_FILE
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef")
+
+from app import create_app, db
+from app.models import Event, User
+from app.services.conflicts import conflict_index, find_conflicting_ids
+
+BASE = datetime(2025, 1, 1, 8, 0)
+
+
+def seed(owner_id, count):
+    rows = []
+    for i in range(count):
+        start = BASE + timedelta(hours=2 * i)
+        rows.append({
+            "title": f"event {i}",
+            "start_time": start,
+            "end_time": start + timedelta(minutes=random.choice((30, 60, 90))),
+            "owner_id": owner_id,
+            "is_recurring": False,
+            "created_at": BASE,
+            "updated_at": BASE,
+        })
+    db.session.execute(Event.__table__.insert(), rows)
+    db.session.commit()
+
+
+def run(app, owner_id, count, queries):
+    windows = []
+    for _ in range(queries):
+        start = BASE + timedelta(minutes=random.randrange(0, count * 120))
+        windows.append((start, start + timedelta(minutes=45)))
+
+    results = {}
+    for label, enabled in (("database", False), ("index", True)):
+        app.config["CONFLICT_INDEX_ENABLED"] = enabled
+        conflict_index.clear()
+        load = time.perf_counter()
+        if enabled:
+            find_conflicting_ids(owner_id, BASE, BASE)
+        load = time.perf_counter() - load
+
+        began = time.perf_counter()
+        for start, end in windows:
+            find_conflicting_ids(owner_id, start, end)
+        elapsed = time.perf_counter() - began
+        results[label] = (elapsed / queries * 1e6, load * 1e3)
+
+    db_us, _ = results["database"]
+    idx_us, idx_load = results["index"]
+    print(f"{count:>8} events | database {db_us:9.1f} us/query | "
+          f"index {idx_us:7.1f} us/query (load {idx_load:7.1f} ms) | x{db_us / idx_us:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    app = create_app()
+    with app.app_context():
+        for owner_id, count in enumerate(args.sizes, start=1):
+            db.session.add(User(id=owner_id, username=f"bench{owner_id}", email=f"bench{owner_id}@example.com",
+                                password="x", role="Owner"))
+            db.session.commit()
+            seed(owner_id, count)
+            run(app, owner_id, count, args.queries)
+
+
+if __name__ == "__main__":
+    main()
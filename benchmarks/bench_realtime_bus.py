@@ -0,0 +1,205 @@
+"""Cross-worker delivery and throughput of the local Socket.IO message bus.
+
+Starts several threaded workers of ``run.py`` on consecutive ports sharing one SQLite
+database and SOCKETIO_MESSAGE_QUEUE=local://<dir>, and connects one client
+per worker to the same user's room. It then checks that
+
+* an event created over HTTP on one worker reaches the clients on every
+  worker, and
+* messages published on the bus by a write-only emitter (as a separate
+  process such as a job runner would) arrive at every worker's client
+  exactly once, reporting the delivery rate. Clients cannot send into
+  rooms themselves. Workers deliver on separate threads, so the relative
+  order of messages is not fixed.
+
+Clients use Engine.IO long-polling over urllib so nothing beyond the app's
+own requirements is needed.
+
+Usage: python benchmarks/bench_realtime_bus.py [--workers 4] [--messages 2000] [--payload 512]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.services.bus import LocalSocketManager  # noqa: E402
+
+THREADED_SERVER = [sys.executable, "run.py"]
+RECORD_SEPARATOR = "\x1e"
+
+
+class PollingClient:
+    """Just enough of a Socket.IO client to connect, send and collect events."""
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url + "/socket.io/?EIO=4&transport=polling"
+        self.events = []
+        self.received = threading.Condition()
+        handshake = self._request(self.base_url)
+        self.sid = json.loads(handshake[1:])["sid"]
+        self.base_url += "&sid=" + self.sid
+        self.send("40" + json.dumps({"token": token}))
+        self.running = True
+        self.thread = threading.Thread(target=self._poll, daemon=True)
+        self.thread.start()
+
+    def _request(self, url, body=None):
+        request = urllib.request.Request(url, data=body.encode() if body is not None else None)
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.read().decode()
+
+    def send(self, *packets):
+        self._request(self.base_url, RECORD_SEPARATOR.join(packets))
+
+    def _poll(self):
+        while self.running:
+            try:
+                payload = self._request(self.base_url)
+            except (urllib.error.URLError, OSError):
+                return
+            for packet in payload.split(RECORD_SEPARATOR):
+                if packet == "2":
+                    self.send("3")
+                elif packet.startswith("42"):
+                    with self.received:
+                        self.events.append(json.loads(packet[2:]))
+                        self.received.notify_all()
+
+    def wait_for(self, predicate, timeout):
+        with self.received:
+            return self.received.wait_for(lambda: predicate(self.events), timeout)
+
+    def close(self):
+        self.running = False
+        try:
+            self.send("1")
+        except (urllib.error.URLError, OSError):
+            pass
+
+
+def api(base_url, path, body, token=None):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    if token:
+        request.add_header("Authorization", "Bearer " + token)
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def bus_url(directory):
+    return "local://" + os.path.join(directory, "bus")
+
+
+def publisher(directory):
+    """A write-only emitter on the workers' bus."""
+    manager = LocalSocketManager(bus_url(directory), write_only=True)
+    manager.initialize()
+    return manager
+
+
+def start_workers(count, base_port, directory):
+    env = dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(directory, "bench_bus.db"),
+        SOCKETIO_MESSAGE_QUEUE=bus_url(directory),
+        REALTIME_COALESCE_SECONDS="0",
+        FLASK_DEBUG="false",
+        SECRET_KEY=os.getenv("SECRET_KEY", "benchmark-secret-key-0123456789abcdef"),
+        JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef"),
+    )
+    log = open(os.path.join(directory, "workers.log"), "w")
+    workers = []
+    for i in range(count):
+        workers.append(subprocess.Popen(THREADED_SERVER, cwd=ROOT, stdout=log, stderr=log,
+                                        env=dict(env, PORT=str(base_port + i))))
+        if i == 0:
+            wait_until_up(base_port)  # let the first worker create the schema
+    for i in range(1, count):
+        wait_until_up(base_port + i)
+    return workers
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.yaml", timeout=1).read()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--payload", type=int, default=512)
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    workers = start_workers(args.workers, args.port, directory)
+    urls = [f"http://127.0.0.1:{args.port + i}" for i in range(args.workers)]
+    clients, ok = [], False
+    try:
+        api(urls[0], "/api/auth/register", {"username": "bus", "email": "bus@example.com", "password": "password",
+                                                 "role": "Owner"})
+        login = api(urls[0], "/api/auth/login", {"email": "bus@example.com", "password": "password"})
+        token, room = login["access_token"], f"user:{login['user']['id']}"
+        clients = [PollingClient(url, token) for url in urls]
+        time.sleep(0.5)
+
+        # An HTTP write handled by the last worker reaches every worker.
+        api(urls[-1], "/api/events", {
+            "title": "Bus check", "start_time": "2030-01-01T10:00:00", "end_time": "2030-01-01T11:00:00"
+        }, token)
+        created = [c.wait_for(lambda events: any(e[0] == "event_created" for e in events), args.timeout)
+                   for c in clients]
+        print("event_created delivered to workers:", [i for i, ok in enumerate(created) if ok])
+
+        expected = list(range(args.messages))
+        body = "x" * args.payload
+        bus = publisher(directory)
+        began = time.perf_counter()
+        for seq in expected:
+            bus.emit("event_update", {"seq": seq, "body": body}, namespace="/", room=room)
+        published = time.perf_counter() - began
+
+        ok = all(created)
+        for i, client in enumerate(clients):
+            client.wait_for(lambda events: len(updates(events)) >= args.messages, args.timeout)
+            elapsed = time.perf_counter() - began
+            seqs = updates(client.events)
+            exactly_once = sorted(seqs) == expected
+            ok &= exactly_once
+            print(f"worker {i} | {len(seqs)}/{args.messages} exactly once: {exactly_once} | "
+                  f"{len(seqs) / elapsed:8.0f} msg/s")
+        print(f"published {args.messages} messages in {published:.2f}s "
+              f"({args.messages / published:.0f} msg/s); all delivered: {ok}")
+    finally:
+        for client in clients:
+            client.close()
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    sys.exit(0 if ok else 1)
+
+
+def updates(events):
+    return [e[1]["seq"] for e in events if e[0] == "event_update"]
+
+
+if __name__ == "__main__":
+    main()
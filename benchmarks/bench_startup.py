@@ -0,0 +1,175 @@
+"""Cold-start cost of a worker in the development and production startup modes.
+
+For each mode this measures, over ``--runs`` fresh processes:
+
+- import: ``import app`` and ``create_app()`` in a new interpreter, plus the
+  slowest modules reported by ``python -X importtime``;
+- first request: the time from spawning the threaded server of ``run.py`` (and ``uvicorn
+  asgi:application``) until an authenticated ``GET /api/events`` succeeds,
+  and how long that first request and the one after it took.
+
+``development`` is the default startup (reads ``.env``, applies migrations);
+``production`` sets ``STARTUP_MODE=production`` against a database that was
+migrated beforehand, as a deployment would.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--servers threaded asgi]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_asgi import MODES as SERVERS  # noqa: E402
+from bench_realtime_bus import ROOT, api, wait_until_up  # noqa: E402
+
+STARTUP_MODES = {
+    "development": {},
+    "production": {"STARTUP_MODE": "production"},
+}
+
+IMPORT_PROBE = """
+import json, time
+began = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({"import": imported - began, "create_app": created - imported}))
+"""
+
+
+def environment(database, port, mode):
+    return dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI=database,
+        FLASK_DEBUG="false",
+        PORT=str(port),
+        METRICS_ENABLED="false",
+        SECRET_KEY=os.getenv("SECRET_KEY", "benchmark-secret-key-0123456789abcdef"),
+        JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef"),
+        **STARTUP_MODES[mode],
+    )
+
+
+def slowest_imports(stderr, count=5):
+    """Top-level modules with the largest cumulative import time (ms)."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def measure_import(database, mode):
+    probe = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_PROBE], cwd=ROOT, check=True,
+                           capture_output=True, text=True, env=environment(database, 0, mode))
+    result = json.loads(probe.stdout.strip().splitlines()[-1])
+    result["modules"] = slowest_imports(probe.stderr)
+    return result
+
+
+def get(port, path, token):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers={"Authorization": "Bearer " + token})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def measure_first_request(server, database, mode, port, token, directory):
+    log = open(os.path.join(directory, f"{server}-{mode}.log"), "a")
+    began = time.perf_counter()
+    process = subprocess.Popen(SERVERS[server](port), cwd=ROOT, stdout=log, stderr=log,
+                               env=environment(database, port, mode))
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} exited with {process.returncode}; see {log.name}")
+            if time.perf_counter() - began > 60:
+                raise RuntimeError(f"{server} did not answer within 60s; see {log.name}")
+            sent = time.perf_counter()
+            try:
+                get(port, "/api/events", token)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        ready = time.perf_counter()
+        get(port, "/api/events", token)
+        return {"ready": ready - began, "first": ready - sent, "second": time.perf_counter() - ready}
+    finally:
+        process.terminate()
+        process.wait()
+        log.close()
+
+
+def prepare(database, port, directory):
+    """Migrate the database and return a token for a user with a few events."""
+    log = open(os.path.join(directory, "prepare.log"), "w")
+    process = subprocess.Popen(SERVERS["threaded"](port), cwd=ROOT, stdout=log, stderr=log,
+                               env=environment(database, port, "development"))
+    try:
+        wait_until_up(port)
+        base = f"http://127.0.0.1:{port}"
+        token = api(base, "/api/auth/register", {"username": "startup", "email": "startup@example.com",
+                                                 "password": "password", "role": "Owner"})["access_token"]
+        for i in range(10):
+            api(base, "/api/events", {"title": f"Startup {i}", "start_time": f"2031-01-{i + 1:02d}T10:00:00",
+                                      "end_time": f"2031-01-{i + 1:02d}T11:00:00"}, token)
+        return token
+    finally:
+        process.terminate()
+        process.wait()
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=sorted(STARTUP_MODES), default=["development", "production"])
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=["threaded", "asgi"])
+    parser.add_argument("--database-url", help="an existing database (default: a new SQLite file)")
+    parser.add_argument("--port", type=int, default=5400)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = args.database_url or "sqlite:///" + os.path.join(directory, "bench_startup.db")
+    token = prepare(database, args.port, directory)
+    results = {}
+
+    print(f"{'mode':<12} {'import ms':>10} {'create_app ms':>14}  slowest imports (ms)")
+    for mode in args.modes:
+        runs = [measure_import(database, mode) for _ in range(args.runs)]
+        imported = statistics.median(run["import"] for run in runs) * 1000
+        created = statistics.median(run["create_app"] for run in runs) * 1000
+        modules = ", ".join(f"{name} {ms:.0f}" for ms, name in runs[-1]["modules"])
+        print(f"{mode:<12} {imported:>10.1f} {created:>14.1f}  {modules}", flush=True)
+        results[f"import/{mode}"] = runs
+
+    print()
+    print(f"{'server':<9} {'mode':<12} {'ready ms':>9} {'first ms':>9} {'second ms':>10}")
+    for server in args.servers:
+        for mode in args.modes:
+            runs = [measure_first_request(server, database, mode, args.port + 1, token, directory)
+                    for _ in range(args.runs)]
+            print(f"{server:<9} {mode:<12} "
+                  f"{statistics.median(run['ready'] for run in runs) * 1000:>9.1f} "
+                  f"{statistics.median(run['first'] for run in runs) * 1000:>9.1f} "
+                  f"{statistics.median(run['second'] for run in runs) * 1000:>10.1f}", flush=True)
+            results[f"first-request/{server}/{mode}"] = runs
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Rows per second and memory of GET /api/events/stream.
+
+Seeds one user with --rows events (a tenth of them shared from another
+user), streams them back through the test client without buffering and
+reports throughput and how much peak RSS grows while streaming (it should
+stay near zero at any row count), with orjson and with the stdlib json
+fallback.
+
+Usage: python benchmarks/bench_stream.py [--rows 200000]
+       python benchmarks/bench_stream.py --rows 1000000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_stream.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DB_FILE
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef")
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import Event, EventPermission, User
+from app.services import serialization
+
+
+def seed(app, rows, batch=20000):
+    with app.app_context():
+        reader = User(username="reader", email="reader@example.com", password="x", role="Owner")
+        sharer = User(username="sharer", email="sharer@example.com", password="x", role="Owner")
+        db.session.add_all([reader, sharer])
+        db.session.commit()
+        base = datetime(2030, 1, 1)
+        now = datetime.now()
+        for offset in range(0, rows, batch):
+            events = []
+            for i in range(offset, min(offset + batch, rows)):
+                start = base + timedelta(minutes=30 * i)
+                events.append({
+                    "title": f"Event {i}", "description": "Synthetic event for the stream benchmark",
+                    "location": "Room 1", "start_time": start, "end_time": start + timedelta(minutes=25),
+                    "is_recurring": False, "recurrence_pattern": None,
+                    "owner_id": sharer.id if i % 10 == 0 else reader.id,
+                    "version_counter": 1, "created_at": now, "updated_at": now,
+                })
+            ids = db.session.execute(Event.__table__.insert().returning(Event.__table__.c.id), events).scalars().all()
+            shared = [event_id for event_id, event in zip(ids, events) if event["owner_id"] == sharer.id]
+            db.session.execute(EventPermission.__table__.insert(), [
+                {"event_id": event_id, "user_id": reader.id, "role": "Viewer", "username": "reader"}
+                for event_id in shared
+            ])
+            db.session.commit()
+        return create_access_token(identity=str(reader.id))
+
+
+def stream(client, token):
+    began = time.perf_counter()
+    response = client.get("/api/events/stream", headers={"Authorization": "Bearer " + token}, buffered=False)
+    lines = 0
+    for chunk in response.response:
+        lines += chunk.count(b"\n")
+    response.close()
+    return lines, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    app = create_app()
+    began = time.perf_counter()
+    token = seed(app, args.rows)
+    print(f"seeded {args.rows} events in {time.perf_counter() - began:.1f}s")
+
+    client = app.test_client()
+    print(f"peak RSS after seeding {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    orjson = serialization.orjson
+    for label, module in (("orjson", orjson), ("json", None)):
+        if label == "orjson" and module is None:
+            continue
+        serialization.orjson = module
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        lines, elapsed = stream(client, token)
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        print(f"{label:>7} | {lines} rows in {elapsed:6.2f}s | {lines / elapsed:9.0f} rows/s | "
+              f"peak RSS growth while streaming {rss_growth / 1024:.1f} MB")
+    serialization.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
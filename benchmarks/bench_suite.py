@@ -0,0 +1,460 @@
+"""Latency percentiles and throughput for every blueprint.
+
+Generates a synthetic dataset (see ``synthetic.py``) in a fresh SQLite file,
+then runs each scenario through the test client: a few warm-up requests,
+then --requests timed ones. Every scenario reports p50/p90/p95/p99/max
+latency in milliseconds, requests per second and how many responses had an
+unexpected status. Socket.IO fan-out is measured with one test client per
+user an event is shared with.
+
+Results are written as JSON (--output). Passing an earlier file as
+--compare prints the change in p95 and throughput per scenario and exits
+with status 1 if any p95 grew by more than --threshold percent.
+
+Usage: python benchmarks/bench_suite.py [--users 200] [--events-per-user 50] [--requests 200]
+       python benchmarks/bench_suite.py --only events versioning --output before.json
+       python benchmarks/bench_suite.py --output after.json --compare before.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_suite.db")
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + DB_FILE
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-key-0123456789abcdef")
+# Broadcasts are flushed inline so fan-out is measured inside the request.
+os.environ["REALTIME_COALESCE_SECONDS"] = "0"
+
+from app import create_app, socketio
+from benchmarks import synthetic
+
+SCENARIOS = []
+
+
+def scenario(blueprint, name, expect=(200,), requests=None):
+    """Register ``fn(ctx, i) -> response`` as a timed scenario."""
+    def register(fn):
+        SCENARIOS.append({"blueprint": blueprint, "name": f"{blueprint}.{name}", "fn": fn,
+                          "expect": expect, "requests": requests})
+        return fn
+    return register
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies, elapsed, errors):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1e3, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "mean_ms": ms(sum(ordered) / len(ordered) if ordered else None),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+
+
+class Context:
+    """What scenarios need: the client, the dataset and rotating picks from it."""
+
+    def __init__(self, app, data):
+        self.app = app
+        self.client = app.test_client()
+        self.data = data
+        self.writer = data.users[0]
+        self.headers = data.headers(self.writer)
+        self.busiest = max(data.users, key=lambda user_id: len(data.owned.get(user_id, ())))
+        self.owners = {event_id: user_id for user_id, ids in data.owned.items() for event_id in ids}
+        # Users sharing an event with each user: whose calendars it may query.
+        self.related = {user_id: set() for user_id in data.users}
+        for event_id, user_id in data.shared:
+            self.related[user_id].add(self.owners[event_id])
+            self.related[self.owners[event_id]].add(user_id)
+        self.future = datetime(2040, 1, 1, 8, 0)
+        self.counter = itertools.count()
+        self.etags = {}
+
+    def user(self, i):
+        return self.data.users[i % len(self.data.users)]
+
+    def owned_single(self, i):
+        """A non-recurring event and the headers of its owner."""
+        event_id = self.data.single[i % len(self.data.single)]
+        return event_id, self.data.headers(self.owner_of(event_id))
+
+    def owner_of(self, event_id):
+        return self.owners[event_id]
+
+    def calendars(self, i, count):
+        """Up to ``count`` users whose calendars a user may query, that user
+        first, and its headers."""
+        user_id = self.user(i)
+        return [user_id] + sorted(self.related[user_id])[:count - 1], self.data.headers(user_id)
+
+    def deep(self, i):
+        event_id = self.data.deep[i % len(self.data.deep)]
+        return event_id, self.data.headers(self.owner_of(event_id))
+
+    def next_slot(self, minutes=30):
+        # Each call gets its own slot far after the generated data, so
+        # creates never conflict.
+        start = self.future + timedelta(hours=next(self.counter))
+        return start, start + timedelta(minutes=minutes)
+
+
+# auth
+
+@scenario("auth", "login", requests=20)
+def auth_login(ctx, i):
+    user_id = ctx.user(i)
+    return ctx.client.post("/api/auth/login", json={
+        "email": f"{ctx.data.usernames[user_id]}@example.com", "password": synthetic.PASSWORD
+    })
+
+
+@scenario("auth", "refresh")
+def auth_refresh(ctx, i):
+    token = ctx.data.refresh_tokens[ctx.user(i)]
+    return ctx.client.post("/api/auth/refresh", headers={"Authorization": "Bearer " + token})
+
+
+# events
+
+@scenario("events", "list_page")
+def events_list(ctx, i):
+    return ctx.client.get("/api/events?per_page=50", headers=ctx.data.headers(ctx.user(i)))
+
+
+@scenario("events", "list_window")
+def events_list_window(ctx, i):
+    start = synthetic.BASE + timedelta(days=7 * (i % 8))
+    return ctx.client.get(
+        f"/api/events?per_page=100&start_time={start.isoformat()}&end_time={(start + timedelta(days=7)).isoformat()}",
+        headers=ctx.data.headers(ctx.user(i))
+    )
+
+
+@scenario("events", "list_not_modified", expect=(200, 304))
+def events_list_not_modified(ctx, i):
+    # A few users polling again and again, as clients revalidating do.
+    user_id = ctx.user(i % 10)
+    headers = dict(ctx.data.headers(user_id))
+    if user_id in ctx.etags:
+        headers["If-None-Match"] = ctx.etags[user_id]
+    response = ctx.client.get("/api/events?per_page=50", headers=headers)
+    ctx.etags[user_id] = response.headers.get("ETag")
+    return response
+
+
+@scenario("events", "get")
+def events_get(ctx, i):
+    event_id, headers = ctx.owned_single(i * 7)
+    return ctx.client.get(f"/api/events/{event_id}", headers=headers)
+
+
+@scenario("events", "create", expect=(201,))
+def events_create(ctx, i):
+    start, end = ctx.next_slot()
+    return ctx.client.post("/api/events", json={
+        "title": f"Bench {i}", "start_time": start.isoformat(), "end_time": end.isoformat()
+    }, headers=ctx.headers)
+
+
+@scenario("events", "update")
+def events_update(ctx, i):
+    event_id, headers = ctx.owned_single(i * 13 + 1)
+    return ctx.client.put(f"/api/events/{event_id}", json={"title": f"Renamed {i}"}, headers=headers)
+
+
+@scenario("events", "stream", requests=20)
+def events_stream(ctx, i):
+    response = ctx.client.get("/api/events/stream", headers=ctx.data.headers(ctx.busiest))
+    response.get_data()
+    return response
+
+
+# batch
+
+@scenario("batch", "create_100", expect=(201,), requests=30)
+def batch_create(ctx, i):
+    events = []
+    for _ in range(100):
+        start, end = ctx.next_slot()
+        events.append({"title": "Batch", "start_time": start.isoformat(), "end_time": end.isoformat()})
+    return ctx.client.post("/api/events/batch", json=events, headers=ctx.headers)
+
+
+# versioning
+
+@scenario("versioning", "list_deep")
+def versioning_list(ctx, i):
+    event_id, headers = ctx.deep(i)
+    return ctx.client.get(f"/api/events/{event_id}/versions", headers=headers)
+
+
+@scenario("versioning", "history")
+def versioning_history(ctx, i):
+    event_id, headers = ctx.deep(i)
+    number = 1 + (i * 37) % len(ctx.data.versions[event_id])
+    return ctx.client.get(f"/api/events/{event_id}/history/{number}", headers=headers)
+
+
+@scenario("versioning", "rollback", requests=50)
+def versioning_rollback(ctx, i):
+    event_id, headers = ctx.deep(i)
+    number = 1 + (i * 17) % len(ctx.data.versions[event_id])
+    return ctx.client.post(f"/api/events/{event_id}/rollback/{number}", headers=headers)
+
+
+# changelog
+
+@scenario("changelog", "list_deep")
+def changelog_list(ctx, i):
+    event_id, headers = ctx.deep(i)
+    return ctx.client.get(f"/api/events/{event_id}/changelog", headers=headers)
+
+
+@scenario("changelog", "diff")
+def changelog_diff(ctx, i):
+    event_id, headers = ctx.deep(i)
+    versions = ctx.data.versions[event_id]
+    return ctx.client.get(f"/api/events/{event_id}/diff/{versions[0]}/{versions[-1 - i % 20]}", headers=headers)
+
+
+# collaboration
+
+def share_targets(ctx, i, count=50):
+    start = 1 + (i * count) % max(1, len(ctx.data.users) - count)
+    return ctx.data.users[start:start + count]
+
+
+def collaboration_event(ctx, i):
+    event_id, headers = ctx.owned_single(i * 11 + 3)
+    return event_id, headers, ctx.owner_of(event_id)
+
+
+@scenario("collaboration", "share_50")
+def collaboration_share(ctx, i):
+    event_id, headers, owner = collaboration_event(ctx, i)
+    users = [{"user_id": user_id, "permission": "Viewer"} for user_id in share_targets(ctx, i) if user_id != owner]
+    return ctx.client.post(f"/api/events/{event_id}/share", json={"users": users}, headers=headers)
+
+
+@scenario("collaboration", "list_permissions")
+def collaboration_list(ctx, i):
+    event_id, headers, _ = collaboration_event(ctx, i)
+    return ctx.client.get(f"/api/events/{event_id}/permissions", headers=headers)
+
+
+@scenario("collaboration", "role_change_50")
+def collaboration_roles(ctx, i):
+    event_id, headers, owner = collaboration_event(ctx, i)
+    users = [{"user_id": user_id, "role": "Editor"} for user_id in share_targets(ctx, i) if user_id != owner]
+    return ctx.client.put(f"/api/events/{event_id}/permissions", json={"users": users}, headers=headers)
+
+
+@scenario("collaboration", "unshare_50")
+def collaboration_unshare(ctx, i):
+    event_id, headers, _ = collaboration_event(ctx, i)
+    return ctx.client.post(f"/api/events/{event_id}/unshare", json={"user_ids": share_targets(ctx, i)},
+                           headers=headers)
+
+
+# scheduling and ical
+
+@scenario("scheduling", "freebusy_20_users")
+def scheduling_freebusy(ctx, i):
+    users, headers = ctx.calendars(i, 20)
+    start = synthetic.BASE + timedelta(days=i % 30)
+    return ctx.client.post("/api/freebusy", json={
+        "user_ids": users, "start_time": start.isoformat(), "end_time": (start + timedelta(days=14)).isoformat()
+    }, headers=headers)
+
+
+@scenario("scheduling", "find_slots_5_users")
+def scheduling_find_slots(ctx, i):
+    users, headers = ctx.calendars(i, 5)
+    start = synthetic.BASE + timedelta(days=i % 30)
+    return ctx.client.post("/api/events/find-slots", json={
+        "participants": users, "duration_minutes": 60, "limit": 5,
+        "start_time": start.isoformat(), "end_time": (start + timedelta(days=14)).isoformat()
+    }, headers=headers)
+
+
+@scenario("ical", "export", requests=20)
+def ical_export(ctx, i):
+    response = ctx.client.get("/api/events/export.ics", headers=ctx.data.headers(ctx.user(i)))
+    response.get_data()
+    return response
+
+
+def run_scenario(ctx, spec, requests, warmup):
+    count = spec["requests"] or requests
+    for i in range(warmup):
+        spec["fn"](ctx, i)
+    latencies, errors = [], 0
+    began = time.perf_counter()
+    for i in range(warmup, warmup + count):
+        start = time.perf_counter()
+        response = spec["fn"](ctx, i)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code not in spec["expect"]:
+            errors += 1
+    return summarize(latencies, time.perf_counter() - began, errors)
+
+
+def run_fanout(ctx, audience, updates):
+    """Update an event shared with ``audience`` users, each on its own socket."""
+    app, data = ctx.app, ctx.data
+    owner = ctx.writer
+    start, end = ctx.next_slot()
+    response = ctx.client.post("/api/events", json={
+        "title": "Fan-out", "start_time": start.isoformat(), "end_time": end.isoformat()
+    }, headers=ctx.headers)
+    event_id = response.get_json()["id"]
+    listeners = [user_id for user_id in data.users if user_id != owner][:audience]
+    ctx.client.post(f"/api/events/{event_id}/share", json={
+        "users": [{"user_id": user_id, "permission": "Viewer"} for user_id in listeners]
+    }, headers=ctx.headers)
+
+    sockets = [socketio.test_client(app, auth={"token": data.tokens[user_id]}) for user_id in listeners]
+    for socket in sockets:
+        socket.get_received()
+
+    latencies, delivered = [], 0
+    began = time.perf_counter()
+    for i in range(updates):
+        start = time.perf_counter()
+        ctx.client.put(f"/api/events/{event_id}", json={"title": f"Fan-out {i}"}, headers=ctx.headers)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - began
+    for socket in sockets:
+        delivered += sum(1 for message in socket.get_received() if message["name"] == "event_updated")
+        socket.disconnect()
+    result = summarize(latencies, elapsed, errors=updates * len(sockets) - delivered)
+    result.update({"audience": len(sockets), "delivered": delivered,
+                   "deliveries_per_second": round(delivered / elapsed, 1) if elapsed else None})
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)["scenarios"]
+    regressions = []
+    print(f"\n{'scenario':<36} {'p95 before':>11} {'p95 after':>10} {'change':>8} {'rps change':>11}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("p95_ms") or current.get("p95_ms") is None:
+            continue
+        change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        rps = ((current["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+               if before.get("throughput_rps") else 0)
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<36} {before['p95_ms']:>11.2f} {current['p95_ms']:>10.2f} {change:>+7.1f}% {rps:>+10.1f}%{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events-per-user", type=int, default=50)
+    parser.add_argument("--recurring-ratio", type=float, default=0.1)
+    parser.add_argument("--share-ratio", type=float, default=0.3)
+    parser.add_argument("--deep-events", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=200, help="versions per deep event")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--fanout", type=int, nargs="+", default=[10, 100], help="audience sizes")
+    parser.add_argument("--fanout-updates", type=int, default=50)
+    parser.add_argument("--only", nargs="+", help="blueprints to run (auth, events, batch, ...)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="p95 growth flagged as a regression, in %%")
+    args = parser.parse_args()
+
+    app = create_app()
+    began = time.perf_counter()
+    data = synthetic.generate(
+        app, users=args.users, events_per_user=args.events_per_user, recurring_ratio=args.recurring_ratio,
+        share_ratio=args.share_ratio, deep_events=args.deep_events, depth=args.depth, seed=args.seed
+    )
+    seeded = time.perf_counter() - began
+    print(f"dataset {data.summary()} generated in {seeded:.1f}s")
+
+    ctx = Context(app, data)
+    results = {}
+    print(f"\n{'scenario':<36} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'req/s':>8} {'errors':>6}")
+    for spec in SCENARIOS:
+        if args.only and spec["blueprint"] not in args.only:
+            continue
+        result = run_scenario(ctx, spec, args.requests, args.warmup)
+        results[spec["name"]] = result
+        print(f"{spec['name']:<36} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{result['max_ms']:>8.2f} {result['throughput_rps']:>8.1f} {result['errors']:>6}")
+
+    if not args.only or "realtime" in args.only:
+        for audience in args.fanout:
+            result = run_fanout(ctx, audience, args.fanout_updates)
+            name = f"realtime.fanout_{audience}"
+            results[name] = result
+            print(f"{name:<36} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                  f"{result['max_ms']:>8.2f} {result['throughput_rps']:>8.1f} {result['errors']:>6}"
+                  f"  ({result['deliveries_per_second']:.0f} deliveries/s)")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": "sqlite",
+        "dataset": {**data.summary(), "seed": args.seed, "generated_in_s": round(seeded, 2)},
+        "settings": {"requests": args.requests, "warmup": args.warmup},
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.threshold:.0f}% at p95")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Synthetic calendars for the benchmarks.
+
+``generate`` fills the app's database with users, owned and shared events,
+recurring series and some events with deep version histories, using bulk
+inserts so large datasets load in seconds. The same seed always produces
+the same data. Call it with the app created against an empty database.
+"""
+import random
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import bindparam
+
+from app import bcrypt, db
+from app.models import Event, EventPermission, EventVersion, User
+from app.routes.versioning import diff_snapshots, event_snapshot, initial_changes
+
+PASSWORD = "benchmark-password"
+BASE = datetime(2030, 1, 5, 8, 0)
+PATTERNS = (
+    "FREQ=DAILY;COUNT=30",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=40",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU",
+    "FREQ=MONTHLY;COUNT=12",
+)
+LOCATIONS = ("Room 1", "Room 2", "Board room", "Online", None)
+
+
+class Dataset:
+    """Ids and tokens of a generated dataset, for building requests."""
+
+    def __init__(self):
+        self.users = []
+        self.usernames = {}
+        self.tokens = {}
+        self.refresh_tokens = {}
+        self.owned = {}
+        self.single = []
+        self.recurring = []
+        self.shared = []
+        self.deep = []
+        self.versions = {}
+        self.span = (BASE, BASE)
+
+    def headers(self, user_id):
+        return {"Authorization": "Bearer " + self.tokens[user_id]}
+
+    def summary(self):
+        return {
+            "users": len(self.users),
+            "events": sum(len(ids) for ids in self.owned.values()),
+            "recurring": len(self.recurring),
+            "shares": len(self.shared),
+            "deep_events": len(self.deep),
+            "versions": sum(len(ids) for ids in self.versions.values()),
+        }
+
+
+def _insert(table, rows, batch=5000):
+    ids = []
+    for start in range(0, len(rows), batch):
+        chunk = rows[start:start + batch]
+        ids.extend(db.session.execute(table.insert().returning(table.c.id), chunk).scalars().all())
+    return ids
+
+
+def _users(rng, count, dataset):
+    # One bcrypt hash for everyone: hashing is what login measures, not seeding.
+    password = bcrypt.generate_password_hash(PASSWORD).decode("utf-8")
+    rows = [{
+        "username": f"user{i}", "email": f"user{i}@example.com", "password": password,
+        "role": rng.choice(("Owner", "Editor", "Viewer")), "created_at": BASE, "calendar_version": 0
+    } for i in range(count)]
+    dataset.users = _insert(User.__table__, rows)
+    dataset.usernames = {user_id: row["username"] for user_id, row in zip(dataset.users, rows)}
+
+
+def _events(rng, events_per_user, recurring_ratio, dataset):
+    rows = []
+    for owner_id in dataset.users:
+        # Back-to-back slots with random gaps never overlap, like a calendar
+        # that went through the conflict checks.
+        moment = BASE + timedelta(minutes=30 * rng.randrange(48))
+        for i in range(events_per_user):
+            length = timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+            # users[0] writes in the benchmarks; an open-ended series of its
+            # own would make those writes conflict.
+            recurring = rng.random() < recurring_ratio and owner_id != dataset.users[0]
+            rows.append({
+                "title": f"Meeting {owner_id}-{i}",
+                "description": "Synthetic event" if rng.random() < 0.5 else None,
+                "location": rng.choice(LOCATIONS),
+                "start_time": moment, "end_time": moment + length,
+                "is_recurring": recurring,
+                "recurrence_pattern": rng.choice(PATTERNS) if recurring else None,
+                "owner_id": owner_id, "version_counter": 1, "created_at": BASE, "updated_at": BASE,
+            })
+            moment += length + timedelta(minutes=30 * rng.randrange(1, 24))
+    ids = _insert(Event.__table__, rows)
+    for event_id, row in zip(ids, rows):
+        dataset.owned.setdefault(row["owner_id"], []).append(event_id)
+        (dataset.recurring if row["is_recurring"] else dataset.single).append(event_id)
+    dataset.span = (BASE, max(row["end_time"] for row in rows))
+    return dict(zip(ids, rows))
+
+
+def _shares(rng, events, share_ratio, max_share, dataset):
+    # users[0] is never a share target, so it is allowed to create events.
+    targets = dataset.users[1:]
+    rows = []
+    for event_id, event in events.items():
+        if rng.random() >= share_ratio or not targets:
+            continue
+        for user_id in rng.sample(targets, min(len(targets), rng.randint(1, max_share))):
+            if user_id == event["owner_id"]:
+                continue
+            rows.append({"event_id": event_id, "user_id": user_id, "role": rng.choice(("Editor", "Viewer")),
+                         "username": dataset.usernames[user_id]})
+    _insert(EventPermission.__table__, rows)
+    dataset.shared = [(row["event_id"], row["user_id"]) for row in rows]
+
+
+def _versions(rng, events, deep_events, depth, keyframe_interval, dataset):
+    candidates = [event_id for event_id, event in events.items() if not event["is_recurring"]]
+    dataset.deep = rng.sample(candidates, min(deep_events, len(candidates)))
+    deep = set(dataset.deep)
+    rows, latest = [], []
+    for event_id, event in events.items():
+        state = event_snapshot(event, modified_at=BASE)
+        rows.append({
+            "event_id": event_id, "version_id": 1, "version_number": 1, "data": state,
+            "changes": initial_changes(state), "is_keyframe": True, "created_at": BASE,
+            "modified_by": str(event["owner_id"]), "updated_by": str(event["owner_id"]),
+        })
+        if event_id not in deep:
+            continue
+        for number in range(2, depth + 1):
+            modified_at = BASE + timedelta(minutes=number)
+            new_state = dict(state, title=f"{event['title']} v{number}", modified_at=modified_at.isoformat())
+            if number % 7 == 0:
+                new_state["location"] = rng.choice(LOCATIONS)
+            changes = diff_snapshots(state, new_state)
+            keyframe = (number - 1) % keyframe_interval == 0
+            data = new_state if keyframe else {
+                field: value for field, value in new_state.items() if field in changes or field == "modified_at"
+            }
+            rows.append({
+                "event_id": event_id, "version_id": number, "version_number": number, "data": data,
+                "changes": changes, "is_keyframe": keyframe, "created_at": modified_at,
+                "modified_by": str(event["owner_id"]), "updated_by": str(event["owner_id"]),
+            })
+            state = new_state
+        latest.append({"event": event_id, "counter": depth, "new_title": state["title"],
+                       "new_location": state["location"]})
+    ids = _insert(EventVersion.__table__, rows)
+    for version_id, row in zip(ids, rows):
+        if row["event_id"] in deep:
+            dataset.versions.setdefault(row["event_id"], []).append(version_id)
+    # Deep events end up in the state of their last version.
+    table = Event.__table__
+    if latest:
+        db.session.execute(table.update().where(table.c.id == bindparam("event")).values(
+            version_counter=bindparam("counter"), title=bindparam("new_title"), location=bindparam("new_location")
+        ), latest)
+
+
+def generate(app, users=200, events_per_user=50, recurring_ratio=0.1, share_ratio=0.3, max_share=5,
+             deep_events=20, depth=200, seed=1):
+    """Fill the database of ``app`` and return a ``Dataset``."""
+    rng = random.Random(seed)
+    dataset = Dataset()
+    with app.app_context():
+        _users(rng, users, dataset)
+        events = _events(rng, events_per_user, recurring_ratio, dataset)
+        _shares(rng, events, share_ratio, max_share, dataset)
+        _versions(rng, events, deep_events, depth, app.config["VERSION_KEYFRAME_INTERVAL"], dataset)
+        db.session.commit()
+        for user_id in dataset.users:
+            dataset.tokens[user_id] = create_access_token(identity=str(user_id))
+            dataset.refresh_tokens[user_id] = create_refresh_token(identity=str(user_id))
+    return dataset
@@ -1,12 +1,9 @@
-from app import create_app, db, socketio
+from app import create_app, socketio
 from flask import Flask, send_from_directory
 from flask_swagger_ui import get_swaggerui_blueprint
 import os
 app = create_app()
 
-with app.app_context():
-    db.create_all()
-
 
 @app.route('/openapi.yaml')
 def openapi_spec():
@@ -24,4 +21,12 @@ swaggerui_blueprint = get_swaggerui_blueprint(
 app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
 if __name__ == "__main__":
-    socketio.run(app, debug=True)
+    # The development entrypoint; deployments run under gunicorn or uvicorn
+    # (see the README), so the Werkzeug server may start without a terminal.
+    socketio.run(
+        app,
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", 5000)),
+        debug=os.getenv("FLASK_DEBUG", "false").lower() == "true",
+        allow_unsafe_werkzeug=True,
+    )
@@ -0,0 +1,52 @@
+"""Fixtures shared by the tests: a fresh app on its own SQLite file per test."""
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key-0123456789abcdef")
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-key-0123456789abcdef")
+os.environ.setdefault("METRICS_ENABLED", "false")
+os.environ.setdefault("REALTIME_COALESCE_SECONDS", "0")
+
+import pytest  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.services.cache import event_cache  # noqa: E402
+from app.services.conflicts import conflict_index  # noqa: E402
+from app.services.recurrence import occurrence_cache  # noqa: E402
+from app.services.token_cache import revoked_tokens  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    # Per-process caches outlive an app; start each test from empty ones.
+    for cache in (conflict_index, event_cache, occurrence_cache, revoked_tokens):
+        cache.clear()
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """Create a user; returns ``(auth_headers, user_id)``."""
+    def register(username):
+        response = client.post("/api/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": "password", "role": "Owner"
+        })
+        assert response.status_code == 201, response.get_json()
+        body = response.get_json()
+        return {"Authorization": "Bearer " + body["access_token"]}, body["user"]["id"]
+    return register
+
+
+def event_body(title, start, end, **fields):
+    return {"title": title, "start_time": start, "end_time": end, **fields}
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import threading
+
+import app.services.listing as listing
+from app.aio import AsgiApp
+from app.aio.database import async_db
+from app.aio.routes import HANDLERS
+from app.services.token_cache import revoked_tokens
+from tests.conftest import event_body
+
+
+def get(app, path, query_string, headers):
+    """Status and body of ``GET path`` through the async handlers."""
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query_string.encode(), "scheme": "http", "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1), "http_version": "1.1",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        async_db.init_app(app)
+        try:
+            await AsgiApp(app, HANDLERS, None)(scope, receive, send)
+        finally:
+            await async_db.dispose()
+
+    asyncio.run(run())
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return sent[0]["status"], json.loads(body)
+
+
+def test_blocking_work_runs_off_the_event_loop(app, client, register, monkeypatch):
+    headers, _ = register("alice")
+    body = event_body("Standup", "2030-01-01T09:00:00", "2030-01-01T09:30:00",
+                      is_recurring=True, recurrence_pattern="DAILY")
+    assert client.post("/api/events", json=body, headers=headers).status_code == 201
+
+    threads = {}
+    is_revoked, occurrences = revoked_tokens.is_revoked, listing.occurrence_cache.occurrences
+
+    def record(name, fn):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.current_thread())
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(revoked_tokens, "is_revoked", record("is_revoked", is_revoked))
+    monkeypatch.setattr(listing.occurrence_cache, "occurrences", record("occurrences", occurrences))
+    status, listed = get(app, "/api/events", "start_time=2030-01-01T00:00:00&end_time=2030-01-03T00:00:00",
+                         headers)
+    assert status == 200, listed
+    assert len(listed["events"][0]["occurrences"]) == 2
+    assert set(threads) == {"is_revoked", "occurrences"}
+    assert threading.main_thread() not in set.union(*threads.values())
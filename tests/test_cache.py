@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.cache import EVENT_FIELDS, CacheBackend, LocalCache, decode_value, encode_value
+
+
+def test_event_values_round_trip_through_json():
+    values = dict.fromkeys(EVENT_FIELDS)
+    values.update(id=1, title="Standup", is_recurring=False, owner_id=2, version_counter=3,
+                  start_time=datetime(2030, 1, 1, 9), end_time=datetime(2030, 1, 1, 9, 30),
+                  created_at=datetime(2029, 12, 1, 8, 0, 0, 123456), updated_at=datetime(2029, 12, 2))
+    raw = encode_value(values)
+    assert '"start_time":"2030-01-01T09:00:00"' in raw
+    assert decode_value(raw) == values
+    assert decode_value(encode_value("Editor")) == "Editor"
+
+
+def test_backends_implement_every_operation():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert isinstance(LocalCache(), CacheBackend)
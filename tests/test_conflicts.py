@@ -0,0 +1,56 @@
+from sqlalchemy import event, text
+
+from app import db
+from tests.conftest import event_body
+
+
+def test_conflict_with_event_written_by_another_worker(app, client, register):
+    headers, user_id = register("alice")
+    first = event_body("Standup", "2030-01-01T09:00:00", "2030-01-01T09:30:00")
+    assert client.post("/api/events", json=first, headers=headers).status_code == 201
+
+    # Another worker inserts an event and bumps the owner's calendar_version;
+    # this worker's index was loaded by the request above and is now stale.
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO events (title, start_time, end_time, is_recurring, owner_id, version_counter, "
+            "created_at, updated_at) VALUES ('Review', '2030-01-01 14:00:00', '2030-01-01 15:00:00', 0, :owner, 1, "
+            "'2030-01-01 00:00:00', '2030-01-01 00:00:00')"
+        ), {"owner": user_id})
+        db.session.execute(text("UPDATE user SET calendar_version = calendar_version + 1 WHERE id = :id"),
+                           {"id": user_id})
+        db.session.commit()
+
+    overlapping = event_body("Clash", "2030-01-01T14:30:00", "2030-01-01T15:30:00")
+    response = client.post("/api/events", json=overlapping, headers=headers)
+    assert response.status_code == 409
+    assert len(response.get_json()["conflicts"]) == 1
+
+
+def test_own_writes_are_seen(client, register):
+    headers, _ = register("bob")
+    body = event_body("Planning", "2030-01-02T10:00:00", "2030-01-02T11:00:00")
+    assert client.post("/api/events", json=body, headers=headers).status_code == 201
+    assert client.post("/api/events", json=body, headers=headers).status_code == 409
+
+
+def test_own_writes_do_not_reload_the_index(app, client, register):
+    headers, _ = register("carol")
+    loads = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT events.id") and "events.owner_id = ?" in statement:
+            loads.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        for day in range(1, 6):
+            body = event_body("Standup", f"2030-01-0{day}T09:00:00", f"2030-01-0{day}T09:30:00")
+            assert client.post("/api/events", json=body, headers=headers).status_code == 201
+        body = event_body("Clash", "2030-01-05T09:15:00", "2030-01-05T10:00:00")
+        assert client.post("/api/events", json=body, headers=headers).status_code == 409
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert len(loads) == 1
@@ -0,0 +1,42 @@
+from sqlalchemy.exc import OperationalError
+
+import app.routes.ical as ical
+
+
+def calendar(count):
+    events = "".join(
+        f"BEGIN:VEVENT\r\nSUMMARY:Event {i}\r\nDTSTART:2030010{i + 1}T090000\r\nDTEND:2030010{i + 1}T100000\r\n"
+        "END:VEVENT\r\n"
+        for i in range(count)
+    )
+    return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{events}END:VCALENDAR\r\n"
+
+
+def test_failed_chunk_reports_what_was_committed(app, client, register, monkeypatch):
+    headers, _ = register("alice")
+    app.config["ICS_IMPORT_CHUNK_SIZE"] = 2
+    import_chunk, calls = ical.import_chunk, []
+
+    def failing_second_chunk(entries, user_id):
+        calls.append(entries)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return import_chunk(entries, user_id)
+
+    monkeypatch.setattr(ical, "import_chunk", failing_second_chunk)
+    response = client.post("/api/events/import", data=calendar(5), headers=headers, content_type="text/calendar")
+
+    assert response.status_code == 422
+    body = response.get_json()
+    assert body["created"] == 2
+    assert body["stopped_at"] == 2
+    listed = client.get("/api/events", headers=headers).get_json()
+    assert [event["title"] for event in listed["events"]] == ["Event 0", "Event 1"]
+
+
+def test_import_creates_every_chunk(app, client, register):
+    headers, _ = register("alice")
+    app.config["ICS_IMPORT_CHUNK_SIZE"] = 2
+    response = client.post("/api/events/import", data=calendar(5), headers=headers, content_type="text/calendar")
+    assert response.status_code == 201
+    assert response.get_json()["created"] == 5
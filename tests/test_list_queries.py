@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from tests.conftest import event_body
+
+
+def count_statements(app, client, path, query_string, headers):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = client.get(path, query_string=query_string, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+@pytest.fixture
+def shared_calendar(client, register):
+    """100 events owned by bob and shared with alice as Viewer or Editor."""
+    bob, _ = register("bob")
+    alice, alice_id = register("alice")
+    events = [
+        event_body(f"Event {i}", f"2030-01-{1 + i // 24:02d}T{i % 24:02d}:00:00",
+                   f"2030-01-{1 + i // 24:02d}T{i % 24:02d}:30:00")
+        for i in range(100)
+    ]
+    response = client.post("/api/events/batch", json=events, headers=bob)
+    assert response.status_code == 201, response.get_json()
+    for i, created in enumerate(response.get_json()["created"]):
+        permission = "Editor" if i % 2 else "Viewer"
+        response = client.post(f"/api/events/{created['id']}/share",
+                               json={"users": [{"user_id": alice_id, "permission": permission}]}, headers=bob)
+        assert response.status_code == 200, response.get_json()
+    return alice
+
+
+@pytest.mark.parametrize("query_string", [
+    {},
+    {"include_total": "false"},
+    {"cursor": ""},
+    {"start_time": "2030-01-01T00:00:00", "end_time": "2030-02-01T00:00:00"},
+])
+def test_list_statements_do_not_grow_with_page_size(app, client, shared_calendar, query_string):
+    one, small = count_statements(app, client, "/api/events", {**query_string, "per_page": 1}, shared_calendar)
+    hundred, large = count_statements(app, client, "/api/events", {**query_string, "per_page": 100},
+                                      shared_calendar)
+
+    assert len(small["events"]) == 1
+    assert len(large["events"]) == 100
+    assert {event["permissions"] for event in large["events"]} == {"Viewer", "Editor"}
+    assert one == hundred
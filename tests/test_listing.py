@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from app.services.recurrence import series_occurrences
+from tests.conftest import event_body
+
+WINDOW = {"start_time": "2030-06-01T00:00:00", "end_time": "2030-07-01T00:00:00"}
+
+
+def test_series_without_occurrences_do_not_shorten_pages(client, register):
+    headers, _ = register("alice")
+    # A finished series sorts first but has nothing in the window.
+    ended = event_body("Ended", "2030-01-01T09:00:00", "2030-01-01T10:00:00",
+                       is_recurring=True, recurrence_pattern="FREQ=DAILY;COUNT=3")
+    assert client.post("/api/events", json=ended, headers=headers).status_code == 201
+    for day in range(1, 6):
+        single = event_body(f"Single {day}", f"2030-06-{day:02d}T09:00:00", f"2030-06-{day:02d}T10:00:00")
+        assert client.post("/api/events", json=single, headers=headers).status_code == 201
+
+    first = client.get("/api/events", query_string={**WINDOW, "per_page": 2}, headers=headers).get_json()
+    assert first["total"] == 5
+    assert [event["title"] for event in first["events"]] == ["Single 1", "Single 2"]
+
+    titles, cursor = [], ""
+    while cursor is not None:
+        page = client.get("/api/events", query_string={**WINDOW, "per_page": 2, "cursor": cursor},
+                          headers=headers).get_json()
+        assert len(page["events"]) == 2 or page["next_cursor"] is None
+        titles += [event["title"] for event in page["events"]]
+        cursor = page["next_cursor"]
+    assert titles == [f"Single {day}" for day in range(1, 6)]
+
+
+
+def test_page_arguments_are_checked_and_bounded(app, client, register):
+    headers, _ = register("alice")
+    app.config["LIST_MAX_PER_PAGE"] = 3
+    for day in range(1, 6):
+        single = event_body(f"Single {day}", f"2030-06-{day:02d}T09:00:00", f"2030-06-{day:02d}T10:00:00")
+        assert client.post("/api/events", json=single, headers=headers).status_code == 201
+
+    for bad in ({"per_page": "x"}, {"page": "first"}):
+        assert client.get("/api/events", query_string=bad, headers=headers).status_code == 400
+    for per_page, expected in ((-1, 1), (0, 1), (50, 3)):
+        body = client.get("/api/events", query_string={"per_page": per_page}, headers=headers).get_json()
+        assert (body["per_page"], len(body["events"])) == (expected, expected)
+    assert client.get("/api/events", query_string={"page": -2}, headers=headers).get_json()["page"] == 1
+
+    titles, cursor = [], ""
+    while cursor is not None:
+        page = client.get("/api/events", query_string={"per_page": 0, "cursor": cursor}, headers=headers).get_json()
+        titles += [event["title"] for event in page["events"]]
+        cursor = page["next_cursor"]
+    assert titles == [f"Single {day}" for day in range(1, 6)]
+
+def test_monthly_series_skip_ahead_keeps_count():
+    # The 31st only exists in some months, and COUNT counts real dates only.
+    start, end = datetime(2030, 1, 31, 9), datetime(2030, 1, 31, 10)
+    pattern = "FREQ=MONTHLY;COUNT=200"
+    everything = list(series_occurrences(start, end, pattern))
+    assert len(everything) == 200
+    window_start, window_end = datetime(2040, 1, 1), datetime(2041, 1, 1)
+    expected = [o for o in everything if window_start <= o[0] < window_end]
+    assert list(series_occurrences(start, end, pattern, window_start, window_end)) == expected
+    assert len(expected) == 7
@@ -0,0 +1,50 @@
+import sqlalchemy as sa
+from sqlalchemy import text
+
+from app import db
+from app.migrations import pending, upgrade
+from app.migrations.plans import check_plans
+
+
+def test_hot_queries_use_an_index(app):
+    with app.app_context():
+        assert pending(db.engine) == []
+        scans = {name: problems for name, _, problems in check_plans(db.engine) if problems}
+    assert scans == {}
+
+
+def test_a_missing_index_is_reported(app):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX idx_user_tokens_user"))
+        scans = {name: problems for name, _, problems in check_plans(db.engine) if problems}
+    assert list(scans) == ["user session"]
+    assert scans["user session"][0].startswith("SCAN user_tokens")
+
+
+def test_check_plans_command(app):
+    result = app.test_cli_runner().invoke(args=["db", "check-plans"])
+    assert result.exit_code == 0, result.output
+    assert "FAIL" not in result.output
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX idx_user_tokens_user"))
+        # Pooled connections keep the plans they prepared; the command
+        # normally runs in a new process.
+        db.engine.dispose()
+    result = app.test_cli_runner().invoke(args=["db", "check-plans"])
+    assert result.exit_code == 1
+    assert "FAIL  user session" in result.output
+
+
+def test_migrations_build_the_schema_of_the_models(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    upgrade(engine, log=lambda message: None)
+    inspector = sa.inspect(engine)
+    for table in db.metadata.sorted_tables:
+        assert {column["name"] for column in inspector.get_columns(table.name)} == set(table.columns.keys())
+        found = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= found
+        assert {c.name for c in table.constraints if isinstance(c, sa.UniqueConstraint) and c.name} <= found
+    engine.dispose()
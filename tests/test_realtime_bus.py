@@ -0,0 +1,185 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.services.bus import LocalSocketManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = 3
+TIMEOUT = 20
+RECORD_SEPARATOR = "\x1e"
+
+
+class PollingClient:
+    """A Socket.IO client over Engine.IO long-polling that collects events."""
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url + "/socket.io/?EIO=4&transport=polling"
+        self.events = []
+        self.received = threading.Condition()
+        self.sid = json.loads(self._request(self.base_url)[1:])["sid"]
+        self.base_url += "&sid=" + self.sid
+        self.send("40" + json.dumps({"token": token}))
+        self.running = True
+        threading.Thread(target=self._poll, daemon=True).start()
+
+    def _request(self, url, body=None):
+        request = urllib.request.Request(url, data=body.encode() if body is not None else None)
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            return response.read().decode()
+
+    def send(self, *packets):
+        self._request(self.base_url, RECORD_SEPARATOR.join(packets))
+
+    def _poll(self):
+        while self.running:
+            try:
+                payload = self._request(self.base_url)
+            except (urllib.error.URLError, OSError):
+                return
+            for packet in payload.split(RECORD_SEPARATOR):
+                if packet == "2":
+                    self.send("3")
+                elif packet.startswith("42"):
+                    with self.received:
+                        self.events.append(json.loads(packet[2:]))
+                        self.received.notify_all()
+
+    def wait_for(self, predicate, timeout):
+        with self.received:
+            return self.received.wait_for(lambda: predicate(self.events), timeout)
+
+    def close(self):
+        self.running = False
+        try:
+            self.send("1")
+        except (urllib.error.URLError, OSError):
+            pass
+
+
+def api(base_url, path, body, token=None):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    if token:
+        request.add_header("Authorization", "Bearer " + token)
+    with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+        return json.loads(response.read())
+
+
+def bus_url(directory):
+    return "local://" + os.path.join(directory, "bus")
+
+
+def publisher(directory):
+    """A write-only emitter on the workers' bus."""
+    manager = LocalSocketManager(bus_url(directory), write_only=True)
+    manager.initialize()
+    return manager
+
+
+def start_workers(count, base_port, directory):
+    """``run.py`` workers on consecutive ports sharing a database and bus."""
+    env = dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(directory, "bus.db"),
+        SOCKETIO_MESSAGE_QUEUE=bus_url(directory),
+        REALTIME_COALESCE_SECONDS="0",
+        FLASK_DEBUG="false",
+    )
+    log = open(os.path.join(directory, "workers.log"), "w")
+    workers = []
+    for i in range(count):
+        workers.append(subprocess.Popen([sys.executable, "run.py"], cwd=ROOT, stdout=log, stderr=log,
+                                        env=dict(env, PORT=str(base_port + i))))
+        if i == 0:
+            wait_until_up(base_port)  # let the first worker create the schema
+    for i in range(1, count):
+        wait_until_up(base_port + i)
+    return workers
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.yaml", timeout=1).read()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+def free_ports(count):
+    """A base port with (probably) ``count`` free ports from it."""
+    for _ in range(20):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            base = probe.getsockname()[1]
+        if base + count < 65536 and all(port_is_free(base + i) for i in range(count)):
+            return base
+    pytest.skip("no free range of ports")
+
+
+def port_is_free(port):
+    with socket.socket() as probe:
+        try:
+            probe.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+
+@pytest.fixture
+def workers():
+    """``(urls, directory)`` of workers sharing a local:// bus."""
+    base = free_ports(WORKERS)
+    # Not tmp_path: the bus binds Unix sockets, whose paths are short.
+    with tempfile.TemporaryDirectory() as directory:
+        processes = start_workers(WORKERS, base, directory)
+        try:
+            yield [f"http://127.0.0.1:{base + i}" for i in range(WORKERS)], directory
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+
+def test_messages_reach_clients_on_every_worker(workers):
+    worker_urls, directory = workers
+    api(worker_urls[0], "/api/auth/register", {
+        "username": "bus", "email": "bus@example.com", "password": "password", "role": "Owner"
+    })
+    login = api(worker_urls[0], "/api/auth/login", {"email": "bus@example.com", "password": "password"})
+    token, room = login["access_token"], f"user:{login['user']['id']}"
+    clients = [PollingClient(url, token) for url in worker_urls]
+    try:
+        time.sleep(0.5)
+        api(worker_urls[-1], "/api/events", {
+            "title": "Bus check", "start_time": "2030-01-01T10:00:00", "end_time": "2030-01-01T11:00:00"
+        }, token)
+        for client in clients:
+            assert client.wait_for(lambda events: any(e[0] == "event_created" for e in events), TIMEOUT)
+
+        bus = publisher(directory)
+        for seq in range(10):
+            bus.emit("event_update", {"seq": seq}, namespace="/", room=room)
+        for client in clients:
+            client.wait_for(lambda events: len(updates(events)) >= 10, TIMEOUT)
+            assert sorted(updates(client.events)) == list(range(10))
+    finally:
+        for client in clients:
+            client.close()
+
+
+def updates(events):
+    return [e[1]["seq"] for e in events if e[0] == "event_update"]
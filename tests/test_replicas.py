@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app import create_app
+from app.aio.database import AsyncDatabase
+from app.config import Config
+from app.services.cache import event_cache
+from tests.conftest import event_body
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_REPLICA_URI", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(Config, "REPLICA_STICKY_SECONDS", 0)
+
+
+def test_replica_reads_are_not_cached(replica, app, client, register):
+    headers, _ = register("alice")
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=headers).get_json()["id"]
+    result = app.test_cli_runner().invoke(args=["db", "sync-replica"])
+    assert result.exit_code == 0, result.output
+    assert client.put(f"/api/events/{event_id}", json={"title": "Moved"}, headers=headers).status_code == 200
+
+    # The replica still has the old title; it must not reach the cache.
+    response = client.get(f"/api/events/{event_id}", headers=headers)
+    assert response.get_json()["title"] == "Plan"
+    assert event_cache.backend.get(f"event:{event_id}") is None
+
+
+def test_async_replica_reads_are_not_cached(replica, app, client, register):
+    headers, _ = register("alice")
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=headers).get_json()["id"]
+    assert app.test_cli_runner().invoke(args=["db", "sync-replica"]).exit_code == 0
+    database = AsyncDatabase()
+    database.init_app(app)
+
+    async def load(replica):
+        async with database.session(replica=replica) as session:
+            return await event_cache.event_async(session, event_id)
+
+    async def run():
+        try:
+            assert (await load(True)).title == "Plan"
+            assert event_cache.backend.get(f"event:{event_id}") is None
+            await load(False)
+            assert event_cache.backend.get(f"event:{event_id}")["title"] == "Plan"
+        finally:
+            await database.dispose()
+
+    asyncio.run(run())
+
+
+def test_sticky_marks_need_a_shared_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(Config, "SQLALCHEMY_REPLICA_URI", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(Config, "REPLICA_STICKY_SECONDS", 5)
+    with pytest.raises(ValueError, match="EVENT_CACHE_URL"):
+        create_app()
+    monkeypatch.setattr(Config, "REPLICA_STICKY_LOCAL", True)
+    create_app()
@@ -0,0 +1,55 @@
+import pytest
+
+from tests.conftest import event_body
+
+WINDOW = {"start_time": "2030-01-01T00:00:00", "end_time": "2030-01-02T00:00:00"}
+
+
+@pytest.fixture
+def users(client, register):
+    """alice shares an event with bob; carol shares nothing."""
+    alice, alice_id = register("alice")
+    bob, bob_id = register("bob")
+    carol, carol_id = register("carol")
+    response = client.post("/api/events", json=event_body("Review", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=alice)
+    event_id = response.get_json()["id"]
+    response = client.post(f"/api/events/{event_id}/share",
+                           json={"users": [{"user_id": bob_id, "permission": "Viewer"}]}, headers=alice)
+    assert response.status_code == 200
+    return {"alice": (alice, alice_id), "bob": (bob, bob_id), "carol": (carol, carol_id)}
+
+
+def test_freebusy_of_users_sharing_an_event(client, users):
+    alice, alice_id = users["alice"]
+    bob, bob_id = users["bob"]
+    response = client.post("/api/freebusy", json={"user_ids": [alice_id, bob_id], **WINDOW}, headers=alice)
+    assert response.status_code == 200
+    assert response.get_json()["users"][str(bob_id)] == [
+        {"start": "2030-01-01T09:00:00", "end": "2030-01-01T10:00:00"}
+    ]
+    response = client.post("/api/freebusy", json={"user_ids": [alice_id], **WINDOW}, headers=bob)
+    assert response.status_code == 200
+
+
+def test_freebusy_of_unrelated_users_is_forbidden(client, users):
+    alice, alice_id = users["alice"]
+    carol, carol_id = users["carol"]
+    response = client.post("/api/freebusy", json={"user_ids": [alice_id, carol_id], **WINDOW}, headers=alice)
+    assert response.status_code == 403
+    response = client.post("/api/freebusy", json={"user_ids": [alice_id], **WINDOW}, headers=carol)
+    assert response.status_code == 403
+
+
+def test_find_slots_checks_participants(client, users):
+    alice, alice_id = users["alice"]
+    bob, bob_id = users["bob"]
+    _, carol_id = users["carol"]
+    body = {"duration_minutes": 30, "limit": 1, **WINDOW}
+    response = client.post("/api/events/find-slots", json={"participants": [alice_id, bob_id], **body},
+                           headers=bob)
+    assert response.status_code == 200
+    assert response.get_json()["slots"] == [{"start": "2030-01-01T00:00:00", "end": "2030-01-01T00:30:00"}]
+    response = client.post("/api/events/find-slots", json={"participants": [bob_id, carol_id], **body},
+                           headers=bob)
+    assert response.status_code == 403
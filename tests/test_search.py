@@ -0,0 +1,64 @@
+import pytest
+
+from tests.conftest import event_body
+
+
+def search(client, headers, q, **args):
+    response = client.get("/api/events/search", query_string={"q": q, **args}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [event["title"] for event in response.get_json()["events"]]
+
+
+@pytest.fixture
+def calendar(client, register):
+    """alice's events, the first shared with bob; carol sees none of them."""
+    alice, _ = register("alice")
+    bob, bob_id = register("bob")
+    carol, _ = register("carol")
+    ids = {}
+    for day, (title, fields) in enumerate([
+        ("Budget review", {"location": "Room 4"}),
+        ("Standup", {"description": "Quick budget check"}),
+        ("Lunch", {"location": "Budget cafe"}),
+        ("Planning session", {}),
+    ], start=1):
+        body = event_body(title, f"2030-01-0{day}T09:00:00", f"2030-01-0{day}T10:00:00", **fields)
+        ids[title] = client.post("/api/events", json=body, headers=alice).get_json()["id"]
+    response = client.post(f"/api/events/{ids['Budget review']}/share",
+                           json={"users": [{"user_id": bob_id, "permission": "Viewer"}]}, headers=alice)
+    assert response.status_code == 200
+    return {"alice": alice, "bob": bob, "carol": carol, "ids": ids}
+
+
+def test_title_matches_rank_above_location_and_description(client, calendar):
+    assert search(client, calendar["alice"], "budget") == ["Budget review", "Lunch", "Standup"]
+
+
+def test_words_match_as_prefixes_and_all_must_match(client, calendar):
+    assert search(client, calendar["alice"], "plan") == ["Planning session"]
+    assert search(client, calendar["alice"], "PLAN sess") == ["Planning session"]
+    assert search(client, calendar["alice"], "budget room") == ["Budget review"]
+    assert search(client, calendar["alice"], "ning") == []
+
+
+def test_only_owned_and_shared_events_are_found(client, calendar):
+    assert search(client, calendar["bob"], "budget") == ["Budget review"]
+    assert search(client, calendar["carol"], "budget") == []
+
+
+def test_updates_and_deletes_reach_the_index(client, calendar):
+    alice, ids = calendar["alice"], calendar["ids"]
+    response = client.put(f"/api/events/{ids['Lunch']}", json={"title": "Offsite", "location": "Harbour"},
+                          headers=alice)
+    assert response.status_code == 200
+    assert search(client, alice, "budget") == ["Budget review", "Standup"]
+    assert search(client, alice, "harbour") == ["Offsite"]
+
+    assert client.delete(f"/api/events/{ids['Standup']}", headers=alice).status_code == 200
+    assert search(client, alice, "budget") == ["Budget review"]
+    assert search(client, alice, "quick") == []
+
+
+def test_invalid_queries_are_rejected(client, calendar):
+    for args in ({"q": "  ,"}, {"q": "budget", "per_page": "x"}, {"q": "budget", "per_page": 0}):
+        assert client.get("/api/events/search", query_string=args, headers=calendar["alice"]).status_code == 400
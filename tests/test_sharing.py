@@ -0,0 +1,66 @@
+import pytest
+
+import app.services.sharing as sharing
+from app import db
+from app.models import EventPermission
+from app.services.broadcast import broadcaster
+from tests.conftest import event_body
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """``(event_type, payload, rooms)`` of every realtime message sent."""
+    messages = []
+    monkeypatch.setattr(broadcaster, "emitter", lambda event_type, payload, to: messages.append(
+        (event_type, payload, to)
+    ))
+    return messages
+
+
+@pytest.fixture
+def shared_event(client, register):
+    """alice's event and the ids of alice, bob, carol and dave."""
+    alice, alice_id = register("alice")
+    users = [register(name)[1] for name in ("bob", "carol", "dave")]
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=alice).get_json()["id"]
+    return alice, event_id, [alice_id, *users]
+
+
+def test_each_bulk_change_sends_one_message(client, shared_event, emitted):
+    alice, event_id, (owner, bob, carol, dave) = shared_event
+    emitted.clear()
+    response = client.post(f"/api/events/{event_id}/share", headers=alice, json={
+        "users": [{"user_id": user_id, "permission": "Viewer"} for user_id in (bob, carol, dave)]
+    })
+    assert response.status_code == 200
+    response = client.put(f"/api/events/{event_id}/permissions", headers=alice, json={
+        "users": [{"user_id": bob, "role": "Editor"}, {"user_id": carol, "role": "Viewer"}]
+    })
+    assert response.status_code == 200
+    response = client.post(f"/api/events/{event_id}/unshare", headers=alice, json={"user_ids": [carol, dave]})
+    assert response.get_json()["removed"] == [carol, dave]
+
+    assert [(event_type, sorted(rooms)) for event_type, _, rooms in emitted] == [
+        ("event_shared", sorted([f"user:{user_id}" for user_id in (owner, bob, carol, dave)] + [f"event:{event_id}"])),
+        ("permissions_changed", sorted([f"user:{owner}", f"user:{bob}", f"event:{event_id}"])),
+        ("event_unshared", sorted([f"user:{owner}", f"user:{carol}", f"user:{dave}", f"event:{event_id}"])),
+    ]
+    assert emitted[1][1]["users"] == [{"user_id": bob, "role": "Editor"}]
+
+
+def test_share_racing_another_share_gets_409(app, client, shared_event, emitted, monkeypatch):
+    alice, event_id, (_, bob, carol, _) = shared_event
+    body = {"users": [{"user_id": bob, "permission": "Viewer"}]}
+    assert client.post(f"/api/events/{event_id}/share", headers=alice, json=body).status_code == 200
+    emitted.clear()
+
+    # Another request inserts bob's share after this one read the existing ones.
+    monkeypatch.setattr(sharing, "existing_roles", lambda event_id, user_ids: {})
+    body = {"users": [{"user_id": carol, "permission": "Viewer"}, {"user_id": bob, "permission": "Editor"}]}
+    response = client.post(f"/api/events/{event_id}/share", headers=alice, json=body)
+    assert response.status_code == 409
+    assert emitted == []
+    with app.app_context():
+        rows = db.session.query(EventPermission.user_id, EventPermission.role).filter_by(event_id=event_id).all()
+    assert rows == [(bob, "Viewer")]
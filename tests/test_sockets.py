@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import socketio as python_socketio
+from flask_jwt_extended import decode_token
+
+from app import socketio
+from app.aio.realtime import AsyncRealtime
+from app.services.token_cache import revoked_tokens
+
+
+@pytest.fixture
+def tokens(client):
+    response = client.post("/api/auth/register", json={
+        "username": "alice", "email": "alice@example.com", "password": "password", "role": "Owner"
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def connects(app, token):
+    socket = socketio.test_client(app, auth={"token": token})
+    try:
+        return socket.is_connected()
+    finally:
+        if socket.is_connected():
+            socket.disconnect()
+
+
+def test_access_token_connects(app, tokens):
+    assert connects(app, tokens["access_token"])
+
+
+def test_refresh_token_is_refused(app, tokens):
+    assert not connects(app, tokens["refresh_token"])
+
+
+def test_revoked_access_token_is_refused(app, tokens):
+    with app.app_context():
+        jti = decode_token(tokens["access_token"])["jti"]
+        revoked_tokens.add(jti, datetime.now() + timedelta(hours=1))
+    assert not connects(app, tokens["access_token"])
+
+
+def test_asgi_server_refuses_refresh_and_revoked_tokens(app, tokens):
+    realtime = AsyncRealtime(app, python_socketio.AsyncServer(async_mode="asgi"))
+    with app.app_context():
+        jti = decode_token(tokens["access_token"])["jti"]
+        revoked_tokens.add(jti, datetime.now() + timedelta(hours=1))
+    for token in (tokens["refresh_token"], tokens["access_token"]):
+        assert asyncio.run(realtime.connect("sid", {}, {"token": token})) is False
+
+
+def test_rooms_other_than_own_and_visible_events_are_refused(app, client, tokens):
+    headers = {"Authorization": "Bearer " + tokens["access_token"]}
+    event_id = client.post("/api/events", json={
+        "title": "Plan", "start_time": "2030-01-01T09:00:00", "end_time": "2030-01-01T10:00:00"
+    }, headers=headers).get_json()["id"]
+    owner = socketio.test_client(app, auth={"token": tokens["access_token"]})
+    anonymous = socketio.test_client(app)
+    try:
+        for room in ("lobby", f"user:{tokens['user']['id'] + 1}", f"event:{event_id + 1}"):
+            owner.emit("join_room", {"room": room})
+        anonymous.emit("join_room", {"room": f"event:{event_id}"})
+        owner.emit("join_room", {"room": f"event:{event_id}"})
+        replies = [m["args"]["data"] for m in owner.get_received() + anonymous.get_received()
+                   if m["name"] == "message" and "room" in m["args"]["data"]]
+        assert replies.count(f"Joined room event:{event_id}") == 1
+        assert len([reply for reply in replies if reply.startswith("Not allowed")]) == 4
+
+        # Clients cannot push notifications into rooms.
+        anonymous.emit("send_event_update", {"room": f"event:{event_id}", "event": {"title": "Fake"}})
+        assert not any(m["name"] == "event_update" for m in owner.get_received())
+    finally:
+        owner.disconnect()
+        anonymous.disconnect()
@@ -0,0 +1,36 @@
+from flask_jwt_extended import decode_token
+from sqlalchemy import text
+
+from app import db
+from app.models import now_ist
+
+REVOKE = text(
+    "INSERT INTO token_blocklist (id, jti, user_id, access_token, refresh_token, created_at, "
+    "access_expires_at, refresh_expires_at) VALUES (:id, :jti, :user_id, 'a', 'r', :now, :expires, :expires)"
+)
+
+
+def revoke_elsewhere(app, row_id, jti, user_id):
+    """Commit a blocklist row as another worker would."""
+    now = now_ist().replace(tzinfo=None)
+    with app.app_context():
+        db.session.execute(REVOKE, {
+            "id": row_id, "jti": jti, "user_id": user_id, "now": now, "expires": now.replace(year=now.year + 1)
+        })
+        db.session.commit()
+
+
+def test_revocation_committed_after_a_later_id_is_seen(app, client, register):
+    app.config["TOKEN_BLOCKLIST_SYNC_SECONDS"] = 0
+    headers, user_id = register("alice")
+    with app.app_context():
+        jti = decode_token(headers["Authorization"].split()[1])["jti"]
+    assert client.get("/api/events", headers=headers).status_code == 200
+
+    # Row 4 was allocated first but its transaction commits after row 5's,
+    # by which time this worker's watermark has moved past it.
+    revoke_elsewhere(app, 5, "another-token", user_id)
+    assert client.get("/api/events", headers=headers).status_code == 200
+    revoke_elsewhere(app, 4, jti, user_id)
+
+    assert client.get("/api/events", headers=headers).status_code == 401
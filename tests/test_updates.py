@@ -0,0 +1,53 @@
+from sqlalchemy import text
+
+import app.routes.events as events
+from app import db
+from app.models import User
+from tests.conftest import event_body
+
+
+def test_update_racing_another_write_gets_412(app, client, register, monkeypatch):
+    headers, _ = register("alice")
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=headers).get_json()["id"]
+    etag = client.get(f"/api/events/{event_id}", headers=headers).headers["ETag"]
+
+    validate = events.validate_event_data
+
+    def concurrent_write(data, **kwargs):
+        # Another request commits between the If-Match check and this write.
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "UPDATE events SET title = 'Theirs', version_counter = version_counter + 1 WHERE id = :id"
+            ), {"id": event_id})
+        return validate(data, **kwargs)
+
+    monkeypatch.setattr(events, "validate_event_data", concurrent_write)
+    response = client.put(f"/api/events/{event_id}", json={"title": "Mine"},
+                          headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+
+    with app.app_context():
+        title = db.session.execute(text("SELECT title FROM events WHERE id = :id"), {"id": event_id}).scalar()
+    assert title == "Theirs"
+
+
+def test_update_bumps_the_whole_audience_in_batches(app, client, register):
+    app.config["CALENDAR_VERSION_BATCH"] = 2
+    headers, owner_id = register("alice")
+    audience = [register(name)[1] for name in ("bob", "carol", "dave")]
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=headers).get_json()["id"]
+    response = client.post(f"/api/events/{event_id}/share", headers=headers, json={
+        "users": [{"user_id": user_id, "permission": "Viewer"} for user_id in audience]
+    })
+    assert response.status_code == 200
+
+    def versions():
+        with app.app_context():
+            return {user.id: user.calendar_version for user in User.query.all()}
+
+    before = versions()
+    assert client.put(f"/api/events/{event_id}", json={"title": "Moved"}, headers=headers).status_code == 200
+    after = versions()
+    assert all(after[user_id] == before[user_id] + 1 for user_id in [owner_id, *audience])
@@ -0,0 +1,56 @@
+from sqlalchemy import event, text
+
+from app import db
+from tests.conftest import event_body
+
+
+def test_create_inserts_the_first_version_without_extra_statements(app, client, register):
+    headers, _ = register("alice")
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                               headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 201
+    assert not [s for s in statements if "max(event_versions.version_number)" in s or s.startswith("UPDATE events")]
+
+    event_id = response.get_json()["id"]
+    assert client.put(f"/api/events/{event_id}", json={"title": "Moved"}, headers=headers).status_code == 200
+    versions = client.get(f"/api/events/{event_id}/versions", headers=headers).get_json()
+    assert [v["version_number"] for v in versions] == [2, 1]
+
+
+def test_diff_has_one_shape_for_stored_and_legacy_versions(app, client, register):
+    headers, _ = register("alice")
+    event_id = client.post("/api/events", json=event_body("Plan", "2030-01-01T09:00:00", "2030-01-01T10:00:00"),
+                           headers=headers).get_json()["id"]
+    assert client.put(f"/api/events/{event_id}", json={"title": "Moved", "location": "Room 1"},
+                      headers=headers).status_code == 200
+    newest, oldest = client.get(f"/api/events/{event_id}/versions", headers=headers).get_json()
+
+    composed = client.get(f"/api/events/{event_id}/diff/{oldest['version_id']}/{newest['version_id']}",
+                          headers=headers).get_json()
+    with app.app_context():
+        # Versions written before field-level changes were stored.
+        db.session.execute(text("UPDATE event_versions SET changes = NULL WHERE event_id = :id"), {"id": event_id})
+        db.session.commit()
+    legacy = client.get(f"/api/events/{event_id}/diff/{oldest['version_id']}/{newest['version_id']}",
+                        headers=headers).get_json()
+
+    assert composed == legacy
+    assert composed["diff"]["values_changed"] == {
+        "root['title']": {"old_value": "Plan", "new_value": "Moved"},
+        "root['location']": {"old_value": None, "new_value": "Room 1"},
+        "root['modified_at']": {"old_value": oldest["modified_at"], "new_value": newest["modified_at"]},
+    }
+    backwards = client.get(f"/api/events/{event_id}/diff/{newest['version_id']}/{oldest['version_id']}",
+                           headers=headers).get_json()
+    assert backwards["diff"]["values_changed"]["root['title']"] == {"old_value": "Moved", "new_value": "Plan"}